@@ -1,36 +1,34 @@
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi import FastAPI, UploadFile, File, Form, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from typing import List, Optional
-import os, tempfile, uuid, time
+import asyncio, json, time
 
-from .settings import CHUNK_TOKENS, CHUNK_OVERLAP
-from .rag.weav_client import get_client, ensure_schema, get_collection
+from .settings import CHUNK_TOKENS, CHUNK_OVERLAP, INGEST_FILE_CONCURRENCY, COMPARE_LLM_CONCURRENCY, RETRIEVER_BACKEND, CONTEXT_PACKING
+from .rag.weav_client import ensure_schema, get_collection
+from .rag.connections import get_manager, aclose_manager
 from weaviate.exceptions import WeaviateBaseError
-from .rag.ingest import extract_pdf_text, build_chunks, embed_texts
-from .rag.retrievers import semantic, semantic_with_rerank, bm25, hybrid, to_props
-from .rag.prompts import build_prompt
-from .rag.llm import chat
-from .rag.types import QuestionRequest, AnswerResponse, DocRef
+from .rag.indexer import index_pdf
+from .rag.jobs import get_jobs, shutdown_jobs, JobQueueFull
+from .rag.pdf_extract import shutdown_pool
+from .rag.embed_cache import get_cache
+from .rag.retrievers import asemantic, asemantic_with_rerank, abm25, ahybrid, alocal_rerank, to_scored_props, query_vectors, leg_results
+from .rag.answer_cache import answers
+from .rag.prompts import build_prompt, build_packed_prompt
+from .rag.llm import achat, astream_chat, set_deadline, llm_stats, LLMDeadlineExceeded
+from .rag.metrics import start_timer, current_timer, stage, render_metrics, request_seconds, stage_seconds
+from .rag.types import (
+    QuestionRequest, AnswerResponse, DocRef, RetrieveResponse, CompareRequest, CompareResponse, ModeResult,
+)
 import logging, traceback
 
-app = FastAPI(title="RAG PDF QA", version="1.0.0")
-
-@app.get("/.well-known/ready")
-def ready():
-    return PlainTextResponse("Ready", 200)
-
-@app.get("/meta")
-def meta():
-    return {"status": "Ready", "chunk_tokens": CHUNK_TOKENS, "overlap": CHUNK_OVERLAP}
-
-@app.on_event("startup")
 def init():
     # retry loop so the container doesn't crash before weaviate is ready
+    pool = get_manager().weaviate
     for attempt in range(30):
         try:
-            client = get_client()
-            ensure_schema(client)
-            client.close()
+            ensure_schema(pool.get())
             return
         except Exception as e:
             try:
@@ -38,102 +36,424 @@ def init():
                     pass
             except Exception:
                 pass
+            pool.invalidate()
             time.sleep(2)
     # final attempt (raise if still failing)
-    client = get_client()
-    ensure_schema(client)
-    client.close()
+    ensure_schema(pool.get())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init()
+    try:
+        yield
+    finally:
+        shutdown_jobs()
+        shutdown_pool()
+        await aclose_manager()
+
+app = FastAPI(title="RAG PDF QA", version="1.0.0", lifespan=lifespan)
+
+@app.middleware("http")
+async def stage_timing(request: Request, call_next):
+    # stages timed while handling the request land in this timer (see rag/metrics.py)
+    timer = start_timer()
+    t0 = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    request_seconds.observe(time.perf_counter() - t0, method=request.method, path=path, status=response.status_code)
+    if timer.stages:
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+@app.get("/.well-known/ready")
+def ready():
+    return PlainTextResponse("Ready", 200)
+
+@app.get("/meta")
+def meta():
+    return {"status": "Ready", "chunk_tokens": CHUNK_TOKENS, "overlap": CHUNK_OVERLAP, "retriever_backend": RETRIEVER_BACKEND}
+
+@app.get("/stats")
+def stats():
+    cache = get_cache()
+    return {
+        "connections": get_manager().stats(),
+        "embedding_cache": cache.stats() if cache is not None else None,
+        "query_cache": query_vectors.stats(),
+        "leg_cache": leg_results.stats(),
+        "answer_cache": answers.stats(),
+        "llm": llm_stats(),
+        "ingest_jobs": get_jobs().stats(),
+    }
+
+@app.post("/cache/clear")
+def clear_caches():
+    """Drop cached answers, retrieval legs and query vectors (used by benchmarks for cold-cache runs)."""
+    cleared = {"answer_cache": len(answers.exact), "leg_cache": len(leg_results), "query_cache": len(query_vectors)}
+    answers.clear()
+    leg_results.clear()
+    query_vectors.clear()
+    return {"cleared": cleared}
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def _doc_keys(files: List[UploadFile], doc_keys: Optional[List[str]]):
+    """(per-file keys, error): a file without a key is keyed by its filename."""
+    if doc_keys and len(doc_keys) != len(files):
+        return None, f"Got {len(doc_keys)} doc_keys for {len(files)} files"
+    keys = [(k or "").strip() or f.filename for f, k in zip(files, doc_keys or [None] * len(files))]
+    if len(set(keys)) != len(keys):
+        return None, "doc_keys (default: the filename) must be unique within one upload"
+    return keys, None
 
 @app.post("/documents")
-async def upload_documents(files: List[UploadFile] = File(...)):
-    import traceback, logging
+async def upload_documents(files: List[UploadFile] = File(...), doc_keys: Optional[List[str]] = Form(None),
+                           include_timings: bool = False):
+    """Index PDFs. `doc_keys` (optional, one per file; default: the filename) names the documents:
+    uploading a new version under the same key re-indexes it incrementally instead of adding a
+    second document."""
     logger = logging.getLogger("uvicorn.error")
+    for f in files:
+        if not f.filename.lower().endswith(".pdf"):
+            return JSONResponse(status_code=400, content={"error": f"Only PDF supported. Got {f.filename}"})
+    keys, error = _doc_keys(files, doc_keys)
+    if error:
+        return JSONResponse(status_code=400, content={"error": error})
     try:
-        client = get_client()
-        col = get_collection(client)
-        total_chunks = 0
-        try:
-            for f in files:
-                if not f.filename.lower().endswith(".pdf"):
-                    return JSONResponse(status_code=400, content={"error": f"Only PDF supported. Got {f.filename}"})
-                blob = await f.read()
-                import tempfile, os, uuid
-                with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as fp:
-                    fp.write(blob)
-                    path = fp.name
-
-                pages = extract_pdf_text(path)
-                doc_id = str(uuid.uuid4())
-                items = build_chunks(doc_id, f.filename, f.filename, pages, CHUNK_TOKENS, CHUNK_OVERLAP)
-                if not items:
-                    continue
-                vectors = embed_texts([x["chunk"] for x in items])
-                for i, x in enumerate(items):
-                    col.data.insert(properties=x, vector=vectors[i])
-                total_chunks += len(items)
-                os.remove(path)
-            return {"message": "Documents processed successfully", "documents_indexed": len(files), "total_chunks": total_chunks}
-        finally:
-            client.close()
+        with get_manager().weaviate.borrow() as client:
+            col = get_collection(client)
+            # Stream each upload's spooled file straight into the pipeline; files run concurrently.
+            sem = asyncio.Semaphore(INGEST_FILE_CONCURRENCY)
+
+            async def one(f: UploadFile, key: Optional[str]):
+                async with sem:
+                    await f.seek(0)
+                    return await run_in_threadpool(index_pdf, col, f.file, None, f.filename, key=key)
+
+            t0 = time.perf_counter()
+            reports = await asyncio.gather(*(one(f, k) for f, k in zip(files, keys)))
+            seconds = time.perf_counter() - t0
+        inserted = sum(r["inserted"] for r in reports)
+        removed = sum(r["removed"] for r in reports)
+        if inserted or removed:
+            _corpus_changed()
+        errors = [{"file": f.filename, **e} for f, r in zip(files, reports) for e in r["errors"]]
+        timings = current_timer().snapshot() if include_timings and current_timer() else None
+        return {
+            "message": "Documents processed successfully",
+            "documents_indexed": len(files),
+            "total_pages": sum(r["pages"] for r in reports),
+            "total_chunks": sum(r["chunks"] for r in reports),
+            "inserted_chunks": inserted,
+            "skipped_chunks": sum(r["skipped"] for r in reports),
+            "removed_chunks": removed,
+            "unchanged_documents": sum(r["unchanged"] for r in reports),
+            "failed_chunks": len(errors),
+            "errors": errors,
+            "ingest_seconds": round(seconds, 3),
+            "chunks_per_s": round(inserted / seconds, 2) if seconds > 0 else None,
+            **({"timings": timings} if timings is not None else {}),
+        }
     except Exception as e:
         tb = traceback.format_exc()
         logger.error(tb)
         return JSONResponse(status_code=500, content={"error": str(e), "traceback": tb})
 
+def _corpus_changed():
+    # new content can change any answer
+    answers.bump_corpus_version()
+    leg_results.clear()
+
+def _index_job_file(path: str, filename: str, progress, doc_key: Optional[str] = None):
+    with get_manager().weaviate.borrow() as client:
+        return index_pdf(get_collection(client), path, None, filename, progress=progress, key=doc_key)
+
+@app.post("/documents/jobs", status_code=202)
+async def submit_ingest_job(files: List[UploadFile] = File(...), doc_keys: Optional[List[str]] = Form(None)):
+    """Spool the uploads to disk and index them in the background; poll GET /documents/jobs/{job_id}."""
+    for f in files:
+        if not f.filename.lower().endswith(".pdf"):
+            return JSONResponse(status_code=400, content={"error": f"Only PDF supported. Got {f.filename}"})
+    keys, error = _doc_keys(files, doc_keys)
+    if error:
+        return JSONResponse(status_code=400, content={"error": error})
+    jobs = get_jobs()
+    try:
+        job = jobs.create()
+    except JobQueueFull as e:
+        return JSONResponse(status_code=429, content={"error": f"Ingestion queue is full ({e}); retry later"})
+    try:
+        for f, key in zip(files, keys):
+            await f.seek(0)
+            await run_in_threadpool(job.add_file, f.file, f.filename, key)
+    except Exception:
+        jobs.discard(job)
+        raise
+    jobs.submit(job, _index_job_file, on_inserted=_corpus_changed)
+    return {"job_id": job.id, "status": job.status, "files": len(job.files), "status_url": f"/documents/jobs/{job.id}"}
+
+@app.get("/documents/jobs")
+def list_ingest_jobs():
+    return {"jobs": get_jobs().recent()}
+
+@app.get("/documents/jobs/{job_id}")
+def ingest_job_status(job_id: str):
+    job = get_jobs().get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": f"Unknown job {job_id}"})
+    return job.to_dict()
+
+class _Uncached(Exception):
+    """Carries an error response out of the answer cache so it is not stored."""
+    def __init__(self, response):
+        self.response = response
+
 @app.post("/question", response_model=AnswerResponse)
-def ask(body: QuestionRequest):
+async def ask(body: QuestionRequest):
+    set_deadline(body.deadline_ms)
+
+    async def compute():
+        res = await _answer(body)
+        if isinstance(res, JSONResponse):
+            raise _Uncached(res)
+        return res
+    try:
+        res = await answers.aget(body, compute)
+    except _Uncached as e:
+        return e.response
+    timer = current_timer()
+    if body.include_timings and timer is not None:
+        # cached answers are shared, so attach this request's timings to a copy
+        return res.model_copy(update={"timings": timer.snapshot()})
+    return res
+
+async def _retrieve(col, body: QuestionRequest):
+    """Retrieved chunk properties (with score/distance/rerank_score) for `body`; [] for no_rag, None for an unknown mode."""
+    if body.mode == "semantic":
+        res = await asemantic(col, body.question, body.top_k)
+    elif body.mode == "semantic_rerank":
+        res = await asemantic_with_rerank(col, body.question, body.top_k, body.rerank_property)
+    elif body.mode == "bm25":
+        res = await abm25(col, body.question, body.top_k)
+    elif body.mode == "hybrid":
+        res = await ahybrid(col, body.question, body.top_k, body.alpha, body.fusion)
+    elif body.mode == "local_rerank":
+        res = await alocal_rerank(col, body.question, body.top_k, body.alpha, body.rerank_property, fusion=body.fusion)
+    elif body.mode == "no_rag":
+        return []
+    else:
+        return None
+    return to_scored_props(res)
+
+def _prompt(body: QuestionRequest, contexts):
+    """(prompt, the contexts numbered [1..n] in it, packing counts or None)."""
+    if body.mode == "no_rag" or not contexts:
+        return f"Answer the question: {body.question}", [], None
+    if CONTEXT_PACKING:
+        return build_packed_prompt(body.question, contexts)
+    return build_prompt(body.question, contexts), contexts, None
+
+def _references(contexts):
+    refs = []
+    ctx_objs = []
+    for c in contexts:
+        ref = f"{c.get('title','')} (p.{c.get('page','?')})"
+        refs.append(ref)
+        ctx_objs.append(DocRef(title=c.get("title"), page=c.get("page"), score=c.get("score"),
+                               distance=c.get("distance"), rerank_score=c.get("rerank_score"),
+                               link=None, chunk=c.get("chunk")))
+    return refs, ctx_objs
+
+async def _answer(body: QuestionRequest):
     logger = logging.getLogger("uvicorn.error")
-    client = get_client()
-    col = get_collection(client)
     try:
-        logger.info(f"/question mode={body.mode} top_k={body.top_k} alpha={body.alpha} rerank_prop={body.rerank_property}")
-        if body.mode == "semantic":
-            res = semantic(col, body.question, body.top_k)
-        elif body.mode == "semantic_rerank":
-            res = semantic_with_rerank(col, body.question, body.top_k, body.rerank_property)
-        elif body.mode == "bm25":
-            res = bm25(col, body.question, body.top_k)
-        elif body.mode == "hybrid":
-            res = hybrid(col, body.question, body.top_k, body.alpha)
-        elif body.mode == "no_rag":
-            res = None
-        else:
-            return JSONResponse(status_code=400, content={"error": "Unknown mode"})
+        async with get_manager().aweaviate.borrow() as client:
+            return await _answer_on(get_collection(client), body)
+    except Exception:
+        tb = traceback.format_exc()
+        logger.error(tb)
+        return JSONResponse(status_code=500, content={"error": "/question failed", "traceback": tb})
 
-        contexts = []
-        if res is not None:
-            props = to_props(res)
-            contexts = props
-        logger.info(f"retrieved_contexts={len(contexts)}")
+async def _answer_on(col, body: QuestionRequest, chat=None):
+    """Retrieve from `col`, build the prompt and call `chat` (default `achat`); errors come back as JSONResponse."""
+    logger = logging.getLogger("uvicorn.error")
+    logger.info(f"/question mode={body.mode} top_k={body.top_k} alpha={body.alpha} rerank_prop={body.rerank_property}")
+    with stage("retrieve"):
+        contexts = await _retrieve(col, body)
+    if contexts is None:
+        return JSONResponse(status_code=400, content={"error": "Unknown mode"})
+    logger.info(f"retrieved_contexts={len(contexts)}")
 
-        if body.mode == "no_rag" or not contexts:
-            try:
-                answer = chat(body.question, f"Answer the question: {body.question}")
-            except Exception:
-                tb = traceback.format_exc()
-                logger.error(tb)
-                return JSONResponse(status_code=500, content={"error": "LLM call failed", "traceback": tb})
-            return AnswerResponse(answer=answer, references=[], contexts=[])
+    with stage("prompt"):
+        prompt, cited, packing = _prompt(body, contexts)
+    try:
+        with stage("llm"):
+            answer = await (chat or achat)(body.question, prompt)
+    except LLMDeadlineExceeded:
+        return JSONResponse(status_code=504, content={"error": "LLM deadline exceeded"})
+    except Exception:
+        tb = traceback.format_exc()
+        logger.error(tb)
+        return JSONResponse(status_code=500, content={"error": "LLM call failed", "traceback": tb})
+    if body.mode == "no_rag" or not contexts:
+        return AnswerResponse(answer=answer, references=[], contexts=[])
+    # references follow the prompt's numbering, so the answer's [n] citations line up with them
+    refs, ctx_objs = _references(cited)
+    return AnswerResponse(answer=answer, references=refs, contexts=ctx_objs, packing=packing)
+
+@app.post("/question/compare", response_model=CompareResponse)
+async def ask_compare(body: CompareRequest):
+    """Answer one question with several modes in a single request.
+
+    All modes share one pooled Weaviate client and run concurrently, so their query
+    embeddings coalesce into a single /vectors call (see `query_vectors`); LLM calls
+    run in parallel, at most COMPARE_LLM_CONCURRENCY at a time. Each mode goes
+    through the answer cache like /question and reports its own stage timings.
+    """
+    logger = logging.getLogger("uvicorn.error")
+    t0 = time.perf_counter()
+    request_timer = current_timer() or start_timer()
+    set_deadline(body.deadline_ms)  # one deadline for every mode
+    llm_slots = asyncio.Semaphore(max(1, COMPARE_LLM_CONCURRENCY))
 
-        prompt = build_prompt(body.question, contexts)
+    async def capped_chat(question: str, prompt: str) -> str:
+        with stage("llm_queue"):
+            await llm_slots.acquire()
         try:
-            answer = chat(body.question, prompt)
-        except Exception:
-            tb = traceback.format_exc()
-            logger.error(tb)
-            return JSONResponse(status_code=500, content={"error": "LLM call failed", "traceback": tb})
-        refs = []
-        ctx_objs = []
-        for c in contexts:
-            ref = f"{c.get('title','')} (p.{c.get('page','?')})"
-            refs.append(ref)
-            ctx_objs.append(DocRef(title=c.get("title"), page=c.get("page"), score=None, link=None, chunk=c.get("chunk")))
-        return AnswerResponse(answer=answer, references=refs, contexts=ctx_objs)
+            return await achat(question, prompt)
+        finally:
+            llm_slots.release()
+
+    async def one(col, mode: str) -> ModeResult:
+        # each mode runs in its own task, so this timer only sees that mode's stages
+        timer = start_timer(parent=request_timer)
+        t_mode = time.perf_counter()
+        q = QuestionRequest(question=body.question, mode=mode, top_k=body.top_k, alpha=body.alpha,
+                            rerank_property=body.rerank_property, fusion=body.fusion)
+
+        async def compute():
+            res = await _answer_on(col, q, capped_chat)
+            if isinstance(res, JSONResponse):
+                raise _Uncached(res)
+            return res
+        try:
+            res = await answers.aget(q, compute)
+        except _Uncached as e:
+            error = json.loads(e.response.body).get("error", "failed")
+            return ModeResult(mode=mode, latency_ms=_elapsed_ms(t_mode), timings=timer.snapshot(), error=error)
+        except Exception as e:
+            logger.error(traceback.format_exc())
+            return ModeResult(mode=mode, latency_ms=_elapsed_ms(t_mode), timings=timer.snapshot(),
+                              error=f"{type(e).__name__}: {e}")
+        return ModeResult(mode=mode, answer=res.answer, references=res.references, contexts=res.contexts,
+                          packing=res.packing, latency_ms=_elapsed_ms(t_mode), timings=timer.snapshot())
+
+    modes = list(dict.fromkeys(body.modes))
+    try:
+        async with get_manager().aweaviate.borrow() as client:
+            col = get_collection(client)
+            results = await asyncio.gather(*(one(col, m) for m in modes))
     except Exception:
         tb = traceback.format_exc()
         logger.error(tb)
-        return JSONResponse(status_code=500, content={"error": "/question failed", "traceback": tb})
-    finally:
-        client.close()
+        return JSONResponse(status_code=500, content={"error": "/question/compare failed", "traceback": tb})
+    return CompareResponse(results=list(results), total_ms=_elapsed_ms(t0))
+
+@app.post("/retrieve", response_model=RetrieveResponse)
+async def retrieve(body: QuestionRequest):
+    """Run only the retriever for `body` (no prompt, no LLM, no answer cache), for benchmarking modes."""
+    logger = logging.getLogger("uvicorn.error")
+    if body.mode == "no_rag":
+        return JSONResponse(status_code=400, content={"error": "no_rag has no retrieval step"})
+    t0 = time.perf_counter()
+    timer = current_timer() or start_timer()
+    try:
+        async with get_manager().aweaviate.borrow() as client:
+            with stage("retrieve"):
+                contexts = await _retrieve(get_collection(client), body)
+    except Exception:
+        tb = traceback.format_exc()
+        logger.error(tb)
+        return JSONResponse(status_code=500, content={"error": "/retrieve failed", "traceback": tb})
+    if contexts is None:
+        return JSONResponse(status_code=400, content={"error": "Unknown mode"})
+    _, ctx_objs = _references(contexts)
+    return RetrieveResponse(mode=body.mode, contexts=ctx_objs, retrieval_ms=_elapsed_ms(t0), timings=timer.snapshot())
+
+def _event(obj) -> str:
+    return json.dumps(obj) + "\n"
+
+def _elapsed_ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+@app.post("/question/stream")
+async def ask_stream(body: QuestionRequest):
+    """Streaming /question as NDJSON events.
+
+    ``references`` (sent as soon as retrieval is done) -> ``token`` (one per answer delta)
+    -> ``done`` with ``ttft_ms`` (request start to first token) and ``total_ms``;
+    an ``error`` event replaces ``done`` if the LLM call fails mid-stream.
+    """
+    logger = logging.getLogger("uvicorn.error")
+    t0 = time.perf_counter()
+    timer = current_timer() or start_timer()
+    deadline = set_deadline(body.deadline_ms)
+    key = answers.key(body)
+    cached = answers.exact.get(key)
+    contexts = None
+    if cached is None:
+        try:
+            async with get_manager().aweaviate.borrow() as client:
+                with stage("retrieve"):
+                    contexts = await _retrieve(get_collection(client), body)
+        except Exception:
+            tb = traceback.format_exc()
+            logger.error(tb)
+            return JSONResponse(status_code=500, content={"error": "/question failed", "traceback": tb})
+        if contexts is None:
+            return JSONResponse(status_code=400, content={"error": "Unknown mode"})
+    retrieval_ms = _elapsed_ms(t0)
 
+    async def events():
+        if cached is not None:
+            yield _event({"type": "references", "references": cached.references,
+                          "contexts": [c.model_dump() for c in cached.contexts], "retrieval_ms": retrieval_ms})
+            yield _event({"type": "token", "text": cached.answer})
+            yield _event({"type": "done", "cached": True, "ttft_ms": _elapsed_ms(t0), "total_ms": _elapsed_ms(t0),
+                          "packing": cached.packing})
+            return
+        with stage("prompt"):
+            prompt, cited, packing = _prompt(body, contexts)
+        refs, ctx_objs = _references(cited)
+        yield _event({"type": "references", "references": refs,
+                      "contexts": [c.model_dump() for c in ctx_objs], "retrieval_ms": retrieval_ms})
+        parts, ttft_ms = [], None
+        try:
+            t_llm = time.perf_counter()
+            async for delta in astream_chat(body.question, prompt, deadline):
+                if ttft_ms is None:
+                    ttft_ms = _elapsed_ms(t0)
+                parts.append(delta)
+                yield _event({"type": "token", "text": delta})
+            # timed by hand: a `with stage()` block cannot span the yields of a streaming body
+            llm_s = time.perf_counter() - t_llm
+            timer.add("llm", llm_s)
+            stage_seconds.observe(llm_s, stage="llm")
+        except LLMDeadlineExceeded:
+            yield _event({"type": "error", "error": "LLM deadline exceeded"})
+            return
+        except Exception:
+            logger.error(traceback.format_exc())
+            yield _event({"type": "error", "error": "LLM call failed"})
+            return
+        answer = "".join(parts).strip()
+        answers.exact.set(key, AnswerResponse(answer=answer, references=refs, contexts=ctx_objs, packing=packing))
+        done = {"type": "done", "cached": False, "ttft_ms": ttft_ms, "total_ms": _elapsed_ms(t0), "packing": packing}
+        if body.include_timings:
+            done["timings"] = timer.snapshot()
+        yield _event(done)
 
+    return StreamingResponse(events(), media_type="application/x-ndjson")
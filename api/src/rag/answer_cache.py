@@ -0,0 +1,121 @@
+"""Response cache in front of ``/question``.
+
+Two tiers:
+
+* exact -- keyed on (normalized question, mode, top_k, alpha, rerank_property,
+  corpus version); identical concurrent requests share one computation.
+* semantic (optional) -- reuses a cached answer for the same parameters when the
+  new question's embedding is within ``semantic_threshold`` cosine similarity.
+  Only modes whose retrieval embeds the question use it (the vector is then reused
+  by the retrieval that follows a miss); entries are bucketed per parameters, so a
+  lookup only scans questions asked with the same mode/top_k/alpha/...
+
+Every successful ingest bumps the corpus version, which makes all earlier
+entries unreachable.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from .cache import TTLCache, normalize_text
+from .retrievers import _aembed_query
+from ..settings import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_S, ANSWER_CACHE_SEMANTIC_THRESHOLD
+
+# Modes whose retrieval embeds the question; bm25 / no_rag never pay for an embedding
+EMBEDDING_MODES = frozenset({"semantic", "semantic_rerank", "hybrid", "local_rerank"})
+# Distinct parameter sets (one bucket each) the semantic tier keeps at a time
+SEMANTIC_BUCKETS = 32
+
+
+class AnswerCache:
+    def __init__(self, maxsize: int = ANSWER_CACHE_SIZE, ttl_s: float = ANSWER_CACHE_TTL_S,
+                 semantic_threshold: float = ANSWER_CACHE_SEMANTIC_THRESHOLD):
+        self.exact = TTLCache(maxsize, ttl_s)
+        self.maxsize, self.ttl_s = maxsize, ttl_s
+        # params -> TTLCache(exact key -> (unit-norm question vector, answer)); buckets are
+        # LRU-only, their entries expire on their own
+        self.semantic = TTLCache(SEMANTIC_BUCKETS) if semantic_threshold > 0 else None
+        self.semantic_threshold = semantic_threshold
+        self.semantic_hits = 0
+        self.corpus_version = 0
+
+    def params(self, body) -> Tuple[Any, ...]:
+        return (body.mode, body.top_k, round(body.alpha, 4), body.rerank_property, body.fusion, self.corpus_version)
+
+    def key(self, body) -> Tuple[Any, ...]:
+        return (normalize_text(body.question),) + self.params(body)
+
+    def clear(self) -> None:
+        self.exact.clear()
+        if self.semantic is not None:
+            self.semantic.clear()
+
+    def bump_corpus_version(self) -> int:
+        self.corpus_version += 1
+        self.clear()
+        return self.corpus_version
+
+    def _bucket(self, params) -> TTLCache:
+        bucket = self.semantic.get(params)
+        if bucket is None:
+            bucket = TTLCache(self.maxsize, self.ttl_s)
+            self.semantic.set(params, bucket)
+        return bucket
+
+    def _lookup_semantic(self, bucket: TTLCache, vec: np.ndarray) -> Optional[Any]:
+        entries = [v for _, v in bucket.items()]
+        if not entries:
+            return None
+        sims = np.stack([e[0] for e in entries]) @ vec
+        best = int(np.argmax(sims))
+        if sims[best] >= self.semantic_threshold:
+            self.semantic_hits += 1
+            return entries[best][1]
+        return None
+
+    async def aget(self, body, compute: Callable[[], Awaitable[Any]],
+                   embed: Optional[Callable[[str], Awaitable[Any]]] = None) -> Any:
+        """Return a cached answer for `body` or run `compute` (once per key across concurrent callers).
+
+        The semantic tier embeds the question with `embed` (default: the retrievers' cached
+        query embedding, so the retrieval that follows a miss reuses the vector); it is
+        skipped for modes outside EMBEDDING_MODES.
+        """
+        key = self.key(body)
+        if self.semantic is None or body.mode not in EMBEDDING_MODES:
+            return await self.exact.aget_or_compute(key, compute)
+        embed = embed or _aembed_query
+
+        cached = self.exact.get(key)
+        if cached is not None:
+            return cached
+        vec = np.asarray(await embed(body.question), dtype=np.float32)
+        vec = vec / (np.linalg.norm(vec) + 1e-12)
+        similar = self._lookup_semantic(self._bucket(self.params(body)), vec)
+        if similar is not None:
+            return similar
+        answer = await self.exact.aget_or_compute(key, compute)
+        # looked up again: the bucket may have been evicted while `compute` ran
+        self._bucket(self.params(body)).set(key, (vec, answer))
+        return answer
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "corpus_version": self.corpus_version,
+            "exact": self.exact.stats(),
+            "semantic": None if self.semantic is None else self._semantic_stats(),
+        }
+
+    def _semantic_stats(self) -> Dict[str, Any]:
+        buckets = [b for _, b in self.semantic.items()]
+        return {
+            "size": sum(len(b) for b in buckets),
+            "buckets": len(buckets),
+            "threshold": self.semantic_threshold,
+            "hits": self.semantic_hits,
+            "evictions": sum(b.evictions for b in buckets),
+            "bucket_evictions": self.semantic.evictions,
+        }
+
+
+answers = AnswerCache()
@@ -0,0 +1,152 @@
+"""In-memory LRU/TTL cache with coalescing of concurrent misses."""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+_MISSING = object()
+
+
+class _OwnerCancelled(Exception):
+    """The task computing a shared value was cancelled; waiters should retry."""
+
+
+def normalize_text(text: str) -> str:
+    """Cache key form of a query: case-folded with whitespace collapsed."""
+    return " ".join(text.casefold().split())
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire ``ttl_s`` seconds after being stored.
+
+    ``get_or_compute`` / ``aget_or_compute`` make concurrent callers that miss on the
+    same key share a single computation instead of each running it. If the task running
+    an async computation is cancelled, one of its waiters takes it over.
+    """
+
+    def __init__(self, maxsize: int, ttl_s: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._ainflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        expires = time.monotonic() + self.ttl_s if self.ttl_s else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def items(self):
+        """Snapshot of live (key, value) pairs, oldest first; does not touch LRU order or counters."""
+        now = time.monotonic()
+        with self._lock:
+            return [(k, v) for k, (v, exp) in self._data.items() if exp is None or exp >= now]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_or_compute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            fut = self._inflight.get(key)
+            owner = fut is None
+            if owner:
+                fut = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return fut.result()
+        try:
+            value = fn()
+            self.set(key, value)
+            fut.set_result(value)
+            return value
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    async def aget_or_compute(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+            fut = self._ainflight.get(key)
+            if fut is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(fut)
+            except _OwnerCancelled:
+                # the request computing the value went away; the first waiter to get here takes over
+                continue
+        fut = self._ainflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fn()
+            self.set(key, value)
+            fut.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # cancelling `fut` would cancel every waiter too; hand them a retryable error instead
+            fut.set_exception(_OwnerCancelled())
+            fut.exception()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            # mark retrieved so an un-awaited failure does not log "exception never retrieved"
+            fut.exception()
+            raise
+        finally:
+            self._ainflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,141 @@
+"""Token-aware chunking engine.
+
+Each page is encoded exactly once (pages are encoded together with
+``encode_batch``) and chunks are decoded from token windows, so ``num_tokens``
+is simply the window length. A chunk packed from sentences is re-encoded once,
+since tokens can merge across unit boundaries and the per-unit counts only bound
+the real count from above. Two modes:
+
+* ``tokens`` -- fixed windows of ``max_tokens`` with ``overlap`` tokens of overlap
+  (same output as ``utils.chunk_text``).
+* ``sentences`` -- greedily packs whole paragraphs/sentences into windows of at
+  most ``max_tokens``, carrying trailing sentences worth up to ``overlap`` tokens
+  into the next chunk; a sentence longer than the budget falls back to token windows.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .utils import get_encoder
+from ..settings import CHUNK_MODE, CHUNK_WORKERS, CHUNK_PAGE_BATCH
+
+Chunk = Tuple[str, int]  # (text, num_tokens)
+
+# paragraph breaks, or whitespace after sentence-ending punctuation
+_BOUNDARY = re.compile(r"\n\s*\n|(?<=[.!?])\s+")
+
+
+def _split_units(text: str) -> List[str]:
+    """Split into paragraph/sentence units that concatenate back to `text` exactly."""
+    units, start = [], 0
+    for m in _BOUNDARY.finditer(text):
+        if m.end() > start:
+            units.append(text[start:m.end()])
+            start = m.end()
+    if start < len(text):
+        units.append(text[start:])
+    return units
+
+
+class Chunker:
+    def __init__(self, max_tokens: int, overlap: int, mode: str = CHUNK_MODE,
+                 workers: int = CHUNK_WORKERS, page_batch: int = CHUNK_PAGE_BATCH):
+        if overlap >= max_tokens:
+            raise ValueError("overlap must be smaller than max_tokens")
+        if mode not in ("tokens", "sentences"):
+            raise ValueError(f"unknown chunk mode {mode!r}")
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.page_batch = max(1, page_batch)
+        self.enc = get_encoder()
+
+    def _windows(self, toks: List[int]) -> List[Chunk]:
+        out, i, step = [], 0, self.max_tokens - self.overlap
+        while i < len(toks):
+            window = toks[i:i + self.max_tokens]
+            out.append((self.enc.decode(window), len(window)))
+            if i + self.max_tokens >= len(toks):
+                break
+            i += step
+        return out
+
+    def _joined(self, cur: List[Tuple[str, int]]) -> Chunk:
+        text = "".join(t for t, _ in cur)
+        return text, len(self.enc.encode(text))
+
+    def _sentences(self, units: List[str], unit_toks: List[List[int]]) -> List[Chunk]:
+        out: List[Chunk] = []
+        cur: List[Tuple[str, int]] = []
+        cur_n = 0
+        for text, toks in zip(units, unit_toks):
+            n = len(toks)
+            if n > self.max_tokens:
+                if cur:
+                    out.append(self._joined(cur))
+                    cur, cur_n = [], 0
+                out.extend(self._windows(toks))
+                continue
+            if cur_n + n > self.max_tokens:
+                out.append(self._joined(cur))
+                # carry trailing units into the next chunk while they fit in the overlap
+                carry, carry_n = [], 0
+                for t, k in reversed(cur):
+                    if carry_n + k > self.overlap or carry_n + k + n > self.max_tokens:
+                        break
+                    carry.insert(0, (t, k))
+                    carry_n += k
+                cur, cur_n = carry, carry_n
+            cur.append((text, n))
+            cur_n += n
+        if cur:
+            out.append(self._joined(cur))
+        return out
+
+    def _chunk_encoded(self, item) -> List[Chunk]:
+        units, unit_toks = item
+        if self.mode == "tokens":
+            return self._windows(unit_toks[0])
+        return self._sentences(units, unit_toks)
+
+    def _encode_group(self, texts: List[str]):
+        if self.mode == "tokens":
+            toks = self.enc.encode_batch(texts, num_threads=self.workers)
+            return [([t], [k]) for t, k in zip(texts, toks)]
+        per_page = [_split_units(t) for t in texts]
+        flat = [u for units in per_page for u in units]
+        flat_toks = iter(self.enc.encode_batch(flat, num_threads=self.workers))
+        return [(units, [next(flat_toks) for _ in units]) for units in per_page]
+
+    def chunk_text(self, text: str) -> List[Chunk]:
+        if not text:
+            return []
+        return self._chunk_encoded(self._encode_group([text])[0])
+
+    def chunk_pages(self, pages: Iterable[Dict[str, Any]]) -> Iterator[Tuple[Dict[str, Any], List[Chunk]]]:
+        """Yield (page, chunks) in page order, encoding and splitting `page_batch` pages at a time."""
+        pool: Optional[ThreadPoolExecutor] = None
+        try:
+            group: List[Dict[str, Any]] = []
+            for page in pages:
+                group.append(page)
+                if len(group) >= self.page_batch:
+                    pool = pool or ThreadPoolExecutor(self.workers, thread_name_prefix="chunk")
+                    yield from self._chunk_group(group, pool)
+                    group = []
+            if group:
+                yield from self._chunk_group(group, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False)
+
+    def _chunk_group(self, group: List[Dict[str, Any]], pool: Optional[ThreadPoolExecutor]):
+        texts = [p["text"] or "" for p in group]
+        encoded = self._encode_group(texts)
+        if pool is None or self.workers == 1:
+            results = map(self._chunk_encoded, encoded)
+        else:
+            results = pool.map(self._chunk_encoded, encoded)
+        for page, chunks in zip(group, results):
+            yield page, chunks
@@ -0,0 +1,356 @@
+"""Process-wide pooled clients for Weaviate and the HTTP services the API talks to.
+
+Handlers borrow long-lived clients from here instead of opening (and closing) a
+connection per request. The manager is created lazily so scripts and tests can
+use it without the FastAPI lifespan; the app closes it on shutdown.
+"""
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from typing import Any, Dict, Optional
+
+import httpx
+from weaviate.exceptions import WeaviateConnectionError, WeaviateClosedClientError
+
+from . import weav_client
+from ..settings import (
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE, HTTP_KEEPALIVE_EXPIRY, HEALTHCHECK_INTERVAL_S,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+
+class PooledHTTP:
+    """A keep-alive httpx client bound to one base URL, with connection-reuse counters.
+
+    New TCP connections are counted through httpcore's ``trace`` extension, so
+    ``requests - connections_opened`` is the number of requests that rode on an
+    already-open connection. ``client`` and ``aclient`` keep separate pools but
+    share the counters. With ``http2`` the clients negotiate HTTP/2 where the server
+    offers it (TLS + ALPN), multiplexing concurrent requests over one connection; it
+    needs the ``h2`` package and falls back to HTTP/1.1 when that is missing.
+    """
+
+    def __init__(self, name: str, base_url: str, timeout: float, http2: bool = False):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("%s: http2 requested but the 'h2' package is not installed; using HTTP/1.1", name)
+            http2 = False
+        self.http2 = http2
+        self._client: Optional[httpx.Client] = None
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+
+    def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    async def _atrace(self, event: str, info: Dict[str, Any]) -> None:
+        self._trace(event, info)
+
+    def _on_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _aon_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self._atrace
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        timeout=self.timeout,
+                        limits=self._limits(),
+                        http2=self.http2,
+                        event_hooks={"request": [self._on_request]},
+                    )
+        return self._client
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self._limits(),
+                http2=self.http2,
+                event_hooks={"request": [self._aon_request]},
+            )
+        return self._aclient
+
+    def stats(self) -> Dict[str, Any]:
+        reused = max(self.requests - self.connections_opened, 0)
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / self.requests, 4) if self.requests else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    async def aclose(self) -> None:
+        client, self._aclient = self._aclient, None
+        if client is not None:
+            await client.aclose()
+        self.close()
+
+
+class WeaviatePool:
+    """One shared Weaviate client (HTTP session pool + gRPC channel) with health checks.
+
+    The client is health-checked at most every ``HEALTHCHECK_INTERVAL_S`` seconds when
+    borrowed, and is dropped and re-created when the check fails or a borrower hits a
+    connection error.
+    """
+
+    def __init__(self, healthcheck_interval: float = HEALTHCHECK_INTERVAL_S):
+        self.healthcheck_interval = healthcheck_interval
+        self._client = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.borrows = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.health_failures = 0
+
+    def _connect(self):
+        client = weav_client.get_client()
+        self.connects += 1
+        self._checked_at = time.monotonic()
+        return client
+
+    def _healthy(self, client) -> bool:
+        try:
+            return bool(client.is_ready())
+        except Exception:
+            return False
+
+    def _drop(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    def get(self):
+        with self._lock:
+            self.borrows += 1
+            if self._client is None:
+                self._client = self._connect()
+            elif time.monotonic() - self._checked_at > self.healthcheck_interval:
+                if self._healthy(self._client):
+                    self._checked_at = time.monotonic()
+                else:
+                    self.health_failures += 1
+                    self.reconnects += 1
+                    logger.warning("weaviate health check failed; reconnecting")
+                    self._drop()
+                    self._client = self._connect()
+            return self._client
+
+    def invalidate(self) -> None:
+        """Forget the current client so the next borrow reconnects."""
+        with self._lock:
+            if self._client is not None:
+                self.reconnects += 1
+            self._drop()
+
+    @contextmanager
+    def borrow(self):
+        client = self.get()
+        try:
+            yield client
+        except (WeaviateConnectionError, WeaviateClosedClientError):
+            self.invalidate()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "borrows": self.borrows,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "health_failures": self.health_failures,
+            "connections_reused": max(self.borrows - self.connects, 0),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._drop()
+
+
+class AsyncWeaviatePool:
+    """Async counterpart of :class:`WeaviatePool` backed by ``WeaviateAsyncClient``.
+
+    The client belongs to the event loop it was connected on, so it should only be
+    borrowed from async handlers.
+    """
+
+    def __init__(self, healthcheck_interval: float = HEALTHCHECK_INTERVAL_S):
+        self.healthcheck_interval = healthcheck_interval
+        self._client = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self.borrows = 0
+        self.connects = 0
+        self.reconnects = 0
+        self.health_failures = 0
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _connect(self):
+        client = weav_client.get_async_client()
+        await client.connect()
+        self.connects += 1
+        self._checked_at = time.monotonic()
+        return client
+
+    async def _healthy(self, client) -> bool:
+        try:
+            return bool(await client.is_ready())
+        except Exception:
+            return False
+
+    async def _drop(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                await client.close()
+            except Exception:
+                pass
+
+    async def get(self):
+        async with self._get_lock():
+            self.borrows += 1
+            if self._client is None:
+                self._client = await self._connect()
+            elif time.monotonic() - self._checked_at > self.healthcheck_interval:
+                if await self._healthy(self._client):
+                    self._checked_at = time.monotonic()
+                else:
+                    self.health_failures += 1
+                    self.reconnects += 1
+                    logger.warning("weaviate (async) health check failed; reconnecting")
+                    await self._drop()
+                    self._client = await self._connect()
+            return self._client
+
+    async def invalidate(self) -> None:
+        async with self._get_lock():
+            if self._client is not None:
+                self.reconnects += 1
+            await self._drop()
+
+    @asynccontextmanager
+    async def borrow(self):
+        client = await self.get()
+        try:
+            yield client
+        except (WeaviateConnectionError, WeaviateClosedClientError):
+            await self.invalidate()
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "borrows": self.borrows,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "health_failures": self.health_failures,
+            "connections_reused": max(self.borrows - self.connects, 0),
+        }
+
+    async def close(self) -> None:
+        await self._drop()
+
+
+class ConnectionManager:
+    def __init__(self):
+        self.weaviate = WeaviatePool()
+        self.aweaviate = AsyncWeaviatePool()
+        self._http: Dict[str, PooledHTTP] = {}
+        self._lock = threading.Lock()
+
+    def http(self, name: str, base_url: str, timeout: float, http2: bool = False) -> PooledHTTP:
+        """Return the pooled client registered under ``name``, creating it on first use."""
+        pooled = self._http.get(name)
+        if pooled is None:
+            with self._lock:
+                pooled = self._http.get(name)
+                if pooled is None:
+                    pooled = PooledHTTP(name, base_url, timeout, http2)
+                    self._http[name] = pooled
+        return pooled
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "weaviate": self.weaviate.stats(),
+            "weaviate_async": self.aweaviate.stats(),
+            "http": {name: p.stats() for name, p in self._http.items()},
+        }
+
+    def close(self) -> None:
+        self.weaviate.close()
+        for p in list(self._http.values()):
+            p.close()
+
+    async def aclose(self) -> None:
+        await self.aweaviate.close()
+        for p in list(self._http.values()):
+            await p.aclose()
+        self.close()
+
+
+_manager: Optional[ConnectionManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_manager() -> ConnectionManager:
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ConnectionManager()
+    return _manager
+
+
+def close_manager() -> None:
+    global _manager
+    with _manager_lock:
+        if _manager is not None:
+            _manager.close()
+            _manager = None
+
+
+async def aclose_manager() -> None:
+    global _manager
+    mgr, _manager = _manager, None
+    if mgr is not None:
+        await mgr.aclose()
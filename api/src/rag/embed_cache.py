@@ -0,0 +1,159 @@
+"""Content-addressed, on-disk embedding cache.
+
+Vectors are stored as little-endian float32 blobs in SQLite, keyed on
+(model key, sha1 of the text) -- the same sha1 ``build_chunks`` stores as the
+chunk ``hash``. The model key names the inference backend too (``model@backend``),
+since fp16 / int8 / ONNX backends of one model return different vectors. Entries carry a last-access timestamp and the least recently
+used ones are evicted once the table grows past ``max_entries``.
+"""
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .utils import sha1_bytes
+from ..settings import EMBEDDING_MODEL, EMBEDDING_BACKEND, EMBED_CACHE_ENABLED, EMBED_CACHE_PATH, EMBED_CACHE_MAX_ENTRIES
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    model TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vec BLOB NOT NULL,
+    accessed REAL NOT NULL,
+    PRIMARY KEY (model, hash)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS embeddings_accessed ON embeddings (accessed);
+"""
+
+# SQLite caps bound parameters per statement; look keys up in slices of this size
+_MAX_PARAMS = 500
+
+
+def model_key(model: str = EMBEDDING_MODEL, backend: str = EMBEDDING_BACKEND) -> str:
+    return f"{model}@{backend}"
+
+
+class EmbeddingCache:
+    def __init__(self, path: str, max_entries: int = EMBED_CACHE_MAX_ENTRIES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, model: str, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        uniq = list(dict.fromkeys(keys))
+        with self._lock:
+            for i in range(0, len(uniq), _MAX_PARAMS):
+                part = uniq[i:i + _MAX_PARAMS]
+                marks = ",".join("?" * len(part))
+                rows = self._db.execute(
+                    f"SELECT hash, vec FROM embeddings WHERE model = ? AND hash IN ({marks})", (model, *part)
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype="<f4")
+            if found:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE embeddings SET accessed = ? WHERE model = ? AND hash = ?",
+                    [(now, model, h) for h in found],
+                )
+            self.hits += len(found)
+            self.misses += len(uniq) - len(found)
+        return found
+
+    def put_many(self, model: str, entries: Dict[str, Sequence[float]]) -> None:
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for h, vec in entries.items():
+            arr = np.asarray(vec, dtype="<f4")
+            rows.append((model, h, arr.shape[0], arr.tobytes(), now))
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+            self._db.execute("COMMIT")
+            self._evict()
+
+    def _evict(self) -> None:
+        (count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM embeddings WHERE (model, hash) IN "
+                "(SELECT model, hash FROM embeddings ORDER BY accessed LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": len(self),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+def embed_with_cache(texts: List[str], embed: Callable[[List[str]], Sequence[Sequence[float]]],
+                     cache: EmbeddingCache, model: Optional[str] = None) -> np.ndarray:
+    """Serve `texts` from the cache and send only the (deduplicated) misses to `embed`.
+
+    `model` defaults to `model_key()`. Returns an (n, dim) float32 array in the order of `texts`.
+    """
+    model = model or model_key()
+    keys = [sha1_bytes(t.encode("utf-8")) for t in texts]
+    found = cache.get_many(model, keys)
+    missing: Dict[str, str] = {}
+    for k, t in zip(keys, texts):
+        if k not in found and k not in missing:
+            missing[k] = t
+    if missing:
+        fresh = embed(list(missing.values()))
+        new = dict(zip(missing.keys(), fresh))
+        cache.put_many(model, new)
+        found.update({k: np.asarray(v, dtype="<f4") for k, v in new.items()})
+    if not keys:
+        return np.empty((0, 0), dtype="<f4")
+    return np.stack([found[k] for k in keys])
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[EmbeddingCache]:
+    """The process-wide cache, or None when EMBED_CACHE_ENABLED is false."""
+    global _cache
+    if not EMBED_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(EMBED_CACHE_PATH)
+    return _cache
@@ -0,0 +1,113 @@
+"""API-side fusion of retrieval legs (BM25 + vector) into one ranking.
+
+Methods (``HYBRID_FUSION`` or the request's ``fusion``):
+
+* ``relative_score`` -- Weaviate's relativeScoreFusion: min-max normalise each leg's scores
+  (BM25 score, negated vector distance) and add them weighted by ``1 - alpha`` / ``alpha``
+* ``rrf``            -- reciprocal rank fusion: each leg adds ``weight / (k + rank)`` (rank from 1)
+
+Legs are scored with NumPy over the union of their hits. The input objects are never
+modified: the fused result holds copies whose metadata carries the fused ``score``
+(legs may come from the shared leg cache).
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+FUSION_METHODS = ("relative_score", "rrf")
+
+
+class FusedResult:
+    """Minimal stand-in for a Weaviate query result: just the fused `objects`."""
+    def __init__(self, objects):
+        self.objects = objects
+
+
+class Metadata:
+    def __init__(self, score: Optional[float] = None, distance: Optional[float] = None,
+                 rerank_score: Optional[float] = None):
+        self.score = score
+        self.distance = distance
+        self.rerank_score = rerank_score
+
+
+class Hit:
+    """Copy of a retrieved object with its own metadata."""
+    def __init__(self, uuid, properties: Dict[str, Any], metadata: Metadata):
+        self.uuid = uuid
+        self.properties = properties
+        self.metadata = metadata
+
+
+def with_metadata(obj, **changes) -> Hit:
+    """A copy of `obj` whose metadata has `changes` applied (score / distance / rerank_score)."""
+    meta = getattr(obj, "metadata", None)
+    fields = {f: getattr(meta, f, None) for f in ("score", "distance", "rerank_score")}
+    fields.update(changes)
+    return Hit(obj.uuid, obj.properties, Metadata(**fields))
+
+
+def min_max(values: np.ndarray) -> np.ndarray:
+    if values.size == 0:
+        return values
+    lo, hi = values.min(), values.max()
+    if hi == lo:
+        return np.ones_like(values)
+    return (values - lo) / (hi - lo)
+
+
+def bm25_scores(objs) -> np.ndarray:
+    return np.array([o.metadata.score or 0.0 for o in objs], dtype=np.float64)
+
+
+def vector_scores(objs) -> np.ndarray:
+    return np.array([-(o.metadata.distance or 0.0) for o in objs], dtype=np.float64)
+
+
+def fuse(legs: Sequence[Tuple[Sequence[Any], np.ndarray, float]], limit: int,
+         method: str = "relative_score", rrf_k: int = 60) -> FusedResult:
+    """Fuse `legs` of (objects in rank order, their raw scores, weight) and keep the best `limit`."""
+    if method not in FUSION_METHODS:
+        raise ValueError(f"unknown fusion {method!r}; expected one of {', '.join(FUSION_METHODS)}")
+    rows: Dict[Any, int] = {}
+    first: List[Any] = []
+    leg_rows = []
+    for objs, _, _ in legs:
+        idx = np.empty(len(objs), dtype=np.int64)
+        for i, o in enumerate(objs):
+            r = rows.get(o.uuid)
+            if r is None:
+                r = rows[o.uuid] = len(first)
+                first.append(o)
+            idx[i] = r
+        leg_rows.append(idx)
+    fused = np.zeros(len(first), dtype=np.float64)
+    for (objs, scores, weight), idx in zip(legs, leg_rows):
+        if not len(idx):
+            continue
+        if method == "rrf":
+            contrib = weight / (rrf_k + np.arange(1, len(idx) + 1, dtype=np.float64))
+        else:
+            contrib = weight * min_max(np.asarray(scores, dtype=np.float64))
+        # a uuid appears at most once per leg, so fancy-index += does not drop contributions
+        fused[idx] += contrib
+    order = np.argsort(-fused, kind="stable")[:limit]
+    # keep the vector distance of objects that came from a vector leg
+    distance = {o.uuid: o.metadata.distance for objs, _, _ in legs for o in objs
+                if getattr(o.metadata, "distance", None) is not None}
+    return FusedResult([
+        with_metadata(first[r], score=float(fused[r]), distance=distance.get(first[r].uuid)) for r in order
+    ])
+
+
+def relative_score_fusion(bm25_result, vector_result, alpha: float, limit: int) -> FusedResult:
+    """Weaviate's relativeScoreFusion: min-max normalise each leg, weight the vector leg by `alpha`."""
+    return hybrid_fusion(bm25_result, vector_result, alpha, limit, "relative_score")
+
+
+def hybrid_fusion(bm25_result, vector_result, alpha: float, limit: int,
+                  method: str = "relative_score", rrf_k: int = 60) -> FusedResult:
+    bm25_objs = list(bm25_result.objects or [])
+    vec_objs = list(vector_result.objects or [])
+    return fuse([(bm25_objs, bm25_scores(bm25_objs), 1.0 - alpha),
+                 (vec_objs, vector_scores(vec_objs), alpha)], limit, method, rrf_k)
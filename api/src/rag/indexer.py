@@ -0,0 +1,372 @@
+"""Streaming, batched Weaviate ingestion.
+
+Ingestion runs as a pipeline of generator-fed stages connected by bounded queues:
+
+    pages -> chunks -> embed (fixed-size batches) -> insert (adaptive insert_many batches)
+
+Page extraction and chunking run lazily on a producer thread, embedding on a
+second thread, and insertion on the caller's thread, so embedding of the next
+batch overlaps insertion of the current one and at most ``PIPELINE_QUEUE_SIZE``
+batches are buffered between stages no matter how large the PDF is.
+
+An optional ``progress`` callback receives counter increments as the work happens
+(``pages=``, ``embedded=``, ``inserted=``, ``failed=``, ``skipped=``, ``removed=``)
+from whichever stage thread did it, e.g. to report on a background ingestion job.
+
+Re-indexing is incremental. A document's ``doc_id`` comes from the caller's key for it
+(the API uses the filename unless told otherwise) or, without one, from its content (the
+file's sha1) -- see ``doc_key``; each chunk gets a deterministic UUID from (doc_id, page,
+chunk_index). A new version under the same key addresses the same objects, so only chunks
+whose text hash changed (or that are new) are embedded and upserted, and chunks it no
+longer produces are deleted by ``doc_id``. New chunks are written unstamped; only once a
+run has stored every chunk without a failure are they all stamped with the file's sha1 and
+chunk count, and uploading that same file again is then skipped outright. An interrupted
+or partly failed run leaves the document unstamped, so the next upload resumes it (its
+already-stored chunks are kept, not re-embedded). Runs on one ``doc_id`` are serialised
+within the process.
+"""
+import contextvars
+import itertools
+import queue
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from weaviate.classes.data import DataObject
+from weaviate.classes.query import Filter, Sort
+from weaviate.exceptions import WeaviateInsertManyAllFailedError
+
+from . import ingest
+from .metrics import stage, timed_iter
+from .schema import PROP_CHUNK_INDEX, PROP_DOC_CHUNKS, PROP_DOC_ID, PROP_FILE_HASH, PROP_HASH, PROP_PAGE
+from .utils import sha1_file
+from ..settings import (
+    INGEST_BATCH_SIZE, INGEST_BATCH_MIN, INGEST_BATCH_MAX, INGEST_BATCH_TARGET_S,
+    EMBED_BATCH_SIZE, PIPELINE_QUEUE_SIZE, CHUNK_TOKENS, CHUNK_OVERLAP,
+)
+
+_DONE = object()
+
+DOC_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "rag-pdf-qa/DocChunk")
+EXISTING_PAGE_SIZE = 1000
+DELETE_BATCH = 1000
+
+_doc_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+_doc_locks_guard = threading.Lock()
+
+Progress = Callable[..., None]
+
+
+def _no_progress(**counts: int) -> None:
+    pass
+
+
+class AdaptiveBatchSize:
+    """AIMD batch sizing: grow additively while inserts are fast and clean, halve on errors or slow batches."""
+
+    def __init__(self, initial: int = INGEST_BATCH_SIZE, minimum: int = INGEST_BATCH_MIN,
+                 maximum: int = INGEST_BATCH_MAX, target_s: float = INGEST_BATCH_TARGET_S):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.size = min(max(initial, self.minimum), self.maximum)
+        self.step = max(1, initial // 4)
+        self.target_s = target_s
+
+    def observe(self, n: int, elapsed_s: float, n_errors: int) -> int:
+        if n_errors or elapsed_s > self.target_s:
+            self.size = max(self.minimum, self.size // 2)
+        elif n >= self.size and elapsed_s < self.target_s / 2:
+            self.size = min(self.maximum, self.size + self.step)
+        return self.size
+
+
+def _vector_lists(vectors) -> List[List[float]]:
+    # weaviate-client 4.7's insert_many only packs vectors given as lists (an ndarray is
+    # silently dropped), so convert the whole float32 batch in one C-level tolist() call
+    return np.asarray(vectors, dtype=np.float32).tolist()
+
+
+def insert_batch(col, items: List[Dict[str, Any]], vectors, offset: int = 0) -> Tuple[int, List[Dict[str, Any]]]:
+    """Insert one batch; returns (inserted, per-object errors) with indices relative to the whole upload."""
+    vectors = _vector_lists(vectors)
+    # an item's "uuid" becomes the object id (inserting an existing id replaces the object)
+    objs = [DataObject(properties={k: v for k, v in x.items() if k != "uuid"}, uuid=x.get("uuid"), vector=vectors[i])
+            for i, x in enumerate(items)]
+    try:
+        res = col.data.insert_many(objs)
+        failed = {i: err.message for i, err in res.errors.items()}
+    except WeaviateInsertManyAllFailedError as e:
+        failed = {i: str(e) for i in range(len(items))}
+    errors = [
+        {"index": offset + i, "page": items[i].get("page"), "chunk_index": items[i].get("chunk_index"), "error": msg}
+        for i, msg in sorted(failed.items())
+    ]
+    return len(items) - len(errors), errors
+
+
+def _batched(it: Iterable[Any], n: int) -> Iterator[List[Any]]:
+    it = iter(it)
+    while True:
+        batch = list(itertools.islice(it, n))
+        if not batch:
+            return
+        yield batch
+
+
+class _Pipeline:
+    """Bounded hand-off between stage threads; any stage failure stops the others."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.stop = threading.Event()
+        self.failures: List[BaseException] = []
+
+    def queue(self) -> "queue.Queue":
+        return queue.Queue(maxsize=self.queue_size)
+
+    def put(self, q: "queue.Queue", item: Any) -> bool:
+        while not self.stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, q: "queue.Queue") -> Any:
+        while not self.stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def fail(self, e: BaseException) -> None:
+        self.failures.append(e)
+        self.stop.set()
+
+
+def run_pipeline(col, chunks: Iterable[Dict[str, Any]], embed: Optional[Callable] = None,
+                 batcher: Optional[AdaptiveBatchSize] = None, embed_batch_size: int = EMBED_BATCH_SIZE,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, progress: Optional[Progress] = None) -> Dict[str, Any]:
+    """Embed and insert a (lazy) stream of chunks; returns the ingest report."""
+    embed = embed or ingest.embed_texts
+    progress = progress or _no_progress
+    batcher = batcher or AdaptiveBatchSize()
+    p = _Pipeline(queue_size)
+    to_embed, to_insert = p.queue(), p.queue()
+
+    def produce():
+        try:
+            for batch in _batched(chunks, embed_batch_size):
+                if not p.put(to_embed, batch):
+                    return
+        except BaseException as e:
+            p.fail(e)
+        finally:
+            p.put(to_embed, _DONE)
+
+    def embed_stage():
+        try:
+            while (batch := p.get(to_embed)) is not _DONE:
+                with stage("embed"):
+                    vectors = embed([x["chunk"] for x in batch])
+                progress(embedded=len(batch))
+                if not p.put(to_insert, (batch, vectors)):
+                    return
+        except BaseException as e:
+            p.fail(e)
+        finally:
+            p.put(to_insert, _DONE)
+
+    t0 = time.perf_counter()
+    # each stage thread runs in a copy of the caller's context so its stage timings reach the request
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(fn,), name=name, daemon=True)
+               for fn, name in ((produce, "ingest-chunk"), (embed_stage, "ingest-embed"))]
+    for t in threads:
+        t.start()
+
+    chunks_seen, inserted, batches, errors = 0, 0, 0, []
+    items: List[Dict[str, Any]] = []
+    vectors: List[Any] = []
+
+    def flush(n: int) -> None:
+        nonlocal items, vectors, inserted, batches
+        batch, batch_vecs = items[:n], vectors[:n]
+        items, vectors = items[n:], vectors[n:]
+        t = time.perf_counter()
+        with stage("insert"):
+            ok, errs = insert_batch(col, batch, batch_vecs, offset=inserted + len(errors))
+        batcher.observe(len(batch), time.perf_counter() - t, len(errs))
+        progress(inserted=ok, failed=len(errs))
+        inserted += ok
+        errors.extend(errs)
+        batches += 1
+
+    try:
+        while (got := p.get(to_insert)) is not _DONE:
+            batch, batch_vecs = got
+            chunks_seen += len(batch)
+            items.extend(batch)
+            vectors.extend(batch_vecs)
+            while len(items) >= batcher.size:
+                flush(batcher.size)
+        if not p.failures and items:
+            flush(len(items))
+    except BaseException as e:
+        p.fail(e)
+    finally:
+        p.stop.set()
+        for t in threads:
+            t.join()
+    if p.failures:
+        raise p.failures[0]
+
+    seconds = time.perf_counter() - t0
+    return {
+        "chunks": chunks_seen,
+        "inserted": inserted,
+        "failed": len(errors),
+        "batches": batches,
+        "final_batch_size": batcher.size,
+        "seconds": round(seconds, 3),
+        "chunks_per_s": round(inserted / seconds, 2) if seconds > 0 else None,
+        "errors": errors,
+    }
+
+
+def index_chunks(col, items: List[Dict[str, Any]], embed: Optional[Callable] = None,
+                 batcher: Optional[AdaptiveBatchSize] = None) -> Dict[str, Any]:
+    return run_pipeline(col, items, embed=embed, batcher=batcher)
+
+
+def doc_key(file_hash: str, key: Optional[str] = None) -> str:
+    """doc_id of a document: from the caller's `key` when given (versions of one document
+    share it), otherwise from the file's content hash (so different files never collide)."""
+    return str(uuid.uuid5(DOC_NAMESPACE, f"key:{key}" if key else f"sha1:{file_hash}"))
+
+
+def chunk_uuid(doc_id: str, page: int, chunk_index: int) -> str:
+    return str(uuid.uuid5(DOC_NAMESPACE, f"{doc_id}:{page}:{chunk_index}"))
+
+
+def _doc_lock(doc_id: str) -> threading.Lock:
+    with _doc_locks_guard:
+        lock = _doc_locks.get(doc_id)
+        if lock is None:
+            lock = _doc_locks[doc_id] = threading.Lock()
+        return lock
+
+
+def existing_chunks(col, doc_id: str, page_size: int = EXISTING_PAGE_SIZE) -> Dict[str, Dict[str, Any]]:
+    """uuid -> {page, chunk_index, hash, file_hash, doc_chunks} of every chunk stored for `doc_id`.
+
+    Pages through the chunks in (page, chunk_index) order, resuming after the last key seen:
+    Weaviate's cursor cannot be combined with a filter, and offset paging stops at
+    QUERY_MAXIMUM_RESULTS.
+    """
+    mine = Filter.by_property(PROP_DOC_ID).equal(doc_id)
+    where, out = mine, {}
+    while True:
+        res = col.query.fetch_objects(filters=where, limit=page_size,
+                                      sort=Sort.by_property(PROP_PAGE).by_property(PROP_CHUNK_INDEX),
+                                      return_properties=[PROP_PAGE, PROP_CHUNK_INDEX, PROP_HASH, PROP_FILE_HASH,
+                                                         PROP_DOC_CHUNKS])
+        for o in res.objects:
+            out[str(o.uuid)] = o.properties
+        if len(res.objects) < page_size:
+            return out
+        last = res.objects[-1].properties
+        page, index = last[PROP_PAGE], last[PROP_CHUNK_INDEX]
+        where = mine & (Filter.by_property(PROP_PAGE).greater_than(page)
+                        | (Filter.by_property(PROP_PAGE).equal(page)
+                           & Filter.by_property(PROP_CHUNK_INDEX).greater_than(index)))
+
+
+def delete_chunks(col, doc_id: str, uuids: List[str]) -> int:
+    """Delete these chunks of `doc_id`; returns how many were removed."""
+    removed = 0
+    for batch in _batched(uuids, DELETE_BATCH):
+        where = Filter.by_property(PROP_DOC_ID).equal(doc_id) & Filter.by_id().contains_any(batch)
+        removed += col.data.delete_many(where=where).successful
+    return removed
+
+
+def _complete(existing: Dict[str, Dict[str, Any]], file_hash: str) -> bool:
+    """Whether `existing` is exactly the chunk set a finished run over this file stamped."""
+    return bool(existing) and all(o.get(PROP_FILE_HASH) == file_hash and o.get(PROP_DOC_CHUNKS) == len(existing)
+                                  for o in existing.values())
+
+
+def _unchanged_report(n_chunks: int) -> Dict[str, Any]:
+    return {"pages": 0, "chunks": n_chunks, "inserted": 0, "failed": 0, "batches": 0, "final_batch_size": None,
+            "seconds": 0.0, "chunks_per_s": None, "errors": [], "skipped": n_chunks, "added": 0, "removed": 0,
+            "unchanged": True}
+
+
+def index_pdf(col, source, doc_id: Optional[str] = None, filename: str = "", max_tokens: int = CHUNK_TOKENS,
+              overlap: int = CHUNK_OVERLAP, progress: Optional[Progress] = None, key: Optional[str] = None,
+              **kwargs) -> Dict[str, Any]:
+    """Incrementally (re-)index one PDF (path or seekable file object) through the pipeline.
+
+    `doc_id` defaults to ``doc_key(file hash, key)``; pass the same `key` (e.g. the filename)
+    for every version of a document. The report adds ``skipped`` (chunks
+    already stored unchanged), ``added`` (chunks inserted or replaced), ``removed``
+    (stale chunks deleted) and ``unchanged`` (the whole file was skipped).
+    """
+    progress = progress or _no_progress
+    file_hash = sha1_file(source)
+    doc_id = doc_id or doc_key(file_hash, key)
+    with _doc_lock(doc_id):
+        return _index_doc(col, source, doc_id, file_hash, filename, max_tokens, overlap, progress, **kwargs)
+
+
+def _index_doc(col, source, doc_id: str, file_hash: str, filename: str, max_tokens: int, overlap: int,
+               progress: Progress, **kwargs) -> Dict[str, Any]:
+    existing = existing_chunks(col, doc_id)
+    if _complete(existing, file_hash):
+        progress(skipped=len(existing))
+        return {**_unchanged_report(len(existing)), "doc_id": doc_id}
+
+    pages_seen = 0
+    produced, kept = [], []
+
+    def pages():
+        nonlocal pages_seen
+        for page in timed_iter(ingest.iter_pdf_pages(source), "extract"):
+            pages_seen += 1
+            progress(pages=1)
+            yield page
+
+    def changed(chunks):
+        for c in chunks:
+            u = chunk_uuid(doc_id, c["page"], c["chunk_index"])
+            produced.append(u)
+            old = existing.get(u)
+            if old is not None and old.get(PROP_HASH) == c["hash"]:
+                kept.append(u)
+                progress(skipped=1)
+                continue
+            # unstamped until the whole file is stored, so a failed run is never taken as complete
+            yield {**c, "uuid": u, PROP_FILE_HASH: "", PROP_DOC_CHUNKS: 0}
+
+    chunks = ingest.iter_chunks(doc_id, filename, filename, pages(), max_tokens, overlap)
+    report = run_pipeline(col, changed(timed_iter(chunks, "chunk")), progress=progress, **kwargs)
+    current = set(produced)
+    stale = [u for u in existing if u not in current]
+    removed = delete_chunks(col, doc_id, stale) if stale else 0
+    progress(removed=removed)
+    if not report["failed"]:
+        # every chunk of this version is stored: stamp them all (kept ones too) as complete
+        stamp = {PROP_FILE_HASH: file_hash, PROP_DOC_CHUNKS: len(produced)}
+        unchanged = set(kept)
+        for u in produced:
+            # chunks written by this run always need it; kept ones unless already stamped so
+            if u not in unchanged or any(existing[u].get(k) != v for k, v in stamp.items()):
+                col.data.update(uuid=u, properties=stamp)
+    report.update(pages=pages_seen, chunks=len(kept) + report["chunks"], skipped=len(kept),
+                  added=report["inserted"], removed=removed, unchanged=False, doc_id=doc_id)
+    return report
@@ -1,42 +1,108 @@
-from typing import List, Dict, Any
+import io
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+import numpy as np
 from pypdf import PdfReader
-from .utils import chunk_text, tokenize_len, now_iso, sha1_bytes
-import httpx, os
+from .utils import now_iso, sha1_bytes
+from .chunking import Chunker
+from .connections import get_manager
+from .embed_cache import get_cache, embed_with_cache
+from . import pdf_extract
+from ..settings import (
+    INFER_BASE, CHUNK_MODE, VECTOR_TRANSPORT, PDF_EXTRACT_WORKERS, PDF_EXTRACT_MIN_PAGES, PDF_EXTRACT_PAGES_PER_TASK,
+)
 
-# Allow overriding the inference base from the host (e.g., http://localhost:5001)
-INFER_BASE = os.getenv("INFER_BASE", "http://local-inference:5001")
+VECTORS_MIME = "application/octet-stream"
 
-def extract_pdf_text(file_path: str) -> List[Dict[str, Any]]:
-    reader = PdfReader(file_path)
-    pages = []
+def _serial_pages(reader: PdfReader) -> Iterator[Dict[str, Any]]:
     for i, page in enumerate(reader.pages):
         txt = page.extract_text() or ""
-        pages.append({"page": i+1, "text": txt})
-    return pages
+        yield {"page": i+1, "text": txt}
 
-def embed_texts(texts: List[str]) -> List[List[float]]:
-    with httpx.Client(timeout=60) as c:
-        resp = c.post(f"{INFER_BASE}/vectors", json={"text": texts})
-        resp.raise_for_status()
-    return resp.json()["vector"]
+def iter_pdf_pages(source, workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Yield pages one at a time, in order; `source` is a path, bytes or a binary file object.
 
-def build_chunks(doc_id: str, source: str, title: str, pages, max_tokens: int, overlap: int):
-    items = []
-    for p in pages:
-        segments = chunk_text(p["text"], max_tokens, overlap) if p["text"] else []
-        for j, seg in enumerate(segments):
-            items.append({
+    With more than one worker (default PDF_EXTRACT_WORKERS), documents of at least
+    PDF_EXTRACT_MIN_PAGES pages are extracted by the process pool in `pdf_extract`
+    (bytes and file objects are spooled to a temp file the workers open); shorter ones
+    are not worth the hand-off and stay serial.
+    """
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    if workers <= 1:
+        yield from _serial_pages(PdfReader(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source))
+        return
+    reader = PdfReader(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+    n_pages = len(reader.pages)
+    if n_pages < PDF_EXTRACT_MIN_PAGES:
+        yield from _serial_pages(reader)
+        return
+    # workers read the document from disk: only its path crosses the process boundary
+    with pdf_extract.spooled(source) as path:
+        yield from pdf_extract.iter_pages_parallel(path, n_pages, workers, PDF_EXTRACT_PAGES_PER_TASK)
+
+def extract_pdf_text(file_path: str, workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    return list(iter_pdf_pages(file_path, workers))
+
+def inference_http():
+    # INFER_BASE can point at the host when running outside compose (e.g., http://localhost:5001)
+    return get_manager().http("inference", INFER_BASE, timeout=60)
+
+def _vectors_headers() -> Dict[str, str]:
+    if VECTOR_TRANSPORT == "binary":
+        return {"Accept": f"{VECTORS_MIME}, application/json;q=0.5"}
+    return {"Accept": "application/json"}
+
+def decode_vectors(resp) -> np.ndarray:
+    """(n, dim) float32 array from a /vectors response in either wire format."""
+    if resp.headers.get("content-type", "").startswith(VECTORS_MIME):
+        rows, dim = (int(x) for x in resp.headers["x-vector-shape"].split(","))
+        return np.frombuffer(resp.content, dtype=resp.headers.get("x-vector-dtype", "<f4")).reshape(rows, dim)
+    vecs = np.asarray(resp.json()["vector"], dtype=np.float32)
+    return vecs.reshape(len(vecs), -1) if vecs.size else np.empty((0, 0), dtype=np.float32)
+
+def _post_vectors(texts: List[str]) -> np.ndarray:
+    resp = inference_http().client.post("/vectors", json={"text": texts}, headers=_vectors_headers())
+    resp.raise_for_status()
+    return decode_vectors(resp)
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    # identical text (re-uploads, overlapping corpora) is served from the on-disk cache
+    cache = get_cache()
+    if cache is None:
+        return _post_vectors(texts)
+    return embed_with_cache(texts, _post_vectors, cache)
+
+async def aembed_texts(texts: List[str]) -> np.ndarray:
+    resp = await inference_http().aclient.post("/vectors", json={"text": texts}, headers=_vectors_headers())
+    resp.raise_for_status()
+    return decode_vectors(resp)
+
+async def arerank(query: str, documents: List[str], top_n: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Score `documents` against `query` with the inference service; [{"index", "score"}], best first."""
+    payload = {"query": query, "documents": documents, "top_n": top_n or len(documents)}
+    resp = await inference_http().aclient.post("/rerank", json=payload)
+    resp.raise_for_status()
+    return resp.json()["results"]
+
+def iter_chunks(doc_id: str, source: str, title: str, pages: Iterable[Dict[str, Any]], max_tokens: int, overlap: int,
+                mode: Optional[str] = None):
+    created_at = now_iso()
+    chunker = Chunker(max_tokens, overlap, mode=mode or CHUNK_MODE)
+    for p, segments in chunker.chunk_pages(pages):
+        for j, (seg, n_tokens) in enumerate(segments):
+            yield {
                 "doc_id": doc_id,
                 "source": source,
                 "title": title or source,
                 "page": p["page"],
                 "chunk_index": j,
                 "chunk": seg,
-                "created_at": now_iso(),
+                "created_at": created_at,
                 "mime": "application/pdf",
                 "hash": sha1_bytes(seg.encode("utf-8")),
-                "num_tokens": tokenize_len(seg),
-            })
-    return items
+                "num_tokens": n_tokens,
+            }
+
+def build_chunks(doc_id: str, source: str, title: str, pages, max_tokens: int, overlap: int):
+    return list(iter_chunks(doc_id, source, title, pages, max_tokens, overlap))
 
 
@@ -0,0 +1,194 @@
+"""Background ingestion jobs: spooled uploads indexed by a bounded worker pool.
+
+``POST /documents/jobs`` writes each upload to ``INGEST_SPOOL_DIR/<job id>/`` and
+returns right away; a worker later runs the job's files through ``index_file`` one
+after another, feeding the pipeline's progress callback into the job's counters, and
+removes the spooled files. At most ``INGEST_JOB_WORKERS`` jobs run at once and at most
+``INGEST_JOB_MAX_QUEUED`` wait, so a burst of uploads queues up (or is refused) instead
+of competing with queries for the inference service and Weaviate.
+"""
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+from ..settings import INGEST_SPOOL_DIR, INGEST_JOB_WORKERS, INGEST_JOB_MAX_QUEUED, INGEST_JOB_HISTORY
+
+logger = logging.getLogger("uvicorn.error")
+
+# (path, filename, progress, doc_key) -> index_pdf report
+IndexFile = Callable[..., Dict[str, Any]]
+
+
+class JobQueueFull(Exception):
+    """More ingestion jobs are waiting than INGEST_JOB_MAX_QUEUED allows."""
+
+
+class IngestJob:
+    """State and progress counters of one job (updated from worker and pipeline threads)."""
+
+    def __init__(self, job_id: str, spool_dir: str):
+        self.id = job_id
+        self.spool_dir = spool_dir
+        self.status = "queued"  # queued -> running -> done | failed
+        self.files: List[Dict[str, Any]] = []
+        self.counts = {"pages": 0, "embedded": 0, "inserted": 0, "failed": 0, "skipped": 0, "removed": 0}
+        self.errors: List[Dict[str, Any]] = []
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add_file(self, src: BinaryIO, filename: str, doc_key: Optional[str] = None) -> None:
+        """Stream one upload to the job's spool directory."""
+        safe = re.sub(r"[^\w.-]+", "_", os.path.basename(filename)) or "upload.pdf"
+        path = os.path.join(self.spool_dir, f"{len(self.files):04d}_{safe}")
+        with open(path, "wb") as out:
+            shutil.copyfileobj(src, out, 1 << 20)
+        self.files.append({"file": filename, "path": path, "doc_key": doc_key, "status": "queued",
+                           "bytes": os.path.getsize(path)})
+
+    def progress(self, **counts: int) -> None:
+        with self._lock:
+            for k, n in counts.items():
+                self.counts[k] += n
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            errors = list(self.errors)
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else None
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "files": [{k: v for k, v in f.items() if k != "path"} for f in self.files],
+            "pages": counts["pages"],
+            "chunks_embedded": counts["embedded"],
+            "chunks_inserted": counts["inserted"],
+            "chunks_skipped": counts["skipped"],
+            "chunks_removed": counts["removed"],
+            "failed_chunks": counts["failed"],
+            "errors": errors,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "elapsed_s": round(elapsed, 3) if elapsed is not None else None,
+            "chunks_per_s": round(counts["inserted"] / elapsed, 2) if elapsed else None,
+        }
+
+
+class IngestJobs:
+    """Registry of jobs plus the executor that runs them."""
+
+    def __init__(self, workers: int = INGEST_JOB_WORKERS, max_queued: int = INGEST_JOB_MAX_QUEUED,
+                 history: int = INGEST_JOB_HISTORY, spool_dir: str = INGEST_SPOOL_DIR):
+        self.workers = max(1, workers)
+        self.max_queued = max(0, max_queued)
+        self.history = history
+        self.spool_dir = spool_dir
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest-job")
+
+    def _active(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status in ("queued", "running"))
+
+    def create(self) -> IngestJob:
+        """Reserve a job slot; raises JobQueueFull when every worker is busy and the queue is full."""
+        with self._lock:
+            if self._active() >= self.workers + self.max_queued:
+                raise JobQueueFull(f"{self._active()} ingestion jobs pending")
+            job_id = uuid.uuid4().hex
+            job = IngestJob(job_id, os.path.join(self.spool_dir, job_id))
+            os.makedirs(job.spool_dir, exist_ok=True)
+            self._jobs[job_id] = job
+            self._evict()
+        return job
+
+    def _evict(self) -> None:
+        finished = [k for k, j in self._jobs.items() if j.status in ("done", "failed")]
+        for k in finished[: max(0, len(finished) - self.history)]:
+            del self._jobs[k]
+
+    def discard(self, job: IngestJob) -> None:
+        """Drop a job that was never submitted (e.g. its upload failed)."""
+        with self._lock:
+            self._jobs.pop(job.id, None)
+        shutil.rmtree(job.spool_dir, ignore_errors=True)
+
+    def submit(self, job: IngestJob, index_file: IndexFile, on_inserted: Optional[Callable[[], None]] = None) -> None:
+        self._executor.submit(self._run, job, index_file, on_inserted)
+
+    def _run(self, job: IngestJob, index_file: IndexFile, on_inserted: Optional[Callable[[], None]]) -> None:
+        job.status, job.started_at = "running", time.time()
+        failed_files = 0
+        try:
+            for f in job.files:
+                f["status"] = "running"
+                try:
+                    report = index_file(f["path"], f["file"], job.progress, f["doc_key"])
+                except Exception as e:
+                    logger.exception("ingestion job %s: %s failed", job.id, f["file"])
+                    failed_files += 1
+                    f["status"] = "failed"
+                    with job._lock:
+                        job.errors.append({"file": f["file"], "error": f"{type(e).__name__}: {e}"})
+                    continue
+                f.update(status="done", pages=report["pages"], chunks=report["chunks"], inserted=report["inserted"],
+                         skipped=report.get("skipped", 0), removed=report.get("removed", 0))
+                with job._lock:
+                    job.errors.extend({"file": f["file"], **e} for e in report["errors"])
+            # invalidate caches before pollers see "done"
+            if (job.counts["inserted"] or job.counts["removed"]) and on_inserted is not None:
+                on_inserted()
+        finally:
+            shutil.rmtree(job.spool_dir, ignore_errors=True)
+            job.finished_at = time.time()
+            job.status = "failed" if job.files and failed_files == len(job.files) else "done"
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def recent(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [j.to_dict() for j in reversed(jobs)]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            by_status: Dict[str, int] = {}
+            for j in self._jobs.values():
+                by_status[j.status] = by_status.get(j.status, 0) + 1
+        return {"workers": self.workers, "max_queued": self.max_queued, **by_status}
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_jobs: Optional[IngestJobs] = None
+_jobs_lock = threading.Lock()
+
+
+def get_jobs() -> IngestJobs:
+    global _jobs
+    if _jobs is None:
+        with _jobs_lock:
+            if _jobs is None:
+                _jobs = IngestJobs()
+    return _jobs
+
+
+def shutdown_jobs() -> None:
+    global _jobs
+    with _jobs_lock:
+        if _jobs is not None:
+            _jobs.shutdown()
+            _jobs = None
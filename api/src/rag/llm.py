@@ -1,5 +1,32 @@
-import os, httpx, logging
-from httpx import HTTPStatusError
+"""OpenAI-compatible chat completions over the pooled "llm" client.
+
+Every call runs under a deadline (``time.monotonic()`` value): the one passed in, or the
+current request's, set by the handler with ``set_deadline`` (a context variable, so it
+follows the request into tasks such as the modes of /question/compare). Each HTTP attempt
+is capped by what is left of it.
+
+* retries: 429, 5xx and connection errors are retried up to ``LLM_MAX_RETRIES`` times with
+  full-jitter exponential backoff (a ``Retry-After`` header wins), never past the deadline
+* hedging (``LLM_HEDGE``, non-streaming only): a call still running after the p95 of recent
+  calls gets a duplicate request; the first answer wins and the other is cancelled
+* metrics: per-attempt latency (``rag_llm_request_duration_seconds``) and token usage
+  (``rag_llm_tokens``) in /metrics, call/retry/hedge counters in /stats
+"""
+import asyncio, os, httpx, logging, json, random, threading, time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+import numpy as np
+
+from .connections import get_manager
+from .metrics import llm_seconds, llm_tokens
+from ..settings import (
+    LLM_HTTP2, LLM_TIMEOUT_S, LLM_DEADLINE_MS, LLM_MAX_RETRIES, LLM_BACKOFF_BASE_S, LLM_BACKOFF_MAX_S,
+    LLM_HEDGE, LLM_HEDGE_MIN_SAMPLES, LLM_HEDGE_MIN_DELAY_MS,
+)
+
+logger = logging.getLogger("uvicorn.error")
 
 # Normalize env
 OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1").rstrip("/")
@@ -7,14 +34,125 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
 _ALLOW = {"gpt-4o-mini", "gpt-4o"}
 if LLM_MODEL not in _ALLOW:
-    logging.getLogger("uvicorn.error").warning("LLM_MODEL '%s' not in %s; falling back to gpt-4o-mini", LLM_MODEL, sorted(_ALLOW))
+    logger.warning("LLM_MODEL '%s' not in %s; falling back to gpt-4o-mini", LLM_MODEL, sorted(_ALLOW))
     LLM_MODEL = "gpt-4o-mini"
 
-def chat(question: str, prompt: str) -> str:
+
+class LLMDeadlineExceeded(TimeoutError):
+    """The request's deadline passed before the LLM answered."""
+
+
+class LLMStats:
+    """Call counters and a window of recent successful attempt latencies (the hedge delay is their p95)."""
+
+    def __init__(self, window: int = 200):
+        self.latencies: deque = deque(maxlen=window)
+        self.counters = dict.fromkeys(
+            ("calls", "attempts", "retries", "hedges", "hedge_wins", "deadline_exceeded",
+             "prompt_tokens", "completion_tokens"), 0)
+        self._lock = threading.Lock()
+
+    def count(self, **incs: int) -> None:
+        with self._lock:
+            for k, n in incs.items():
+                self.counters[k] += n
+
+    def latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def p95_s(self) -> Optional[float]:
+        with self._lock:
+            lat = list(self.latencies)
+        return float(np.percentile(lat, 95)) if lat and len(lat) >= LLM_HEDGE_MIN_SAMPLES else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self.counters)
+        p95 = self.p95_s()
+        out["p95_ms"] = round(p95 * 1000.0, 1) if p95 is not None else None
+        return out
+
+
+stats = LLMStats()
+
+
+def llm_stats() -> Dict[str, Any]:
+    return stats.snapshot()
+
+
+def llm_http():
+    return get_manager().http("llm", OPENAI_API_BASE, timeout=LLM_TIMEOUT_S, http2=LLM_HTTP2)
+
+
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+def set_deadline(ms: Optional[float] = None) -> Optional[float]:
+    """Give the current request `ms` (None = LLM_DEADLINE_MS; <= 0 = no deadline) from now; returns the deadline."""
+    ms = LLM_DEADLINE_MS if ms is None else ms
+    deadline = time.monotonic() + ms / 1000.0 if ms > 0 else None
+    _deadline.set(deadline)
+    return deadline
+
+
+def _exceeded() -> LLMDeadlineExceeded:
+    stats.count(deadline_exceeded=1)
+    return LLMDeadlineExceeded("LLM deadline exceeded")
+
+
+def _attempt_timeout(deadline: Optional[float]) -> float:
+    if deadline is None:
+        return LLM_TIMEOUT_S
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise _exceeded()
+    return min(left, LLM_TIMEOUT_S)
+
+
+def _backoff(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff before retry `attempt + 1`; the server's Retry-After wins when given."""
+    if retry_after is not None:
+        return min(max(retry_after, 0.0), LLM_BACKOFF_MAX_S)
+    return random.uniform(0.0, min(LLM_BACKOFF_MAX_S, LLM_BACKOFF_BASE_S * 2 ** attempt))
+
+
+def _retry_after(r: httpx.Response) -> Optional[float]:
+    try:
+        return float(r.headers["retry-after"])
+    except (KeyError, ValueError):
+        return None
+
+
+def _failure(deadline: Optional[float], r: Optional[httpx.Response] = None,
+             exc: Optional[Exception] = None) -> Tuple[Exception, Optional[float]]:
+    """(error, retry_after) of a failed attempt worth retrying; raises the ones that are not."""
+    if exc is not None:
+        if isinstance(exc, httpx.TimeoutException) and deadline is not None and time.monotonic() >= deadline - 0.001:
+            raise _exceeded() from exc
+        return exc, None
+    logger.error("OpenAI error %s: %s", r.status_code, r.text)
+    error = httpx.HTTPStatusError(f"LLM returned HTTP {r.status_code}", request=r.request, response=r)
+    if r.status_code != 429 and r.status_code < 500:
+        raise error
+    return error, _retry_after(r)
+
+
+def _next_delay(attempt: int, deadline: Optional[float], error: Exception, retry_after: Optional[float]) -> float:
+    """Seconds to wait before the next attempt; re-raises `error` when out of retries or time."""
+    if attempt >= LLM_MAX_RETRIES:
+        raise error
+    delay = _backoff(attempt, retry_after)
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        raise _exceeded() from error
+    stats.count(retries=1)
+    return delay
+
+
+def _request(prompt: str):
     if not OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is not set")
 
-    url = f"{OPENAI_API_BASE}/chat/completions"
     headers = {
         "Authorization": f"Bearer {OPENAI_API_KEY}",
         "Content-Type": "application/json",
@@ -28,12 +166,161 @@ def chat(question: str, prompt: str) -> str:
         "temperature": 0.2,
         "max_tokens": 600,
     }
+    return headers, payload
+
+
+def _record_usage(data: Dict[str, Any]) -> None:
+    usage = data.get("usage") or {}
+    for kind in ("prompt_tokens", "completion_tokens"):
+        n = usage.get(kind)
+        if isinstance(n, int):
+            llm_tokens.observe(n, kind=kind[: -len("_tokens")])
+            stats.count(**{kind: n})
+
+
+def _answer(data: Dict[str, Any]) -> str:
+    _record_usage(data)
+    return data["choices"][0]["message"]["content"].strip()
+
+
+def _ok(t0: float) -> None:
+    elapsed = time.perf_counter() - t0
+    llm_seconds.observe(elapsed, outcome="ok")
+    stats.latency(elapsed)
+
+
+def _post(headers, payload, deadline: Optional[float]) -> Dict[str, Any]:
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        timeout = _attempt_timeout(deadline)
+        stats.count(attempts=1)
+        t0 = time.perf_counter()
+        try:
+            r = llm_http().client.post("/chat/completions", headers=headers, json=payload, timeout=timeout)
+        except httpx.TransportError as e:
+            llm_seconds.observe(time.perf_counter() - t0, outcome="error")
+            error, retry_after = _failure(deadline, exc=e)
+        else:
+            if r.status_code < 400:
+                _ok(t0)
+                return r.json()
+            llm_seconds.observe(time.perf_counter() - t0, outcome="error")
+            error, retry_after = _failure(deadline, r=r)
+        time.sleep(_next_delay(attempt, deadline, error, retry_after))
+
+
+async def _apost(headers, payload, deadline: Optional[float]) -> Dict[str, Any]:
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        timeout = _attempt_timeout(deadline)
+        stats.count(attempts=1)
+        t0 = time.perf_counter()
+        try:
+            r = await llm_http().aclient.post("/chat/completions", headers=headers, json=payload, timeout=timeout)
+        except asyncio.CancelledError:
+            llm_seconds.observe(time.perf_counter() - t0, outcome="cancelled")
+            raise
+        except httpx.TransportError as e:
+            llm_seconds.observe(time.perf_counter() - t0, outcome="error")
+            error, retry_after = _failure(deadline, exc=e)
+        else:
+            if r.status_code < 400:
+                _ok(t0)
+                return r.json()
+            llm_seconds.observe(time.perf_counter() - t0, outcome="error")
+            error, retry_after = _failure(deadline, r=r)
+        await asyncio.sleep(_next_delay(attempt, deadline, error, retry_after))
+
+
+def hedge_delay() -> Optional[float]:
+    """Seconds before a hedged duplicate is sent: the recent p95 (None until there are enough samples, or off)."""
+    if not LLM_HEDGE:
+        return None
+    p95 = stats.p95_s()
+    return None if p95 is None else max(p95, LLM_HEDGE_MIN_DELAY_MS / 1000.0)
+
+
+async def _ahedged(headers, payload, deadline: Optional[float]) -> Dict[str, Any]:
+    delay = hedge_delay()
+    if delay is None:
+        return await _apost(headers, payload, deadline)
+    first = asyncio.ensure_future(_apost(headers, payload, deadline))
+    pending, error = {first}, None
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done or (deadline is not None and time.monotonic() >= deadline):
+            return await first
+        stats.count(hedges=1)
+        hedge = asyncio.ensure_future(_apost(headers, payload, deadline))
+        pending = {first, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        stats.count(hedge_wins=1)
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        # also covers a caller cancelled mid-wait: no attempt outlives the call
+        pending = [task for task in pending if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+def chat(question: str, prompt: str, deadline: Optional[float] = None) -> str:
+    headers, payload = _request(prompt)
+    stats.count(calls=1)
+    return _answer(_post(headers, payload, deadline if deadline is not None else _deadline.get()))
+
+
+async def achat(question: str, prompt: str, deadline: Optional[float] = None) -> str:
+    headers, payload = _request(prompt)
+    stats.count(calls=1)
+    return _answer(await _ahedged(headers, payload, deadline if deadline is not None else _deadline.get()))
 
-    with httpx.Client(timeout=120) as c:
-        r = c.post(url, headers=headers, json=payload)
-        if r.status_code >= 400:
-            logging.getLogger("uvicorn.error").error("OpenAI error %s: %s", r.status_code, r.text)
-            r.raise_for_status()
-        return r.json()["choices"][0]["message"]["content"].strip()
 
+async def astream_chat(question: str, prompt: str, deadline: Optional[float] = None) -> AsyncIterator[str]:
+    """Yield answer text deltas as they arrive (OpenAI-compatible `stream=True`, server-sent events).
 
+    Failed attempts are retried only until the first delta has been yielded.
+    """
+    headers, payload = _request(prompt)
+    payload["stream"] = True
+    deadline = deadline if deadline is not None else _deadline.get()
+    stats.count(calls=1)
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        timeout = _attempt_timeout(deadline)
+        stats.count(attempts=1)
+        t0 = time.perf_counter()
+        started = False
+        try:
+            async with llm_http().aclient.stream("POST", "/chat/completions", headers=headers, json=payload,
+                                                 timeout=timeout) as r:
+                if r.status_code < 400:
+                    async for line in r.aiter_lines():
+                        if deadline is not None and time.monotonic() >= deadline:
+                            raise _exceeded()
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        chunk = json.loads(data)
+                        _record_usage(chunk)
+                        choices = chunk.get("choices") or []
+                        delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                        if delta:
+                            started = True
+                            yield delta
+                    llm_seconds.observe(time.perf_counter() - t0, outcome="ok")
+                    return
+                await r.aread()
+                llm_seconds.observe(time.perf_counter() - t0, outcome="error")
+                error, retry_after = _failure(deadline, r=r)
+        except httpx.TransportError as e:
+            llm_seconds.observe(time.perf_counter() - t0, outcome="error")
+            error, retry_after = _failure(deadline, exc=e)
+            if started:
+                raise error
+        await asyncio.sleep(_next_delay(attempt, deadline, error, retry_after))
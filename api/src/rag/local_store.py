@@ -0,0 +1,565 @@
+"""In-process retrieval backend: a stand-in for the Weaviate client and collection.
+
+Selected with ``RETRIEVER_BACKEND=local`` (see ``weav_client.get_client``). The pools,
+the indexer and the retrievers keep calling the Weaviate collection API; this module
+implements the part of it they use:
+
+* ``data.insert_many(objects)`` -- an object whose uuid already exists replaces it (upsert, as in a
+  Weaviate batch import)
+* ``data.update(uuid, properties)`` -- merges the properties into the object (a new row with
+  the same vector)
+* ``data.delete_many(where)`` and ``query.fetch_objects(filters, limit, sort)`` -- with
+  ``Equal`` / ``NotEqual`` / ``ContainsAny`` / ``GreaterThan`` / ``LessThan`` (and ``...Equal``)
+  filters on properties or the id, combined with ``&`` / ``|``
+* ``query.near_vector(near_vector, limit, return_metadata, rerank)`` -- exact top-k cosine
+  search over a memory-mapped float32 matrix (``distance`` = 1 - cosine, like Weaviate)
+* ``query.bm25(query, limit, return_metadata)`` -- BM25 (k1=1.2, b=0.75) over a CSR inverted
+  index of the ``title`` and ``chunk`` properties
+* ``query.hybrid(query, vector, limit, alpha)`` -- relative score fusion of both legs
+
+Each collection persists under ``LOCAL_INDEX_PATH/<name>/``:
+
+* ``vectors.f32``   -- unit-norm float32 rows, appended on insert and read through ``np.memmap``
+* ``objects.jsonl`` -- one ``{"uuid", "properties"}`` line per row, in row order
+* ``bm25.npz``      -- the inverted index, saved on close; rows added after the last save
+  are re-indexed when the store is opened
+* ``deleted.txt``   -- rows removed by a delete or replaced by an upsert, one per line; they stay
+  in the files above (tombstones) and are masked out of every search (BM25 term statistics
+  still count them)
+* ``meta.json``     -- ``{"dim": ...}``
+"""
+import asyncio
+import json
+import math
+import os
+import re
+import threading
+import uuid as uuidlib
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .fusion import min_max
+
+_TOKEN = re.compile(r"[^\W_]+")
+BM25_PROPERTIES = ("title", "chunk")
+
+
+def tokenize(text: str) -> List[str]:
+    """Weaviate's ``word`` tokenization: lowercase alphanumeric runs."""
+    return _TOKEN.findall(text.lower())
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` largest scores, best first (ties keep row order)."""
+    if k <= 0 or scores.size == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.size:
+        idx = np.argpartition(-scores, k - 1)[:k]
+        return idx[np.lexsort((idx, -scores[idx]))]
+    return np.argsort(-scores, kind="stable")
+
+
+class BM25Index:
+    """Compact BM25 inverted index: postings in CSR arrays (term -> doc ids, term frequencies).
+
+    Documents are numbered in insertion order. New documents go to a small pending
+    buffer that is merged into the CSR arrays before the next search; since doc ids
+    only grow, every posting list stays sorted.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab: Dict[str, int] = {}
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.tfs = np.empty(0, dtype=np.float32)
+        self.doc_len = np.empty(0, dtype=np.float32)
+        self._pending: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        self._pending_len: List[int] = []
+        self._lock = threading.Lock()
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_len) + len(self._pending_len)
+
+    def add(self, text: str) -> None:
+        counts = Counter(tokenize(text))
+        with self._lock:
+            doc = self.n_docs
+            for term, tf in counts.items():
+                self._pending[self.vocab.setdefault(term, len(self.vocab))].append((doc, tf))
+            self._pending_len.append(sum(counts.values()))
+
+    def _compile(self) -> None:
+        if not self._pending_len:
+            return
+        n_terms = len(self.vocab)
+        old = np.zeros(n_terms, dtype=np.int64)
+        old[: len(self.indptr) - 1] = np.diff(self.indptr)
+        new = np.zeros(n_terms, dtype=np.int64)
+        for tid, postings in self._pending.items():
+            new[tid] = len(postings)
+        indptr = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(old + new, out=indptr[1:])
+        doc_ids = np.empty(indptr[-1], dtype=np.int32)
+        tfs = np.empty(indptr[-1], dtype=np.float32)
+        # existing postings move to the front of their (now longer) term segments
+        n_old = int(old.sum())
+        if n_old:
+            old_start = np.zeros(n_terms, dtype=np.int64)
+            old_start[: len(self.indptr) - 1] = self.indptr[:-1]
+            dest = np.arange(n_old) + np.repeat(indptr[:-1] - old_start, old)
+            doc_ids[dest] = self.doc_ids
+            tfs[dest] = self.tfs
+        for tid, postings in self._pending.items():
+            start = indptr[tid] + old[tid]
+            arr = np.asarray(postings, dtype=np.int64)
+            doc_ids[start:start + len(arr)] = arr[:, 0]
+            tfs[start:start + len(arr)] = arr[:, 1]
+        self.indptr, self.doc_ids, self.tfs = indptr, doc_ids, tfs
+        self.doc_len = np.concatenate([self.doc_len, np.asarray(self._pending_len, dtype=np.float32)])
+        self._pending.clear()
+        self._pending_len.clear()
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for `query` (0 where no query term occurs)."""
+        with self._lock:
+            self._compile()
+            n = len(self.doc_len)
+            out = np.zeros(n, dtype=np.float32)
+            terms = {self.vocab[t] for t in tokenize(query) if t in self.vocab}
+            if not n or not terms:
+                return out
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_len / max(float(self.doc_len.mean()), 1e-9))
+            for tid in terms:
+                s, e = self.indptr[tid], self.indptr[tid + 1]
+                if s == e:
+                    continue
+                docs, tf = self.doc_ids[s:e], self.tfs[s:e]
+                idf = math.log(1.0 + (n - (e - s) + 0.5) / ((e - s) + 0.5))
+                # doc ids are unique within one posting list, so fancy-index += is safe
+                out[docs] += idf * tf * (self.k1 + 1.0) / (tf + norm[docs])
+            return out
+
+    def save(self, path: str) -> None:
+        with self._lock:
+            self._compile()
+            terms = np.array(sorted(self.vocab, key=self.vocab.get), dtype=str)
+            tmp = path + ".tmp.npz"
+            np.savez(tmp, terms=terms, indptr=self.indptr, doc_ids=self.doc_ids, tfs=self.tfs,
+                     doc_len=self.doc_len, params=np.array([self.k1, self.b]))
+            os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path) as z:
+            k1, b = z["params"].tolist()
+            index = cls(k1, b)
+            index.vocab = {t: i for i, t in enumerate(z["terms"].tolist())}
+            index.indptr, index.doc_ids, index.tfs, index.doc_len = z["indptr"], z["doc_ids"], z["tfs"], z["doc_len"]
+        return index
+
+
+class LocalStore:
+    """One persistent collection: vectors, properties and the BM25 index, all row-aligned."""
+
+    def __init__(self, path: str, text_properties: Sequence[str] = BM25_PROPERTIES):
+        self.path = path
+        self.text_properties = tuple(text_properties)
+        self.uuids: List[str] = []
+        self.properties: List[Dict[str, Any]] = []
+        self.rows: Dict[str, int] = {}  # uuid -> its live row
+        self.dead: set = set()
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._alive: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _text(self, props: Dict[str, Any]) -> str:
+        return " ".join(str(props.get(p) or "") for p in self.text_properties)
+
+    def _load(self) -> None:
+        if os.path.exists(self._file("meta.json")):
+            with open(self._file("meta.json")) as f:
+                self.dim = json.load(f)["dim"]
+        if os.path.exists(self._file("objects.jsonl")):
+            with open(self._file("objects.jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        break  # torn last line from an interrupted insert
+                    self.uuids.append(row["uuid"])
+                    self.properties.append(row["properties"])
+        # an insert writes vectors first, so a crash can leave extra vector rows but not extra objects
+        rows = os.path.getsize(self._file("vectors.f32")) // (4 * self.dim) if self.dim else 0
+        n = min(rows, len(self.uuids))
+        del self.uuids[n:], self.properties[n:]
+        if self.dim and rows != n:
+            with open(self._file("vectors.f32"), "r+b") as f:
+                f.truncate(n * 4 * self.dim)
+        self.bm25 = BM25Index()
+        if os.path.exists(self._file("bm25.npz")):
+            saved = BM25Index.load(self._file("bm25.npz"))
+            if saved.n_docs <= n:
+                self.bm25 = saved
+        for props in self.properties[self.bm25.n_docs:]:
+            self.bm25.add(self._text(props))
+        if os.path.exists(self._file("deleted.txt")):
+            with open(self._file("deleted.txt")) as f:
+                self.dead = {int(line) for line in f if line.strip().isdigit() and int(line) < n}
+        self.rows = {u: r for r, u in enumerate(self.uuids) if r not in self.dead}
+        self._alive = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def alive(self) -> np.ndarray:
+        """Row mask: False for deleted or replaced rows."""
+        with self._lock:
+            if self._alive is None or len(self._alive) != len(self.uuids):
+                mask = np.ones(len(self.uuids), dtype=bool)
+                mask[list(self.dead)] = False
+                self._alive = mask
+            return self._alive
+
+    def _bury(self, rows: List[int]) -> None:
+        if not rows:
+            return
+        with open(self._file("deleted.txt"), "a") as f:
+            f.write("".join(f"{r}\n" for r in rows))
+        self.dead.update(rows)
+        self._alive = None
+
+    def delete(self, uuids: Iterable[str]) -> int:
+        """Remove the objects with these uuids; returns how many existed."""
+        with self._lock:
+            rows = [self.rows.pop(str(u)) for u in uuids if str(u) in self.rows]
+            self._bury(rows)
+        return len(rows)
+
+    def update(self, uuid: str, properties: Dict[str, Any]) -> bool:
+        """Merge `properties` into the object with this uuid; False if there is none."""
+        with self._lock:
+            row = self.rows.get(str(uuid))
+            if row is None:
+                return False
+            self.insert_many([(str(uuid), {**self.properties[row], **properties}, np.array(self.matrix()[row]))])
+        return True
+
+    def objects(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(uuid, properties) of the live objects, in insertion order."""
+        with self._lock:
+            live = sorted(self.rows.items(), key=lambda kv: kv[1])
+        return ((u, self.properties[r]) for u, r in live)
+
+    def insert_many(self, items: Iterable[Tuple[Optional[str], Dict[str, Any], Any]]) -> List[str]:
+        """Append (uuid, properties, vector) rows, replacing live rows with the same uuid; returns the uuids."""
+        items = list(items)
+        if not items:
+            return []
+        vecs = np.asarray([v for _, _, v in items], dtype=np.float32)
+        if vecs.ndim != 2:
+            raise ValueError("every object needs a vector")
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vecs.shape[1])
+                with open(self._file("meta.json"), "w") as f:
+                    json.dump({"dim": self.dim}, f)
+            elif vecs.shape[1] != self.dim:
+                raise ValueError(f"vector dim {vecs.shape[1]} != index dim {self.dim}")
+            uuids = [str(u) if u else str(uuidlib.uuid4()) for u, _, _ in items]
+            with open(self._file("vectors.f32"), "ab") as f:
+                f.write(vecs.astype("<f4").tobytes())
+            with open(self._file("objects.jsonl"), "a", encoding="utf-8") as f:
+                for u, (_, props, _) in zip(uuids, items):
+                    f.write(json.dumps({"uuid": u, "properties": props}, default=str) + "\n")
+            self._bury([self.rows[u] for u in uuids if u in self.rows])
+            for u, (_, props, _) in zip(uuids, items):
+                self.rows[u] = len(self.uuids)
+                self.uuids.append(u)
+                self.properties.append(props)
+                self.bm25.add(self._text(props))
+            self._matrix = None
+        return uuids
+
+    def matrix(self) -> np.ndarray:
+        with self._lock:
+            n = len(self.uuids)
+            if self._matrix is None or len(self._matrix) != n:
+                if n == 0:
+                    self._matrix = np.empty((0, self.dim or 0), dtype=np.float32)
+                else:
+                    self._matrix = np.memmap(self._file("vectors.f32"), dtype="<f4", mode="r", shape=(n, self.dim))
+            return self._matrix
+
+    def cosine(self, vector) -> np.ndarray:
+        m = self.matrix()
+        if not len(m):
+            return np.empty(0, dtype=np.float32)
+        q = np.asarray(vector, dtype=np.float32).reshape(-1)
+        cos = m @ (q / (np.linalg.norm(q) + 1e-12))
+        if self.dead:
+            cos = np.where(self.alive(), cos, -np.inf)
+        return cos
+
+    def search_vector(self, vector, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, cosine distances) of the `k` nearest rows."""
+        cos = self.cosine(vector)
+        idx = _top_k(cos, min(k, len(self)))
+        return idx, 1.0 - cos[idx]
+
+    def search_bm25(self, query: str, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, BM25 scores) of the `k` best rows that match at least one query term."""
+        scores = self.bm25.scores(query)
+        if self.dead:
+            scores = np.where(self.alive()[:len(scores)], scores, 0.0)
+        idx = _top_k(scores, k)
+        idx = idx[scores[idx] > 0]
+        return idx, scores[idx]
+
+    def search_hybrid(self, query: str, vector, k: int, alpha: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Relative score fusion of the top-k of each leg: min-max normalise, weight the vector leg by `alpha`."""
+        b_idx, b_scores = self.search_bm25(query, k)
+        cos = self.cosine(vector)
+        v_idx = _top_k(cos, min(k, len(self)))
+        fused = np.zeros(len(cos), dtype=np.float32)
+        fused[b_idx] += (1.0 - alpha) * min_max(b_scores)
+        fused[v_idx] += alpha * min_max(cos[v_idx])
+        cand = np.union1d(b_idx, v_idx)
+        order = cand[np.lexsort((cand, -fused[cand]))][:k]
+        return order, fused[order]
+
+    def save(self) -> None:
+        with self._lock:
+            self.bm25.save(self._file("bm25.npz"))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "objects": len(self), "deleted_rows": len(self.dead), "dim": self.dim,
+                "terms": len(self.bm25.vocab)}
+
+
+_stores: Dict[str, LocalStore] = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path: str) -> LocalStore:
+    """Process-wide store for `path`, shared by the sync and async clients."""
+    path = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = LocalStore(path)
+        return store
+
+
+# --- Weaviate-shaped facade -------------------------------------------------------------
+
+class LocalMetadata:
+    def __init__(self, score: Optional[float] = None, distance: Optional[float] = None):
+        self.score = score
+        self.distance = distance
+        self.rerank_score: Optional[float] = None
+
+
+class LocalObject:
+    def __init__(self, uuid: str, properties: Dict[str, Any], metadata: LocalMetadata):
+        self.uuid = uuid
+        self.properties = properties
+        self.metadata = metadata
+
+
+class LocalResult:
+    def __init__(self, objects: List[LocalObject]):
+        self.objects = objects
+
+
+class LocalInsertResult:
+    def __init__(self, uuids: List[str]):
+        self.uuids = dict(enumerate(uuids))
+        self.errors: Dict[int, Any] = {}
+
+
+class LocalDeleteResult:
+    def __init__(self, matches: int, successful: int):
+        self.matches = matches
+        self.successful = successful
+        self.failed = matches - successful
+        self.objects = None
+
+
+_COMPARE = {
+    "GreaterThan": lambda a, b: a > b,
+    "GreaterThanEqual": lambda a, b: a >= b,
+    "LessThan": lambda a, b: a < b,
+    "LessThanEqual": lambda a, b: a <= b,
+}
+
+
+def matches(where, uuid: str, props: Dict[str, Any]) -> bool:
+    """Evaluate a Weaviate filter (``Filter.by_property`` / ``Filter.by_id``, ``&``, ``|``) on one object."""
+    kind = type(where).__name__
+    if kind == "_FilterAnd":
+        return all(matches(f, uuid, props) for f in where.filters)
+    if kind == "_FilterOr":
+        return any(matches(f, uuid, props) for f in where.filters)
+    if where.target == "_id":
+        value, expected = uuid, str(where.value)
+    else:
+        value, expected = props.get(where.target), where.value
+    op = getattr(where.operator, "value", where.operator)
+    if op in ("Equal", "NotEqual"):
+        return (value == expected) == (op == "Equal")
+    if op in _COMPARE:
+        return value is not None and _COMPARE[op](value, expected)
+    if op == "ContainsAny":
+        return str(value) in {str(v) for v in where.value}
+    raise NotImplementedError(f"filter operator {op!r} is not supported by the local backend")
+
+
+class _Data:
+    def __init__(self, store: LocalStore):
+        self.store = store
+
+    def insert_many(self, objects) -> LocalInsertResult:
+        return LocalInsertResult(self.store.insert_many(
+            (str(o.uuid) if o.uuid else None, o.properties, o.vector) for o in objects))
+
+    def update(self, uuid, properties: Dict[str, Any]) -> None:
+        if not self.store.update(str(uuid), properties):
+            raise KeyError(f"no object with uuid {uuid}")
+
+    def delete_many(self, where, verbose: bool = False, dry_run: bool = False) -> LocalDeleteResult:
+        hits = [u for u, props in self.store.objects() if matches(where, u, props)]
+        deleted = 0 if dry_run else self.store.delete(hits)
+        return LocalDeleteResult(len(hits), deleted)
+
+
+class _Query:
+    def __init__(self, store: LocalStore):
+        self.store = store
+
+    def _result(self, rows: np.ndarray, values: np.ndarray, field: str) -> LocalResult:
+        s = self.store
+        return LocalResult([
+            LocalObject(s.uuids[r], dict(s.properties[r]), LocalMetadata(**{field: float(v)}))
+            for r, v in zip(rows.tolist(), values.tolist())
+        ])
+
+    def fetch_objects(self, filters=None, limit: Optional[int] = None, return_properties=None,
+                      sort=None) -> LocalResult:
+        hits = [(u, props) for u, props in self.store.objects() if filters is None or matches(filters, u, props)]
+        for s in reversed(sort.sorts if sort is not None else []):
+            hits.sort(key=lambda h: (h[1].get(s.prop) is None, h[1].get(s.prop)), reverse=not s.ascending)
+        out = []
+        for u, props in hits[:limit]:
+            keep = props if return_properties is None else {p: props.get(p) for p in return_properties}
+            out.append(LocalObject(u, dict(keep), LocalMetadata()))
+        return LocalResult(out)
+
+    def near_vector(self, near_vector, limit: int = 10, return_metadata=None, rerank=None) -> LocalResult:
+        if rerank is not None:
+            raise NotImplementedError("rerank is only supported by the async local collection")
+        return self._result(*self.store.search_vector(near_vector, limit), "distance")
+
+    def bm25(self, query: str, limit: int = 10, return_metadata=None) -> LocalResult:
+        return self._result(*self.store.search_bm25(query, limit), "score")
+
+    def hybrid(self, query: str, vector=None, limit: int = 10, alpha: float = 0.5, return_metadata=None) -> LocalResult:
+        if vector is None:
+            raise ValueError("the local backend has no vectorizer; pass the query vector")
+        return self._result(*self.store.search_hybrid(query, vector, limit, alpha), "score")
+
+
+class _AsyncQuery:
+    """Async face of :class:`_Query`; searches run in a worker thread to keep the event loop free."""
+
+    def __init__(self, store: LocalStore):
+        self._sync = _Query(store)
+
+    async def near_vector(self, near_vector, limit: int = 10, return_metadata=None, rerank=None) -> LocalResult:
+        res = await asyncio.to_thread(self._sync.near_vector, near_vector, limit)
+        if rerank is None or len(res.objects) <= 1:
+            return res
+        # the reranker module of Weaviate reorders the `limit` hits; do the same via the inference service
+        from .ingest import arerank
+        docs = [str(o.properties.get(rerank.prop) or "") for o in res.objects]
+        ranked = await arerank(rerank.query, docs)
+        for r in ranked:
+            res.objects[r["index"]].metadata.rerank_score = r["score"]
+        return LocalResult(sorted(res.objects, key=lambda o: -(o.metadata.rerank_score or 0.0)))
+
+    async def bm25(self, query: str, limit: int = 10, return_metadata=None) -> LocalResult:
+        return await asyncio.to_thread(self._sync.bm25, query, limit)
+
+    async def fetch_objects(self, filters=None, limit: Optional[int] = None, return_properties=None,
+                            sort=None) -> LocalResult:
+        return await asyncio.to_thread(self._sync.fetch_objects, filters, limit, return_properties, sort)
+
+    async def hybrid(self, query: str, vector=None, limit: int = 10, alpha: float = 0.5, return_metadata=None) -> LocalResult:
+        return await asyncio.to_thread(self._sync.hybrid, query, vector, limit, alpha)
+
+
+class LocalCollection:
+    def __init__(self, store: LocalStore, asynchronous: bool = False):
+        self.name = os.path.basename(store.path)
+        self.store = store
+        self.data = _Data(store)
+        self.query = _AsyncQuery(store) if asynchronous else _Query(store)
+
+
+class _Collections:
+    def __init__(self, root: str, asynchronous: bool):
+        self.root = root
+        self.asynchronous = asynchronous
+
+    def list_all(self) -> Dict[str, Any]:
+        names = sorted(os.listdir(self.root)) if os.path.isdir(self.root) else []
+        return {"collections": [{"name": n} for n in names]}
+
+    def create(self, name: str, **kwargs) -> LocalCollection:
+        return self.get(name)
+
+    def get(self, name: str) -> LocalCollection:
+        return LocalCollection(open_store(os.path.join(self.root, name)), self.asynchronous)
+
+
+class LocalClient:
+    """Sync client over the stores under `root` (``weav_client.get_client`` with ``RETRIEVER_BACKEND=local``)."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.collections = _Collections(root, asynchronous=False)
+
+    def is_ready(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        with _stores_lock:
+            stores = [s for p, s in _stores.items() if p.startswith(os.path.abspath(self.root))]
+        for s in stores:
+            s.save()
+
+
+class AsyncLocalClient(LocalClient):
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.collections = _Collections(root, asynchronous=True)
+
+    async def connect(self) -> None:
+        pass
+
+    async def is_ready(self) -> bool:
+        return True
+
+    async def close(self) -> None:
+        await asyncio.to_thread(LocalClient.close, self)
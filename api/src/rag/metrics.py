@@ -0,0 +1,155 @@
+"""Per-request stage timings and Prometheus-style histograms.
+
+``stage(name)`` times a block. The time is added to the current request's
+``StageTimer`` (a context variable set by the HTTP middleware, so it follows the
+request into awaited coroutines, ``run_in_threadpool`` and threads started with
+``contextvars.copy_context().run``) and observed into ``rag_stage_duration_seconds``.
+
+Stages record *self* time: a stage nested inside another (the query embedding
+inside ``retrieve``, PDF extraction driven by the chunker) is subtracted from its
+parent, so the stages of a request add up to at most its wall time. Stages that
+run concurrently (files of one upload, pipeline threads) are summed.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}  # labels -> [bucket counts (+Inf last), sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                labels = [f'{n}="{v}"' for n, v in zip(self.labelnames, key)]
+                running = 0
+                for bound, n in zip(list(self.buckets) + ["+Inf"], counts):
+                    running += n
+                    le = ",".join(labels + [f'le="{bound}"'])
+                    lines.append(f"{self.name}_bucket{{{le}}} {running}")
+                suffix = "{" + ",".join(labels) + "}" if labels else ""
+                lines.append(f"{self.name}_sum{suffix} {total}")
+                lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+REGISTRY: List[Histogram] = []
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    h = Histogram(name, help, labelnames, buckets)
+    REGISTRY.append(h)
+    return h
+
+
+def render_metrics() -> str:
+    return "\n".join(line for h in REGISTRY for line in h.render()) + "\n"
+
+
+stage_seconds = histogram("rag_stage_duration_seconds", "Self time per pipeline stage.", ["stage"])
+prompt_tokens = histogram("rag_prompt_tokens", "Prompt size in tokens before/after context packing.", ["packing"],
+                          buckets=(128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768))
+llm_seconds = histogram("rag_llm_request_duration_seconds", "LLM HTTP attempt latency.", ["outcome"])
+llm_tokens = histogram("rag_llm_tokens", "Token usage per LLM call (from the response's usage).", ["kind"],
+                       buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384))
+request_seconds = histogram("rag_http_request_duration_seconds", "HTTP request latency.", ["method", "path", "status"])
+
+
+class StageTimer:
+    """Milliseconds per stage for one request (thread-safe; stages may repeat and are summed).
+
+    A timer with a ``parent`` (one branch of a request, e.g. one mode of /question/compare)
+    also adds every stage to the parent.
+    """
+
+    def __init__(self, parent: Optional["StageTimer"] = None):
+        self.stages: Dict[str, float] = {}
+        self.parent = parent
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds * 1000.0
+        if self.parent is not None:
+            self.parent.add(name, seconds)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {k: round(v, 2) for k, v in self.stages.items()}
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{k};dur={v}" for k, v in self.snapshot().items())
+
+
+_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+# open stages of the current task/thread: each frame accumulates its children's wall time
+_frames: ContextVar[Tuple[List[float], ...]] = ContextVar("stage_frames", default=())
+
+
+def start_timer(parent: Optional[StageTimer] = None) -> StageTimer:
+    """Start timing the current request (or, with `parent`, the current task of a request)."""
+    timer = StageTimer(parent)
+    _timer.set(timer)
+    return timer
+
+
+def current_timer() -> Optional[StageTimer]:
+    return _timer.get()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    frame = [0.0]
+    token = _frames.set(_frames.get() + (frame,))
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        _frames.reset(token)
+        parents = _frames.get()
+        if parents:
+            parents[-1][0] += elapsed
+        own = max(0.0, elapsed - frame[0])
+        stage_seconds.observe(own, stage=name)
+        timer = _timer.get()
+        if timer is not None:
+            timer.add(name, own)
+
+
+def timed_iter(it: Iterable[T], name: str) -> Iterator[T]:
+    """Iterate `it`, timing each step (the work a lazy generator does to produce an item) as `name`."""
+    it = iter(it)
+    while True:
+        with stage(name):
+            try:
+                item = next(it)
+            except StopIteration:
+                return
+        yield item
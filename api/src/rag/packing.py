@@ -0,0 +1,112 @@
+"""Context packing: retrieved chunks -> the context blocks that go into the prompt.
+
+1. Chunks of the same document and page with consecutive ``chunk_index`` are merged
+   into one block, dropping the text the chunker repeated as overlap (the longest
+   suffix of one chunk that is a prefix of the next).
+2. Blocks are taken in score order (the order of the best chunk they contain) while
+   they fit in the token budget; a block that does not fit is skipped, except that
+   the first block is truncated to the budget rather than dropped.
+
+Token counts come from the stored ``num_tokens``; only merged or truncated blocks are
+re-encoded.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+
+from .utils import get_encoder, tokenize_len
+
+# shorter common affixes are coincidences, not chunker overlap
+MIN_OVERLAP_CHARS = 16
+
+
+def overlap_chars(a: str, b: str) -> int:
+    """Length of the longest suffix of `a` that is also a prefix of `b` (0 if under MIN_OVERLAP_CHARS)."""
+    if len(b) < MIN_OVERLAP_CHARS:
+        return 0
+    probe = b[:MIN_OVERLAP_CHARS]
+    # the earliest start in `a` whose remainder is a prefix of `b` is the longest overlap
+    p = a.find(probe, max(0, len(a) - len(b)))
+    while p != -1:
+        if b.startswith(a[p:]):
+            return len(a) - p
+        p = a.find(probe, p + 1)
+    return 0
+
+
+def _tokens(c: Dict[str, Any], count: Callable[[str], int]) -> int:
+    n = c.get("num_tokens")
+    return int(n) if n is not None else count(c.get("chunk") or "")
+
+
+def merge_adjacent(contexts: List[Dict[str, Any]], count: Callable[[str], int] = tokenize_len) -> List[Dict[str, Any]]:
+    """Merge consecutive chunks of one doc/page; blocks come back in score order with `chunks` merged."""
+    groups: Dict[Tuple[Any, Any], List[Tuple[int, Dict[str, Any]]]] = {}
+    for rank, c in enumerate(contexts):
+        groups.setdefault((c.get("doc_id") or c.get("title"), c.get("page")), []).append((rank, c))
+    blocks = []
+    for members in groups.values():
+        members.sort(key=lambda rc: (rc[1].get("chunk_index") is None, rc[1].get("chunk_index") or 0))
+        run: List[Tuple[int, Dict[str, Any]]] = []
+        for rank, c in members:
+            prev = run[-1][1] if run else None
+            if prev is not None and None not in (prev.get("chunk_index"), c.get("chunk_index")) \
+                    and c["chunk_index"] == prev["chunk_index"] + 1:
+                run.append((rank, c))
+                continue
+            if run:
+                blocks.append(_block(run, count))
+            run = [(rank, c)]
+        if run:
+            blocks.append(_block(run, count))
+    blocks.sort(key=lambda b: b["rank"])
+    return blocks
+
+
+def _block(run: List[Tuple[int, Dict[str, Any]]], count: Callable[[str], int]) -> Dict[str, Any]:
+    rank, best = min(run, key=lambda rc: rc[0])
+    text = run[0][1].get("chunk") or ""
+    for _, c in run[1:]:
+        nxt = c.get("chunk") or ""
+        k = overlap_chars(text, nxt)
+        text = text + nxt[k:] if k else f"{text}\n{nxt}"
+    head = run[0][1]
+    return {
+        **best,
+        "chunk": text,
+        "chunk_index": head.get("chunk_index"),
+        "num_tokens": count(text) if len(run) > 1 else _tokens(head, count),
+        "chunks": len(run),
+        "rank": rank,
+    }
+
+
+def _truncate(text: str, budget: int) -> str:
+    enc = get_encoder()
+    return enc.decode(enc.encode(text)[:budget])
+
+
+def pack_contexts(contexts: List[Dict[str, Any]], budget_tokens: int = 0,
+                  count: Callable[[str], int] = tokenize_len) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Merge and budget `contexts` (score order); `budget_tokens` <= 0 means no cap.
+
+    Returns the packed blocks and counts: chunks/tokens before, blocks/tokens after, chunks dropped.
+    """
+    blocks = merge_adjacent(contexts, count)
+    packed, used, dropped = [], 0, 0
+    for b in blocks:
+        n = b["num_tokens"]
+        if budget_tokens > 0 and used + n > budget_tokens:
+            if packed:
+                dropped += b["chunks"]
+                continue
+            b = {**b, "chunk": _truncate(b["chunk"], budget_tokens)}
+            b["num_tokens"] = n = count(b["chunk"])
+        packed.append(b)
+        used += n
+    stats = {
+        "chunks_before": len(contexts),
+        "context_tokens_before": sum(_tokens(c, count) for c in contexts),
+        "blocks_after": len(packed),
+        "context_tokens_after": used,
+        "chunks_dropped": dropped,
+    }
+    return packed, stats
@@ -0,0 +1,122 @@
+"""PDF text extraction spread over a process pool.
+
+pypdf's ``extract_text`` is pure Python and CPU-bound, so threads do not help. For a
+document of at least ``PDF_EXTRACT_MIN_PAGES`` pages the pages are split into ranges of
+``PDF_EXTRACT_PAGES_PER_TASK``; each range is a task for a shared pool of
+``PDF_EXTRACT_WORKERS`` processes. A task carries only the path of the PDF on disk
+(uploads and in-memory documents are spooled to a temporary file first, see ``spooled``),
+never its bytes; the worker opens the file itself, keeping the last few parsed documents
+so a worker that gets several ranges of one document reads and parses it once, and
+returns the range's pages. Pages are yielded in order as
+soon as their range is done, with at most ``2 * workers`` ranges in flight, so memory
+stays bounded and the chunker starts on page 1 while later ranges are still running.
+
+The pool uses the ``spawn`` start method (the API process has threads, which ``fork``
+does not mix well with) and is created on first use; this module only imports pypdf so
+the workers start quickly.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from pypdf import PdfReader
+
+from ..settings import PDF_EXTRACT_WORKERS, PDF_EXTRACT_PAGES_PER_TASK
+
+# worker side: doc token -> PdfReader of the documents this process has seen last
+_readers: "OrderedDict[str, PdfReader]" = OrderedDict()
+_READERS_KEPT = 2
+
+
+def _reader(token: str, path: str) -> PdfReader:
+    reader = _readers.get(token)
+    if reader is None:
+        reader = _readers[token] = PdfReader(path)
+        while len(_readers) > _READERS_KEPT:
+            _readers.popitem(last=False)
+    return reader
+
+
+def extract_range(token: str, path: str, start: int, stop: int) -> List[Dict[str, Any]]:
+    """Pages [start, stop) (0-based) of the PDF at `path`, as {"page" (1-based), "text"}."""
+    reader = _reader(token, path)
+    return [{"page": i + 1, "text": reader.pages[i].extract_text() or ""} for i in range(start, stop)]
+
+
+@contextmanager
+def spooled(source) -> Iterator[str]:
+    """Path of `source` (a path, bytes or binary file object) on disk, spooling it to a temp file if needed."""
+    if isinstance(source, str):
+        yield source
+        return
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            if isinstance(source, (bytes, bytearray)):
+                out.write(source)
+            else:
+                source.seek(0)
+                shutil.copyfileobj(source, out, 1 << 20)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int = PDF_EXTRACT_WORKERS) -> ProcessPoolExecutor:
+    """The shared pool, (re)created with `workers` processes when it does not exist or has another size."""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown(wait=False)  # ranges already submitted by other callers still finish
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def iter_pages_parallel(path: str, n_pages: int, workers: int = PDF_EXTRACT_WORKERS,
+                        pages_per_task: int = PDF_EXTRACT_PAGES_PER_TASK) -> Iterator[Dict[str, Any]]:
+    """Yield the `n_pages` pages of the PDF at `path` in order, extracted by the process pool."""
+    pool = get_pool(workers)
+    token = uuid.uuid4().hex
+    step = max(1, pages_per_task)
+    ranges = iter(range(0, n_pages, step))
+    inflight: deque = deque()
+
+    def submit() -> None:
+        start = next(ranges, None)
+        if start is not None:
+            inflight.append(pool.submit(extract_range, token, path, start, min(start + step, n_pages)))
+
+    try:
+        for _ in range(2 * max(1, workers)):
+            submit()
+        while inflight:
+            pages = inflight.popleft().result()
+            submit()
+            yield from pages
+    finally:
+        # a consumer that stops early (or a failed range) should not leave work queued
+        for f in inflight:
+            f.cancel()
@@ -1,3 +1,10 @@
+from typing import Any, Dict, List, Tuple
+
+from .packing import pack_contexts
+from .utils import tokenize_len
+from .metrics import prompt_tokens
+from ..settings import PROMPT_TOKEN_BUDGET
+
 SYSTEM = (
   "You are a helpful assistant. Use ONLY the provided context to answer. "
   "If the context is insufficient, say you don't know. Be concise and cite references."
@@ -14,3 +21,18 @@ def build_prompt(question: str, contexts: list[dict]) -> str:
     return f"{SYSTEM}\n\nQuestion: {question}\n\nContext:\n{ctx_blob}\n\nAnswer:"
 
 
+
+def build_packed_prompt(question: str, contexts: list[dict],
+                        budget_tokens: int = PROMPT_TOKEN_BUDGET) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any]]:
+    """build_prompt over packed contexts (see packing.py).
+
+    Returns the prompt, the packed blocks in the order they are numbered [1..n] in it
+    (what the answer's citations refer to) and token counts of the prompt before/after packing.
+    """
+    packed, stats = pack_contexts(contexts, budget_tokens)
+    prompt = build_prompt(question, packed)
+    stats["prompt_tokens_before"] = tokenize_len(build_prompt(question, contexts))
+    stats["prompt_tokens_after"] = tokenize_len(prompt)
+    prompt_tokens.observe(stats["prompt_tokens_before"], packing="before")
+    prompt_tokens.observe(stats["prompt_tokens_after"], packing="after")
+    return prompt, packed, stats
@@ -1,11 +1,26 @@
-from typing import List, Dict, Any
-import inspect
-from weaviate.classes.query import Rerank
-from .weav_client import get_collection
-from .ingest import embed_texts
+from typing import List, Dict, Any, Optional
+import asyncio, inspect, logging
+import httpx
+from weaviate.classes.query import Rerank, MetadataQuery
+from .ingest import aembed_texts, arerank
+from .cache import TTLCache, normalize_text
+from .metrics import stage
+from .fusion import FusedResult, hybrid_fusion, with_metadata
+from ..settings import (
+    QUERY_CACHE_SIZE, QUERY_CACHE_TTL_S, LOCAL_RERANK_FACTOR, LOCAL_RERANK_LEG, LOCAL_RERANK_BUDGET_MS,
+    HYBRID_FUSION, HYBRID_BM25_DEPTH, HYBRID_VECTOR_DEPTH, HYBRID_RRF_K, LEG_CACHE_SIZE, LEG_CACHE_TTL_S,
+)
 
-def _embed_query(query: str):
-    return embed_texts([query])[0]
+logger = logging.getLogger("uvicorn.error")
+
+# Repeated questions reuse their vector; concurrent misses for the same text share one /vectors call
+query_vectors = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_S)
+
+async def _aembed_query(query: str):
+    async def fetch():
+        return (await aembed_texts([query]))[0]
+    with stage("query_embed"):
+        return await query_vectors.aget_or_compute(normalize_text(query), fetch)
 
 def _call_near_vector(collection, vec, **kwargs):
     f = collection.query.near_vector
@@ -18,23 +33,95 @@ def _call_near_vector(collection, vec, **kwargs):
         # fallback to positional if a future client makes the vector positional-only
         return f(vec, **kwargs)
 
-def semantic(collection, query: str, top_k: int):
-    vec = _embed_query(query)
-    return _call_near_vector(collection, vec, limit=top_k)
+# --- retrievers (used by the /question handlers with the async Weaviate client) ---
+# `_call_near_vector` returns the coroutine unchanged for async collections, so it is awaited here.
+
+# The async retrievers also ask Weaviate for the per-object score/distance, which `to_scored_props` exposes.
+# Retrieval legs (BM25 / vector hits of one query at one depth) are cached and shared across
+# modes: `bm25` and `semantic` are single legs, `hybrid` fuses both (see fusion.py). Concurrent
+# requests for the same leg share one query; ingestion clears the cache.
+leg_results = TTLCache(LEG_CACHE_SIZE, LEG_CACHE_TTL_S)
+
+async def _leg(collection, name: str, query: str, depth: int, fetch):
+    key = (getattr(collection, "name", None), name, normalize_text(query), depth)
+
+    async def run():
+        with stage(f"leg_{name}"):
+            return FusedResult(list((await fetch()).objects or []))
+    return await leg_results.aget_or_compute(key, run)
+
+def abm25_leg(collection, query: str, depth: int):
+    return _leg(collection, "bm25", query, depth, lambda: collection.query.bm25(
+        query=query, limit=depth, return_metadata=MetadataQuery(score=True)))
+
+def avector_leg(collection, query: str, depth: int):
+    async def fetch():
+        vec = await _aembed_query(query)
+        return await _call_near_vector(collection, vec, limit=depth, return_metadata=MetadataQuery(distance=True))
+    return _leg(collection, "vector", query, depth, fetch)
 
-def semantic_with_rerank(collection, query: str, top_k: int, rerank_property: str):
-    vec = _embed_query(query)
+async def asemantic(collection, query: str, top_k: int):
+    return await avector_leg(collection, query, top_k)
+
+async def asemantic_with_rerank(collection, query: str, top_k: int, rerank_property: str):
+    vec = await _aembed_query(query)
     rr = Rerank(query=query, prop=rerank_property)
-    return _call_near_vector(collection, vec, limit=top_k, rerank=rr)
+    return await _call_near_vector(collection, vec, limit=top_k, rerank=rr, return_metadata=MetadataQuery(distance=True))
+
+async def abm25(collection, query: str, top_k: int):
+    return await abm25_leg(collection, query, top_k)
+
+async def ahybrid(collection, query: str, top_k: int, alpha: float, fusion: Optional[str] = None,
+                  bm25_depth: Optional[int] = None, vector_depth: Optional[int] = None):
+    """Fuse a BM25 and a vector leg in the API (`fusion`: relative_score or rrf, default HYBRID_FUSION).
 
-def bm25(collection, query: str, top_k: int):
-    return collection.query.bm25(query=query, limit=top_k)
+    Leg depths default to HYBRID_BM25_DEPTH / HYBRID_VECTOR_DEPTH, or `top_k` when those are 0.
+    """
+    # The BM25 leg does not need the query vector, so start it before embedding.
+    bm25_task = asyncio.ensure_future(abm25_leg(collection, query, bm25_depth or HYBRID_BM25_DEPTH or top_k))
+    try:
+        vector = await avector_leg(collection, query, vector_depth or HYBRID_VECTOR_DEPTH or top_k)
+    except BaseException:
+        bm25_task.cancel()
+        raise
+    bm25 = await bm25_task
+    with stage("fusion"):
+        return hybrid_fusion(bm25, vector, alpha, top_k, fusion or HYBRID_FUSION, HYBRID_RRF_K)
+
+async def alocal_rerank(collection, query: str, top_k: int, alpha: float, rerank_property: str,
+                        factor: int = LOCAL_RERANK_FACTOR, leg: str = LOCAL_RERANK_LEG,
+                        budget_ms: float = LOCAL_RERANK_BUDGET_MS, fusion: Optional[str] = None) -> FusedResult:
+    """Over-fetch top_k * factor candidates, rerank them with /rerank and keep the best top_k.
+
+    Only `rerank_property` of each candidate is sent. If reranking fails or overruns
+    `budget_ms`, the first top_k candidates are returned in retrieval order.
+    """
+    depth = top_k * max(1, factor)
+    if leg == "semantic":
+        candidates = await asemantic(collection, query, depth)
+    else:
+        candidates = await ahybrid(collection, query, depth, alpha, fusion, depth, depth)
+    objs = list(candidates.objects or [])
+    if len(objs) <= 1:
+        return FusedResult(objs[:top_k])
+    docs = [str(o.properties.get(rerank_property) or "") for o in objs]
+    try:
+        with stage("rerank"):
+            ranked = await asyncio.wait_for(arerank(query, docs, top_n=top_k), budget_ms / 1000.0)
+    except (asyncio.TimeoutError, httpx.HTTPError) as e:
+        logger.warning(f"local rerank fell back to retrieval order ({type(e).__name__}, budget={budget_ms}ms)")
+        return FusedResult(objs[:top_k])
+    # copies: the candidates may be shared leg-cache entries
+    return FusedResult([with_metadata(objs[r["index"]], rerank_score=r["score"]) for r in ranked])
 
-def hybrid(collection, query: str, top_k: int, alpha: float):
-    vec = _embed_query(query)
-    return collection.query.hybrid(query=query, vector=vec, limit=top_k, alpha=alpha)
+_SCORE_FIELDS = ("score", "distance", "rerank_score")
 
-def to_props(result) -> List[Dict[str, Any]]:
-    return [obj.properties for obj in result.objects or []]
+def to_scored_props(result) -> List[Dict[str, Any]]:
+    """Hit properties, plus whichever of score / distance / rerank_score the query returned."""
+    out = []
+    for obj in result.objects or []:
+        meta = getattr(obj, "metadata", None)
+        out.append({**obj.properties, **{f: getattr(meta, f, None) for f in _SCORE_FIELDS}})
+    return out
 
 
@@ -11,6 +11,8 @@ PROP_CREATED_AT = "created_at"
 PROP_MIME = "mime"
 PROP_HASH = "hash"
 PROP_NUM_TOKENS = "num_tokens"
+PROP_FILE_HASH = "file_hash"  # sha1 of the PDF the chunk was indexed from ("" until that run completes)
+PROP_DOC_CHUNKS = "doc_chunks"  # number of chunks that version of the document has
 
 ALL_TEXT_PROPS = [PROP_DOC_ID, PROP_SOURCE, PROP_TITLE, PROP_CHUNK, PROP_MIME, PROP_HASH]
 
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal, get_args
 
-RagMode = Literal["semantic", "semantic_rerank", "bm25", "hybrid", "no_rag"]
+RagMode = Literal["semantic", "semantic_rerank", "bm25", "hybrid", "local_rerank", "no_rag"]
+FusionMethod = Literal["relative_score", "rrf"]
 
 class QuestionRequest(BaseModel):
     question: str
@@ -9,11 +10,16 @@ class QuestionRequest(BaseModel):
     top_k: int = 5
     alpha: float = 0.5
     rerank_property: str = "chunk"
+    fusion: Optional[FusionMethod] = None  # hybrid / local_rerank; None = HYBRID_FUSION
+    deadline_ms: Optional[float] = None  # whole-request deadline for the LLM call; None = LLM_DEADLINE_MS, 0 = none
+    include_timings: bool = False
 
 class DocRef(BaseModel):
     title: Optional[str] = None
     page: Optional[int] = None
     score: Optional[float] = None
+    distance: Optional[float] = None
+    rerank_score: Optional[float] = None
     link: Optional[str] = None
     chunk: Optional[str] = None
 
@@ -21,5 +27,36 @@ class AnswerResponse(BaseModel):
     answer: str
     references: List[str]
     contexts: List[DocRef]
+    timings: Optional[Dict[str, float]] = None
+    packing: Optional[Dict[str, int]] = None  # context packing counts (chunks/tokens before and after)
 
 
+
+class RetrieveResponse(BaseModel):
+    mode: RagMode
+    contexts: List[DocRef]
+    retrieval_ms: float
+    timings: Dict[str, float]
+
+class CompareRequest(BaseModel):
+    question: str
+    modes: List[RagMode] = Field(default_factory=lambda: list(get_args(RagMode)))
+    top_k: int = 5
+    alpha: float = 0.5
+    rerank_property: str = "chunk"
+    fusion: Optional[FusionMethod] = None
+    deadline_ms: Optional[float] = None
+
+class ModeResult(BaseModel):
+    mode: RagMode
+    answer: Optional[str] = None
+    references: List[str] = []
+    contexts: List[DocRef] = []
+    packing: Optional[Dict[str, int]] = None
+    latency_ms: float
+    timings: Dict[str, float]
+    error: Optional[str] = None
+
+class CompareResponse(BaseModel):
+    results: List[ModeResult]
+    total_ms: float
@@ -1,4 +1,5 @@
 import hashlib, datetime
+from functools import lru_cache
 from typing import List, Dict
 import tiktoken
 
@@ -8,12 +9,31 @@ def now_iso():
 def sha1_bytes(b: bytes) -> str:
     return hashlib.sha1(b).hexdigest()
 
+def sha1_file(source, block: int = 1 << 20) -> str:
+    """sha1 of a path, bytes or seekable binary file (read in blocks, then rewound)."""
+    if isinstance(source, (bytes, bytearray)):
+        return sha1_bytes(bytes(source))
+    h = hashlib.sha1()
+    f = open(source, "rb") if isinstance(source, str) else source
+    try:
+        start = f.tell()
+        while b := f.read(block):
+            h.update(b)
+        f.seek(start)
+    finally:
+        if f is not source:
+            f.close()
+    return h.hexdigest()
+
+@lru_cache(maxsize=None)
+def get_encoder(name: str = "cl100k_base"):
+    return tiktoken.get_encoding(name)
+
 def tokenize_len(text: str) -> int:
-    enc = tiktoken.get_encoding("cl100k_base")
-    return len(enc.encode(text))
+    return len(get_encoder().encode(text))
 
 def chunk_text(text: str, max_tokens: int, overlap: int) -> List[str]:
-    enc = tiktoken.get_encoding("cl100k_base")
+    enc = get_encoder()
     toks = enc.encode(text)
     chunks = []
     i = 0
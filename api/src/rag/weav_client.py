@@ -1,15 +1,43 @@
 import weaviate
 from weaviate.classes.config import Property, DataType, Configure
+from weaviate.classes.init import AdditionalConfig
+from weaviate.config import ConnectionConfig
 from typing import Optional
-from ..settings import WEAVIATE_HTTP_HOST, WEAVIATE_HTTP_PORT, WEAVIATE_GRPC_HOST, WEAVIATE_GRPC_PORT
+from ..settings import (
+    WEAVIATE_HTTP_HOST, WEAVIATE_HTTP_PORT, WEAVIATE_GRPC_HOST, WEAVIATE_GRPC_PORT,
+    WEAVIATE_POOL_CONNECTIONS, WEAVIATE_POOL_MAXSIZE, RETRIEVER_BACKEND, LOCAL_INDEX_PATH,
+)
+from .local_store import LocalClient, AsyncLocalClient
 
 CLASS_NAME = "DocChunk"
 
+def _additional_config() -> AdditionalConfig:
+    return AdditionalConfig(
+        connection=ConnectionConfig(
+            session_pool_connections=WEAVIATE_POOL_CONNECTIONS,
+            session_pool_maxsize=WEAVIATE_POOL_MAXSIZE,
+        ),
+    )
+
 def get_client():
+    if RETRIEVER_BACKEND == "local":
+        return LocalClient(LOCAL_INDEX_PATH)
     return weaviate.connect_to_local(
         host=WEAVIATE_HTTP_HOST,
         port=WEAVIATE_HTTP_PORT,
         grpc_port=WEAVIATE_GRPC_PORT,
+        additional_config=_additional_config(),
+    )
+
+def get_async_client():
+    """Create (but do not connect) an async client; call ``await client.connect()``."""
+    if RETRIEVER_BACKEND == "local":
+        return AsyncLocalClient(LOCAL_INDEX_PATH)
+    return weaviate.use_async_with_local(
+        host=WEAVIATE_HTTP_HOST,
+        port=WEAVIATE_HTTP_PORT,
+        grpc_port=WEAVIATE_GRPC_PORT,
+        additional_config=_additional_config(),
     )
 
 def ensure_schema(client: weaviate.WeaviateClient):
@@ -22,6 +50,7 @@ def ensure_schema(client: weaviate.WeaviateClient):
         else:
             existing = [c.name for c in listed.collections]
         if CLASS_NAME in existing:
+            _ensure_file_hash(client)
             return
     except Exception:
         # if listing fails, try create anyway
@@ -42,12 +71,25 @@ def ensure_schema(client: weaviate.WeaviateClient):
                 Property(name="mime", data_type=DataType.TEXT),
                 Property(name="hash", data_type=DataType.TEXT),
                 Property(name="num_tokens", data_type=DataType.INT),
+                Property(name="file_hash", data_type=DataType.TEXT),
+                Property(name="doc_chunks", data_type=DataType.INT),
             ],
         )
     except Exception:
         # swallow 422 already exists
         pass
 
+def _ensure_file_hash(client):
+    # collections created before incremental re-indexing lack these properties
+    try:
+        col = client.collections.get(CLASS_NAME)
+        have = {p.name for p in col.config.get().properties}
+        for name, data_type in (("file_hash", DataType.TEXT), ("doc_chunks", DataType.INT)):
+            if name not in have:
+                col.config.add_property(Property(name=name, data_type=data_type))
+    except Exception:
+        pass
+
 def get_collection(client):
     return client.collections.get(CLASS_NAME)
 
@@ -18,3 +18,104 @@ CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "60"))
 SERVICE_NAME = "rag-api"
 
 
+
+# Inference service (embeddings / reranker)
+INFER_BASE = os.getenv("INFER_BASE", "http://local-inference:5001")
+
+# Connection pooling: clients are created once per process and reused across requests
+WEAVIATE_POOL_CONNECTIONS = int(os.getenv("WEAVIATE_POOL_CONNECTIONS", "20"))
+WEAVIATE_POOL_MAXSIZE = int(os.getenv("WEAVIATE_POOL_MAXSIZE", "100"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HEALTHCHECK_INTERVAL_S = float(os.getenv("HEALTHCHECK_INTERVAL_S", "15"))
+
+# Batched ingestion: batch size adapts between MIN and MAX to keep each insert near TARGET_S
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+INGEST_BATCH_MIN = int(os.getenv("INGEST_BATCH_MIN", "8"))
+INGEST_BATCH_MAX = int(os.getenv("INGEST_BATCH_MAX", "512"))
+INGEST_BATCH_TARGET_S = float(os.getenv("INGEST_BATCH_TARGET_S", "2.0"))
+
+# Streaming ingestion: fixed embed batches, bounded queues between stages, files processed in parallel
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+INGEST_FILE_CONCURRENCY = int(os.getenv("INGEST_FILE_CONCURRENCY", "4"))
+
+# Persistent embedding cache keyed on (model@backend, chunk sha1); survives restarts when EMBED_CACHE_PATH is on a volume.
+# EMBEDDING_MODEL / EMBEDDING_BACKEND must match the inference service's, whose vectors are cached.
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "flag")
+EMBED_CACHE_ENABLED = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "data/embed_cache.sqlite")
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", "200000"))
+
+# In-memory query-vector cache in front of the retrievers' query embedding (0 disables)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+QUERY_CACHE_TTL_S = float(os.getenv("QUERY_CACHE_TTL_S", "600"))
+
+# /question answer cache: exact tier always on (size 0 disables); semantic tier when threshold > 0
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", "3600"))
+ANSWER_CACHE_SEMANTIC_THRESHOLD = float(os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD", "0"))
+
+# Chunking engine: "tokens" (fixed windows) or "sentences" (paragraph/sentence boundaries within the budget)
+CHUNK_MODE = os.getenv("CHUNK_MODE", "tokens")
+CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "4"))
+CHUNK_PAGE_BATCH = int(os.getenv("CHUNK_PAGE_BATCH", "16"))
+
+# /vectors response format: "binary" (raw float32, falls back to JSON if the service does not offer it) or "json"
+VECTOR_TRANSPORT = os.getenv("VECTOR_TRANSPORT", "binary")
+
+# local_rerank mode: over-fetch top_k * FACTOR candidates from LEG ("hybrid" or "semantic"), rerank them via
+# the inference service's /rerank and fall back to the un-reranked order when it takes longer than BUDGET_MS
+LOCAL_RERANK_FACTOR = int(os.getenv("LOCAL_RERANK_FACTOR", "4"))
+LOCAL_RERANK_LEG = os.getenv("LOCAL_RERANK_LEG", "hybrid")
+LOCAL_RERANK_BUDGET_MS = float(os.getenv("LOCAL_RERANK_BUDGET_MS", "800"))
+
+# /question/compare: LLM calls of one comparison run in parallel, at most this many at a time
+COMPARE_LLM_CONCURRENCY = int(os.getenv("COMPARE_LLM_CONCURRENCY", "3"))
+
+# Retrieval backend: "weaviate" or "local" (in-process vector matrix + BM25 index persisted under LOCAL_INDEX_PATH)
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "weaviate")
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/local_index")
+
+# hybrid: fused in the API from a BM25 and a vector leg. FUSION is "relative_score" (Weaviate's default) or "rrf";
+# leg depths of 0 mean top_k. Leg results are cached per (query, depth) and shared by bm25/semantic/hybrid.
+HYBRID_FUSION = os.getenv("HYBRID_FUSION", "relative_score")
+HYBRID_BM25_DEPTH = int(os.getenv("HYBRID_BM25_DEPTH", "0"))
+HYBRID_VECTOR_DEPTH = int(os.getenv("HYBRID_VECTOR_DEPTH", "0"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+LEG_CACHE_SIZE = int(os.getenv("LEG_CACHE_SIZE", "1024"))
+LEG_CACHE_TTL_S = float(os.getenv("LEG_CACHE_TTL_S", "300"))
+
+# Context packing before the LLM: merge adjacent chunks, drop their repeated overlap and keep the context
+# within PROMPT_TOKEN_BUDGET tokens (0 = no cap), best-scored chunks first
+CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "true").lower() == "true"
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+
+# LLM transport: pooled (HTTP/2 when available) client, per-attempt timeout capped by the request deadline
+# (LLM_DEADLINE_MS, overridable per request with "deadline_ms"; 0 = none), jittered exponential backoff on
+# 429/5xx and connection errors, and an optional hedged duplicate sent once a call outlives the recent p95
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "true").lower() == "true"
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "120"))
+LLM_DEADLINE_MS = float(os.getenv("LLM_DEADLINE_MS", "0"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.25"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "4"))
+LLM_HEDGE = os.getenv("LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "50"))
+
+# Background ingestion (POST /documents/jobs): uploads are spooled under INGEST_SPOOL_DIR and indexed by at most
+# INGEST_JOB_WORKERS jobs at a time (files of a job one after another) so ingestion leaves headroom for queries;
+# beyond INGEST_JOB_MAX_QUEUED waiting jobs new ones are refused with 429. The last INGEST_JOB_HISTORY jobs are kept.
+INGEST_SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR", "data/uploads")
+INGEST_JOB_WORKERS = int(os.getenv("INGEST_JOB_WORKERS", "1"))
+INGEST_JOB_MAX_QUEUED = int(os.getenv("INGEST_JOB_MAX_QUEUED", "8"))
+INGEST_JOB_HISTORY = int(os.getenv("INGEST_JOB_HISTORY", "100"))
+
+# PDF text extraction: documents of at least PDF_EXTRACT_MIN_PAGES pages are extracted by a pool of
+# PDF_EXTRACT_WORKERS processes, PDF_EXTRACT_PAGES_PER_TASK pages per task (workers <= 1 = serial)
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_EXTRACT_MIN_PAGES = int(os.getenv("PDF_EXTRACT_MIN_PAGES", "32"))
+PDF_EXTRACT_PAGES_PER_TASK = int(os.getenv("PDF_EXTRACT_PAGES_PER_TASK", "8"))
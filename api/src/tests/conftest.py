@@ -0,0 +1,100 @@
+from io import BytesIO
+
+import pytest
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+
+def _make_pdf_bytes(text: str) -> bytes:
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    width, height = letter
+    c.setFont("Helvetica", 12)
+    c.drawString(72, height - 72, text)
+    c.save()
+    buf.seek(0)
+    return buf.read()
+
+
+class FakeCollection:
+    def __init__(self):
+        self._items = []
+
+    class _Data:
+        def __init__(self, outer):
+            self.outer = outer
+        def insert(self, properties, vectors=None):
+            self.outer._items.append(properties)
+        def insert_many(self, objects):
+            self.outer._items.extend(o.properties for o in objects)
+            class _Ret:
+                errors = {}
+            return _Ret()
+        def update(self, uuid, properties):
+            pass
+        def delete_many(self, where):
+            class _Ret:
+                successful = 0
+            return _Ret()
+
+    class _Query:
+        def __init__(self, outer):
+            self.outer = outer
+        class _Res:
+            def __init__(self, objs):
+                class _Obj:
+                    def __init__(self, props):
+                        self.properties = props
+                self.objects = [_Obj(p) for p in objs]
+        def fetch_objects(self, filters=None, limit=None, return_properties=None, sort=None):
+            return FakeCollection._Query._Res([])  # nothing indexed before: every upload is new
+        # /question uses the async Weaviate client, so queries are coroutines
+        async def bm25(self, query: str, limit: int, return_metadata=None):
+            # naive: return first N
+            return FakeCollection._Query._Res(self.outer._items[:limit])
+        async def near_text(self, query: str, limit: int, rerank=None):
+            return FakeCollection._Query._Res(self.outer._items[:limit])
+        async def hybrid(self, query: str, limit: int, alpha: float):
+            return FakeCollection._Query._Res(self.outer._items[:limit])
+
+    @property
+    def data(self):
+        return FakeCollection._Data(self)
+
+    @property
+    def query(self):
+        return FakeCollection._Query(self)
+
+
+class FakeAsyncClient:
+    async def connect(self):
+        pass
+
+    async def is_ready(self):
+        return True
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def make_pdf():
+    """One-page PDF bytes with the given text."""
+    return _make_pdf_bytes
+
+
+@pytest.fixture
+def fake_weaviate(monkeypatch):
+    """Stub the app's Weaviate clients (the pooled clients are built via weav_client).
+
+    Call it with the collection ``get_collection`` should hand out (default: a new
+    FakeCollection); returns that collection.
+    """
+    def install(collection=None):
+        collection = FakeCollection() if collection is None else collection
+        monkeypatch.setattr("src.rag.weav_client.get_client", lambda: object())
+        monkeypatch.setattr("src.rag.weav_client.get_async_client", lambda: FakeAsyncClient())
+        monkeypatch.setattr("src.rag.weav_client.ensure_schema", lambda client: None)
+        monkeypatch.setattr("src.main.get_collection", lambda client: collection)
+        return collection
+    return install
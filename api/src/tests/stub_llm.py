@@ -0,0 +1,98 @@
+"""Local OpenAI-compatible chat-completions server for tests (stdlib only, runs in a thread)."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class StubLLM:
+    """Answers POST /chat/completions with `answer`, streamed word by word when `stream` is set.
+
+    `statuses` are returned (as errors, with `retry_after` when set) to the first requests, one
+    each; `delays` are slept before answering the first requests, one each.
+    """
+
+    def __init__(self, answer: str = "The flux capacitor enables time travel.", token_delay_s: float = 0.0,
+                 statuses: Optional[List[int]] = None, delays: Optional[List[float]] = None,
+                 retry_after: Optional[float] = None):
+        self.answer = answer
+        self.token_delay_s = token_delay_s
+        self.statuses = list(statuses or [])
+        self.delays = list(delays or [])
+        self.retry_after = retry_after
+        self.requests: List[dict] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                with stub._lock:
+                    stub.requests.append(body)
+                    status = stub.statuses.pop(0) if stub.statuses else None
+                    delay = stub.delays.pop(0) if stub.delays else 0.0
+                time.sleep(delay)
+                if status is not None:
+                    stub._error(self, status)
+                elif body.get("stream"):
+                    stub._stream(self)
+                else:
+                    stub._complete(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def tokens(self) -> List[str]:
+        words = self.answer.split(" ")
+        return [w if i == 0 else " " + w for i, w in enumerate(words)]
+
+    def _error(self, h, status: int) -> None:
+        data = json.dumps({"error": {"message": f"stub error {status}"}}).encode()
+        h.send_response(status)
+        h.send_header("Content-Type", "application/json")
+        h.send_header("Content-Length", str(len(data)))
+        if self.retry_after is not None:
+            h.send_header("Retry-After", str(self.retry_after))
+        h.end_headers()
+        h.wfile.write(data)
+
+    def _complete(self, h) -> None:
+        data = json.dumps({"choices": [{"index": 0, "message": {"role": "assistant", "content": self.answer}}],
+                           "usage": {"prompt_tokens": 12, "completion_tokens": len(self.tokens())}}).encode()
+        h.send_response(200)
+        h.send_header("Content-Type", "application/json")
+        h.send_header("Content-Length", str(len(data)))
+        h.end_headers()
+        h.wfile.write(data)
+
+    def _stream(self, h) -> None:
+        h.send_response(200)
+        h.send_header("Content-Type", "text/event-stream")
+        h.send_header("Transfer-Encoding", "chunked")
+        h.end_headers()
+
+        def send(payload: str) -> None:
+            data = f"data: {payload}\n\n".encode()
+            h.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            h.wfile.flush()
+
+        for tok in self.tokens():
+            time.sleep(self.token_delay_s)
+            send(json.dumps({"choices": [{"index": 0, "delta": {"content": tok}}]}))
+        send("[DONE]")
+        h.wfile.write(b"0\r\n\r\n")
+
+    def __enter__(self) -> "StubLLM":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
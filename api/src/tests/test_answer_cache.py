@@ -0,0 +1,97 @@
+import asyncio
+
+from src.rag.answer_cache import AnswerCache
+from src.rag.types import QuestionRequest
+
+
+def test_identical_concurrent_questions_share_one_computation():
+    cache = AnswerCache(maxsize=10, ttl_s=60)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def run():
+        body = QuestionRequest(question="What is X?", mode="bm25")
+        same = QuestionRequest(question="  what is x? ", mode="bm25")
+        return await asyncio.gather(cache.aget(body, compute), cache.aget(same, compute))
+
+    assert asyncio.run(run()) == ["answer", "answer"]
+    assert len(calls) == 1
+
+
+def test_corpus_version_bump_invalidates():
+    cache = AnswerCache(maxsize=10, ttl_s=60)
+    body = QuestionRequest(question="q", mode="bm25")
+    answers = iter(["old", "new"])
+
+    async def compute():
+        return next(answers)
+
+    assert asyncio.run(cache.aget(body, compute)) == "old"
+    assert asyncio.run(cache.aget(body, compute)) == "old"
+    cache.bump_corpus_version()
+    assert asyncio.run(cache.aget(body, compute)) == "new"
+
+
+def test_semantic_tier_reuses_close_questions_with_same_params():
+    cache = AnswerCache(maxsize=10, ttl_s=60, semantic_threshold=0.9)
+    vecs = {"how do i reset it": [1.0, 0.0], "how can i reset it": [0.99, 0.05], "what is the price": [0.0, 1.0]}
+
+    async def embed(q):
+        return vecs[q]
+
+    async def compute():
+        return "computed"
+
+    async def run():
+        first = await cache.aget(QuestionRequest(question="how do i reset it"), compute, embed=embed)
+
+        async def never():
+            raise AssertionError("should be served from the semantic tier")
+
+        close = await cache.aget(QuestionRequest(question="how can i reset it"), never, embed=embed)
+        other_mode = await cache.aget(QuestionRequest(question="how can i reset it", mode="bm25"), compute, embed=embed)
+        far = await cache.aget(QuestionRequest(question="what is the price"), compute, embed=embed)
+        return first, close, other_mode, far
+
+    assert asyncio.run(run()) == ("computed",) * 4
+    assert cache.stats()["semantic"]["hits"] == 1
+
+
+def test_semantic_tier_skips_modes_that_do_not_embed_and_scans_one_bucket():
+    cache = AnswerCache(maxsize=10, ttl_s=60, semantic_threshold=0.9)
+    embedded = []
+
+    async def embed(q):
+        embedded.append(q)
+        return [1.0, 0.0]
+
+    async def compute():
+        return "computed"
+
+    async def run():
+        for mode in ("bm25", "no_rag"):
+            await cache.aget(QuestionRequest(question="how do i reset it", mode=mode), compute, embed=embed)
+        await cache.aget(QuestionRequest(question="how do i reset it", top_k=3), compute, embed=embed)
+        await cache.aget(QuestionRequest(question="how can i reset it", top_k=4), compute, embed=embed)
+
+    asyncio.run(run())
+    assert embedded == ["how do i reset it", "how can i reset it"]  # the semantic-mode calls only
+    stats = cache.stats()["semantic"]
+    assert stats["buckets"] == 2 and stats["size"] == 2 and stats["hits"] == 0
+
+
+def test_cache_clear_endpoint_empties_answer_and_query_caches():
+    from fastapi.testclient import TestClient
+    from src.main import app
+    from src.rag.answer_cache import answers
+    from src.rag.retrievers import query_vectors
+
+    answers.exact.set(("q",), "a")
+    query_vectors.set("q", [1.0])
+    r = TestClient(app).post("/cache/clear")
+    assert r.status_code == 200 and r.json()["cleared"]["answer_cache"] >= 1
+    assert len(answers.exact) == 0 and len(query_vectors) == 0
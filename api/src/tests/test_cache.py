@@ -0,0 +1,63 @@
+import threading
+import time
+
+from src.rag.cache import TTLCache
+
+
+def test_lru_eviction_and_ttl_expiry():
+    c = TTLCache(maxsize=2, ttl_s=0.05)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.stats()["evictions"] == 1
+    time.sleep(0.06)
+    assert c.get("a") is None
+    assert c.stats()["expirations"] == 1
+
+
+def test_get_or_compute_coalesces_threads():
+    c = TTLCache(maxsize=10)
+    calls = []
+    gate = threading.Event()
+
+    def slow():
+        calls.append(1)
+        gate.wait(2)
+        return "v"
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(c.get_or_compute("k", slow))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert out == ["v"] * 5
+    assert len(calls) == 1
+
+
+def test_aget_or_compute_waiter_takes_over_when_owner_is_cancelled():
+    import asyncio
+
+    c = TTLCache(maxsize=10)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05 if len(calls) > 1 else 10)
+        return "v"
+
+    async def main():
+        owner = asyncio.create_task(c.aget_or_compute("k", compute))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(c.aget_or_compute("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        return await asyncio.gather(*waiters), owner
+
+    results, owner = asyncio.run(main())
+    assert results == ["v"] * 3 and owner.cancelled()
+    assert len(calls) == 2  # one waiter recomputed, the other two shared its result
@@ -6,3 +6,27 @@ def test_chunker_basic():
     assert len(chunks) > 5
 
 
+def test_chunker_matches_chunk_text_and_counts_tokens():
+    from src.rag.chunking import Chunker
+    from src.rag.utils import tokenize_len
+    text = "The quick brown fox jumps over the lazy dog. " * 200
+    chunks = Chunker(max_tokens=100, overlap=20, mode="tokens").chunk_text(text)
+    assert [c for c, _ in chunks] == chunk_text(text, max_tokens=100, overlap=20)
+    assert all(n <= 100 for _, n in chunks)
+    assert chunks[0][1] == tokenize_len(chunks[0][0])
+
+def test_chunker_sentence_mode_keeps_budget_and_boundaries():
+    from src.rag.chunking import Chunker
+    from src.rag.utils import tokenize_len
+    text = "\n\n".join(" ".join(f"Sentence {p}-{i} is here." for i in range(30)) for p in range(5))
+    chunks = Chunker(max_tokens=80, overlap=15, mode="sentences").chunk_text(text)
+    assert len(chunks) > 3
+    for c, n in chunks:
+        assert n <= 80 and n == tokenize_len(c)
+        assert c.rstrip().endswith(".")
+
+def test_chunk_pages_preserves_page_order():
+    from src.rag.chunking import Chunker
+    pages = [{"page": i + 1, "text": f"page {i} " * 50} for i in range(40)]
+    out = list(Chunker(max_tokens=50, overlap=10, workers=4, page_batch=8).chunk_pages(pages))
+    assert [p["page"] for p, _ in out] == list(range(1, 41))
@@ -0,0 +1,63 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.rag import retrievers
+from src.rag.answer_cache import answers
+
+
+def _obj(uuid, **meta):
+    return SimpleNamespace(uuid=uuid, properties={"title": "manual.pdf", "page": 1, "chunk": uuid},
+                           metadata=SimpleNamespace(score=meta.get("score"), distance=meta.get("distance")))
+
+
+class LegCollection:
+    def __init__(self):
+        self.query = self
+
+    async def bm25(self, query, limit, return_metadata=None):
+        return SimpleNamespace(objects=[_obj(f"b{i}", score=1.0 - i / 10) for i in range(limit)])
+
+    async def near_vector(self, near_vector, limit, **kwargs):
+        return SimpleNamespace(objects=[_obj(f"v{i}", distance=i / 10) for i in range(limit)])
+
+
+def test_compare_embeds_once_and_caps_llm_concurrency(monkeypatch, fake_weaviate):
+    embeds, running, peak = [], [0], [0]
+
+    async def embed(texts):
+        embeds.append(texts)
+        await asyncio.sleep(0.02)
+        return [[1.0, 0.0]]
+
+    async def fake_achat(question, prompt):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.02)
+        running[0] -= 1
+        return "ok"
+
+    fake_weaviate(LegCollection())
+    monkeypatch.setattr("src.main.achat", fake_achat)
+    monkeypatch.setattr("src.main.COMPARE_LLM_CONCURRENCY", 2)
+    monkeypatch.setattr(retrievers, "aembed_texts", embed)
+    retrievers.query_vectors.clear()
+    retrievers.leg_results.clear()
+    answers.bump_corpus_version()
+
+    modes = ["semantic", "semantic_rerank", "hybrid", "bm25", "no_rag"]
+    with TestClient(app) as client:
+        r = client.post("/question/compare", json={"question": "rated power?", "modes": modes, "top_k": 2})
+
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [m["mode"] for m in results] == modes
+    assert all(m["answer"] == "ok" and m["error"] is None for m in results)
+    assert len(embeds) == 1
+    assert peak[0] == 2
+    by_mode = {m["mode"]: m for m in results}
+    assert "query_embed" not in by_mode["bm25"]["timings"] and "llm" in by_mode["bm25"]["timings"]
+    assert by_mode["semantic"]["contexts"][0]["distance"] == 0.0
+    assert by_mode["no_rag"]["contexts"] == []
@@ -0,0 +1,41 @@
+from src.rag.connections import WeaviatePool, ConnectionManager
+
+
+class FakeClient:
+    def __init__(self, ready=True):
+        self.ready = ready
+        self.closed = False
+
+    def is_ready(self):
+        return self.ready
+
+    def close(self):
+        self.closed = True
+
+
+def test_weaviate_pool_reuses_client(monkeypatch):
+    monkeypatch.setattr("src.rag.weav_client.get_client", lambda: FakeClient())
+    pool = WeaviatePool(healthcheck_interval=3600)
+    first = pool.get()
+    assert pool.get() is first
+    assert pool.stats()["connects"] == 1
+    assert pool.stats()["connections_reused"] == 1
+
+
+def test_weaviate_pool_reconnects_on_failed_healthcheck(monkeypatch):
+    monkeypatch.setattr("src.rag.weav_client.get_client", lambda: FakeClient())
+    pool = WeaviatePool(healthcheck_interval=-1)
+    first = pool.get()
+    first.ready = False
+    second = pool.get()
+    assert second is not first
+    assert first.closed
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_http_clients_are_shared_by_name():
+    mgr = ConnectionManager()
+    a = mgr.http("inference", "http://localhost:5001", timeout=5)
+    assert mgr.http("inference", "http://localhost:5001", timeout=5) is a
+    assert mgr.stats()["http"]["inference"]["requests"] == 0
+    mgr.close()
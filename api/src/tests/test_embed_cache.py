@@ -0,0 +1,43 @@
+from src.rag.embed_cache import EmbeddingCache, embed_with_cache, model_key
+
+
+def test_only_misses_reach_the_embedder(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "emb.sqlite"), max_entries=100)
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 0.5] for t in texts]
+
+    first = embed_with_cache(["aa", "b", "aa"], embed, cache, model="m")
+    assert calls == [["aa", "b"]]
+    assert first.tolist() == [[2.0, 0.5], [1.0, 0.5], [2.0, 0.5]]
+
+    second = embed_with_cache(["b", "ccc"], embed, cache, model="m")
+    assert calls[-1] == ["ccc"]
+    assert second.tolist() == [[1.0, 0.5], [3.0, 0.5]]
+    assert cache.stats()["hits"] == 1
+
+    # a different model never reuses vectors
+    embed_with_cache(["b"], embed, cache, model="other")
+    assert calls[-1] == ["b"]
+
+    # nor does another backend (e.g. int8) of the same model
+    embed_with_cache(["ccc"], embed, cache, model=model_key("m", "flag"))
+    embed_with_cache(["ccc"], embed, cache, model=model_key("m", "onnx-int8"))
+    assert calls[-2:] == [["ccc"], ["ccc"]]
+
+
+def test_cache_persists_and_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "emb.sqlite")
+    cache = EmbeddingCache(path, max_entries=2)
+    cache.put_many("m", {"h1": [1.0]})
+    cache.put_many("m", {"h2": [2.0]})
+    cache.get_many("m", ["h1"])
+    cache.put_many("m", {"h3": [3.0]})
+    assert set(cache.get_many("m", ["h1", "h2", "h3"])) == {"h1", "h3"}
+    assert cache.stats()["evictions"] == 1
+    cache.close()
+
+    reopened = EmbeddingCache(path, max_entries=2)
+    assert reopened.get_many("m", ["h3"])["h3"].tolist() == [3.0]
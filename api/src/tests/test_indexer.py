@@ -0,0 +1,213 @@
+from types import SimpleNamespace
+
+from src.rag.indexer import AdaptiveBatchSize, index_chunks
+
+
+class BatchCollection:
+    """insert_many-only fake that rejects chunks whose text contains 'bad'."""
+
+    def __init__(self):
+        self.batches = []
+        self.data = self
+
+    def insert_many(self, objs):
+        self.batches.append(len(objs))
+        errors = {i: SimpleNamespace(message="rejected") for i, o in enumerate(objs) if "bad" in o.properties["chunk"]}
+        return SimpleNamespace(errors=errors)
+
+
+def _items(n):
+    return [{"chunk": "bad" if i == 5 else f"c{i}", "page": 1, "chunk_index": i} for i in range(n)]
+
+
+def test_adaptive_batch_size_grows_and_backs_off():
+    b = AdaptiveBatchSize(initial=16, minimum=4, maximum=64, target_s=1.0)
+    assert b.observe(16, 0.1, 0) == 20
+    assert b.observe(20, 2.0, 0) == 10
+    assert b.observe(10, 0.1, 1) == 5
+
+
+def test_index_chunks_reports_per_object_errors():
+    col = BatchCollection()
+    embedded = []
+
+    def embed(texts):
+        embedded.append(len(texts))
+        return [[0.0] for _ in texts]
+
+    report = index_chunks(col, _items(20), embed=embed, batcher=AdaptiveBatchSize(initial=8, minimum=2, maximum=8))
+    assert sum(col.batches) == 20
+    assert sum(embedded) == 20
+    assert report["inserted"] == 19
+    assert report["errors"] == [{"index": 5, "page": 1, "chunk_index": 5, "error": "rejected"}]
+
+
+def test_run_pipeline_reads_ahead_a_bounded_number_of_batches():
+    import threading, time
+    from src.rag.indexer import run_pipeline
+
+    produced = []
+    release = threading.Event()
+
+    def chunks():
+        for i in range(1000):
+            produced.append(i)
+            yield {"chunk": f"c{i}", "page": 1, "chunk_index": i}
+
+    def embed(texts):
+        release.wait(5)
+        return [[0.0] for _ in texts]
+
+    out = {}
+    t = threading.Thread(target=lambda: out.update(run_pipeline(
+        BatchCollection(), chunks(), embed=embed, embed_batch_size=10, queue_size=2)))
+    t.start()
+    time.sleep(0.3)
+    # one batch in the embedder, two queued, one waiting on put
+    assert len(produced) <= 40
+    release.set()
+    t.join(5)
+    assert out["inserted"] == 1000
+
+
+def test_run_pipeline_propagates_stage_errors():
+    import pytest
+    from src.rag.indexer import run_pipeline
+
+    def embed(texts):
+        raise RuntimeError("inference down")
+
+    with pytest.raises(RuntimeError, match="inference down"):
+        run_pipeline(BatchCollection(), ({"chunk": "c"} for _ in range(50)), embed=embed, embed_batch_size=10)
+
+
+def _pdf(pages):
+    from io import BytesIO
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    for text in pages:
+        c.drawString(72, 720, text)
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def test_index_pdf_reindexes_incrementally(tmp_path):
+    from io import BytesIO
+    from src.rag.indexer import existing_chunks, index_pdf
+    from src.rag.local_store import LocalCollection, LocalStore
+
+    col = LocalCollection(LocalStore(str(tmp_path / "C")))
+    embedded = []
+
+    def embed(texts):
+        embedded.extend(t.strip() for t in texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    def index(pdf, **kw):
+        return index_pdf(col, BytesIO(pdf), filename="manual.pdf", embed=embed, **kw)
+
+    v1 = _pdf(["Motor power is 5 kW.", "Torque is 30 Nm.", "Bearings need grease."])
+    first = index(v1, key="manual")
+    assert (first["added"], first["skipped"], first["removed"], first["unchanged"]) == (3, 0, 0, False)
+    again = index(v1, key="manual")
+    assert again["unchanged"] and again["skipped"] == 3 and again["pages"] == 0 and len(embedded) == 3
+
+    v2 = _pdf(["Motor power is 5 kW.", "Torque is 45 Nm."])
+    second = index(v2, key="manual")
+    assert (second["added"], second["skipped"], second["removed"]) == (1, 1, 1)
+    assert embedded[3:] == ["Torque is 45 Nm."] and first["doc_id"] == second["doc_id"]
+    # the kept chunk was re-stamped, so the same upload is now a full no-op
+    third = index(v2, key="manual")
+    assert third["unchanged"] and third["pages"] == 0 and third["skipped"] == 2
+
+    # without a key the content identifies the document: another manual.pdf does not touch this one
+    other = index(_pdf(["A different manual entirely."]))
+    assert other["doc_id"] != second["doc_id"] and other["removed"] == 0
+    chunks = sorted(o.properties["chunk"].strip() for o in col.query.fetch_objects().objects)
+    assert chunks == ["A different manual entirely.", "Motor power is 5 kW.", "Torque is 45 Nm."]
+
+    # concurrent uploads of one document are serialised: the second sees the first's chunks
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(2) as pool:
+        twins = list(pool.map(lambda _: index(v1, key="twin"), range(2)))
+    assert sorted(r["added"] for r in twins) == [0, 3] and sum(r["unchanged"] for r in twins) == 1
+
+    # paging through a document's chunks does not stop at one page
+    big = index(_pdf([f"Section {i} text." for i in range(7)]), key="big")
+    assert len(existing_chunks(col, big["doc_id"], page_size=2)) == 7
+
+
+def test_interrupted_first_upload_is_resumed_not_skipped(tmp_path):
+    import time
+    import pytest
+    from io import BytesIO
+    from src.rag.indexer import index_pdf
+    from src.rag.local_store import LocalCollection, LocalStore
+
+    col = LocalCollection(LocalStore(str(tmp_path / "C")))
+    pdf = _pdf([f"Section {i} text." for i in range(5)])
+    embedded = []
+
+    def flaky(texts):
+        if len(embedded) >= 2:
+            # fail once the first two chunks are stored (the inserter trails the embedder)
+            deadline = time.monotonic() + 5
+            while len(col.query.fetch_objects().objects) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            raise RuntimeError("inference down")
+        embedded.extend(t.strip() for t in texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    def index(embed):
+        return index_pdf(col, BytesIO(pdf), filename="s.pdf", key="s.pdf", embed=embed, embed_batch_size=1,
+                         batcher=AdaptiveBatchSize(initial=1, minimum=1, maximum=1))
+
+    with pytest.raises(RuntimeError, match="inference down"):
+        index(flaky)
+    stored = len(col.query.fetch_objects().objects)
+    assert 0 < stored < 5
+
+    def embed(texts):
+        embedded.extend(t.strip() for t in texts)
+        return [[1.0, 0.0] for _ in texts]
+
+    resumed = index(embed)
+    assert not resumed["unchanged"] and resumed["skipped"] == stored and resumed["added"] == 5 - stored
+    assert sorted(embedded) == sorted(f"Section {i} text." for i in range(5))  # nothing embedded twice
+    assert index(embed)["unchanged"]
+
+
+def test_upload_keys_documents_by_filename(tmp_path, monkeypatch, fake_weaviate):
+    from fastapi.testclient import TestClient
+    from src.main import app
+    from src.rag.local_store import LocalCollection, LocalStore
+
+    col = fake_weaviate(LocalCollection(LocalStore(str(tmp_path / "C"))))
+    monkeypatch.setattr("src.rag.ingest.embed_texts", lambda texts: [[1.0, 0.0] for _ in texts])
+    client = TestClient(app)
+
+    def upload(pages):
+        return client.post("/documents", files=[("files", ("manual.pdf", _pdf(pages), "application/pdf"))]).json()
+
+    upload(["Motor power is 5 kW.", "Torque is 30 Nm."])
+    v2 = upload(["Motor power is 5 kW.", "Torque is 45 Nm."])
+    assert (v2["inserted_chunks"], v2["skipped_chunks"]) == (1, 1)
+    chunks = sorted(o.properties["chunk"].strip() for o in col.query.fetch_objects().objects)
+    assert chunks == ["Motor power is 5 kW.", "Torque is 45 Nm."]
+
+
+def test_upload_rejects_duplicate_doc_keys():
+    from fastapi.testclient import TestClient
+    from src.main import app
+
+    pdf = _pdf(["x"])
+    files = [("files", (n, pdf, "application/pdf")) for n in ("a.pdf", "b.pdf")]
+    r = TestClient(app).post("/documents", files=files, data={"doc_keys": ["same", "same"]})
+    assert r.status_code == 400 and "unique" in r.json()["error"]
+    # without doc_keys the filename is the key
+    files = [("files", ("a.pdf", pdf, "application/pdf"))] * 2
+    assert TestClient(app).post("/documents", files=files).status_code == 400
@@ -0,0 +1,71 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+import httpx
+import numpy as np
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from src.rag import ingest, pdf_extract
+from src.rag.indexer import insert_batch
+from src.rag.ingest import VECTORS_MIME, decode_vectors
+
+
+def test_decode_vectors_binary_and_json_agree():
+    vecs = np.arange(6, dtype="<f4").reshape(2, 3) / 7
+    binary = httpx.Response(200, content=vecs.tobytes(),
+                            headers={"content-type": VECTORS_MIME, "x-vector-shape": "2,3", "x-vector-dtype": "<f4"})
+    as_json = httpx.Response(200, json={"vector": vecs.tolist()})
+
+    out = decode_vectors(binary)
+    assert out.shape == (2, 3) and out.dtype == np.float32
+    assert np.array_equal(out, decode_vectors(as_json))
+    assert decode_vectors(httpx.Response(200, json={"vector": []})).shape == (0, 0)
+
+
+def test_insert_batch_hands_weaviate_float_lists():
+    class Col:
+        def __init__(self):
+            self.data = self
+
+        def insert_many(self, objs):
+            self.objs = objs
+            return type("Res", (), {"errors": {}})()
+
+    col = Col()
+    ok, errors = insert_batch(col, [{"chunk": "a"}, {"chunk": "b"}], np.ones((2, 3), dtype=np.float32))
+    assert (ok, errors) == (2, [])
+    assert all(isinstance(o.vector, list) and isinstance(o.vector[0], float) for o in col.objs)
+
+
+def _pdf(n_pages: int) -> bytes:
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=letter)
+    for i in range(n_pages):
+        c.drawString(72, 700, f"Page {i + 1} of the motor manual.")
+        c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def test_parallel_extraction_streams_pages_in_order(monkeypatch):
+    monkeypatch.setattr(ingest, "PDF_EXTRACT_MIN_PAGES", 4)
+    monkeypatch.setattr(ingest, "PDF_EXTRACT_PAGES_PER_TASK", 3)
+    data = _pdf(10)
+    sent = []
+    submit = ProcessPoolExecutor.submit
+    monkeypatch.setattr(ProcessPoolExecutor, "submit",
+                        lambda self, fn, *args: sent.append(args) or submit(self, fn, *args))
+    try:
+        parallel = list(ingest.iter_pdf_pages(BytesIO(data), workers=2))
+        pool = pdf_extract.get_pool(2)
+        assert pdf_extract.get_pool(3) is not pool  # resized, not silently reused
+    finally:
+        pdf_extract.shutdown_pool()
+    assert parallel == list(ingest.iter_pdf_pages(BytesIO(data), workers=1))
+    assert [p["page"] for p in parallel] == list(range(1, 11))
+    assert "Page 7 of the motor manual." in parallel[6]["text"]
+    # tasks carry the spooled file's path, not the document, and the spool is removed afterwards
+    assert len(sent) == 4 and {type(args[1]) for args in sent} == {str}
+    assert not os.path.exists(sent[0][1])
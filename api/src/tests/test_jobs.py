@@ -0,0 +1,71 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.rag import jobs
+from src.rag.jobs import IngestJobs, JobQueueFull
+
+
+def _wait(job, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while job.status in ("queued", "running") and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return job.to_dict()
+
+
+def test_job_endpoint_returns_202_and_reports_progress(monkeypatch, tmp_path, fake_weaviate, make_pdf):
+    monkeypatch.setattr("src.rag.ingest.embed_texts", lambda texts: [[0.0] * 384 for _ in texts])
+    fake_collection = fake_weaviate()
+    monkeypatch.setattr(jobs, "_jobs", IngestJobs(workers=1, max_queued=2, spool_dir=str(tmp_path)))
+
+    client = TestClient(app)
+    files = [("files", (f"doc{i}.pdf", make_pdf(f"Document {i} about flux capacitors."), "application/pdf"))
+             for i in range(2)]
+    r = client.post("/documents/jobs", files=files)
+    assert r.status_code == 202
+    body = r.json()
+    assert body["files"] == 2 and body["status_url"] == f"/documents/jobs/{body['job_id']}"
+
+    status = _wait(jobs.get_jobs().get(body["job_id"]))
+    assert status == client.get(body["status_url"]).json()
+    assert status["status"] == "done" and status["errors"] == []
+    assert status["pages"] == 2
+    assert status["chunks_embedded"] == status["chunks_inserted"] == len(fake_collection._items) > 0
+    assert [f["status"] for f in status["files"]] == ["done", "done"]
+    assert status["chunks_per_s"] > 0
+    assert not os.path.exists(tmp_path / body["job_id"])  # spooled uploads are removed
+    assert client.get("/documents/jobs").json()["jobs"][0]["job_id"] == body["job_id"]
+    assert client.get("/documents/jobs/nope").status_code == 404
+
+
+def test_job_queue_is_bounded_and_file_errors_are_reported(tmp_path):
+    pool = IngestJobs(workers=1, max_queued=0, spool_dir=str(tmp_path))
+    release = threading.Event()
+
+    def index_file(path, filename, progress, doc_key):
+        release.wait(5)
+        if filename == "bad.pdf":
+            raise ValueError("not a PDF")
+        progress(pages=1, embedded=3, inserted=3)
+        return {"pages": 1, "chunks": 3, "inserted": 3, "errors": []}
+
+    job = pool.create()
+    job.add_file(io.BytesIO(b"%PDF-1.4 ok"), "good.pdf")
+    job.add_file(io.BytesIO(b"garbage"), "bad.pdf")
+    pool.submit(job, index_file)
+    with pytest.raises(JobQueueFull):
+        pool.create()
+    release.set()
+    status = _wait(job)
+    pool.shutdown()
+
+    assert status["status"] == "done"
+    assert status["chunks_inserted"] == 3
+    assert [f["status"] for f in status["files"]] == ["done", "failed"]
+    assert status["errors"] == [{"file": "bad.pdf", "error": "ValueError: not a PDF"}]
+    assert pool.create() is not None  # the finished job freed its slot
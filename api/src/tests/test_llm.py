@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.rag import connections, llm
+from stub_llm import StubLLM
+
+
+def _point_at(monkeypatch, stub):
+    monkeypatch.setattr(llm, "OPENAI_API_BASE", stub.base_url)
+    monkeypatch.setattr(llm, "OPENAI_API_KEY", "test")
+    monkeypatch.setattr(llm, "LLM_BACKOFF_BASE_S", 0.01)
+    monkeypatch.setattr(llm, "stats", llm.LLMStats())
+    connections.close_manager()  # drop any "llm" client pointing at another base URL
+
+
+def test_achat_retries_429_and_5xx_and_records_usage(monkeypatch):
+    with StubLLM(statuses=[503, 429], retry_after=0) as stub:
+        _point_at(monkeypatch, stub)
+        answer = asyncio.run(llm.achat("q", "prompt"))
+    assert answer == stub.answer
+    assert len(stub.requests) == 3
+    counters = llm.stats.snapshot()
+    assert (counters["calls"], counters["attempts"], counters["retries"]) == (1, 3, 2)
+    assert counters["prompt_tokens"] == 12 and counters["completion_tokens"] == len(stub.tokens())
+
+
+def test_achat_does_not_retry_client_errors(monkeypatch):
+    with StubLLM(statuses=[400]) as stub:
+        _point_at(monkeypatch, stub)
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(llm.achat("q", "prompt"))
+    assert len(stub.requests) == 1
+
+
+def test_deadline_caps_slow_calls_and_backoff(monkeypatch):
+    with StubLLM(delays=[2.0]) as stub:
+        _point_at(monkeypatch, stub)
+        t0 = time.perf_counter()
+        with pytest.raises(llm.LLMDeadlineExceeded):
+            asyncio.run(llm.achat("q", "prompt", deadline=time.monotonic() + 0.2))
+        assert time.perf_counter() - t0 < 1.0
+    # a Retry-After longer than the time left fails right away instead of sleeping
+    with StubLLM(statuses=[503], retry_after=3) as stub:
+        _point_at(monkeypatch, stub)
+        t0 = time.perf_counter()
+        with pytest.raises(llm.LLMDeadlineExceeded):
+            asyncio.run(llm.achat("q", "prompt", deadline=time.monotonic() + 1.0))
+        assert time.perf_counter() - t0 < 0.5 and len(stub.requests) == 1
+    assert llm.stats.snapshot()["deadline_exceeded"] == 1
+
+
+def test_hedged_request_answers_when_first_is_slow(monkeypatch):
+    with StubLLM(delays=[2.0]) as stub:
+        _point_at(monkeypatch, stub)
+        monkeypatch.setattr(llm, "LLM_HEDGE", True)
+        monkeypatch.setattr(llm, "LLM_HEDGE_MIN_SAMPLES", 1)
+        llm.stats.latency(0.05)  # recent p95: hedge after 50 ms
+        t0 = time.perf_counter()
+        answer = asyncio.run(llm.achat("q", "prompt"))
+        elapsed = time.perf_counter() - t0
+    assert answer == stub.answer and elapsed < 1.0
+    assert len(stub.requests) == 2
+    counters = llm.stats.snapshot()
+    assert counters["hedges"] == 1 and counters["hedge_wins"] == 1
+
+
+def test_cancelled_caller_cancels_the_first_attempt(monkeypatch):
+    started, cancelled = asyncio.Event(), []
+
+    async def slow_post(headers, payload, deadline):
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    monkeypatch.setattr(llm, "_apost", slow_post)
+    monkeypatch.setattr(llm, "hedge_delay", lambda: 5.0)
+
+    async def run():
+        call = asyncio.ensure_future(llm._ahedged({}, {}, None))
+        await started.wait()
+        call.cancel()  # still inside the hedge-delay wait
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert cancelled == [True]  # before asyncio.run() would sweep up leftover tasks
+
+    asyncio.run(run())
+
+
+def test_stream_retries_before_first_token(monkeypatch):
+    async def collect():
+        return [d async for d in llm.astream_chat("q", "prompt")]
+
+    with StubLLM(statuses=[502]) as stub:
+        _point_at(monkeypatch, stub)
+        assert "".join(asyncio.run(collect())) == stub.answer
+    assert len(stub.requests) == 2 and llm.stats.snapshot()["retries"] == 1
+
+
+def test_question_deadline_returns_504(monkeypatch, fake_weaviate):
+    fake_weaviate()
+    with StubLLM(delays=[2.0]) as stub:
+        _point_at(monkeypatch, stub)
+        with TestClient(app) as client:
+            r = client.post("/question", json={"question": "slow?", "mode": "no_rag", "deadline_ms": 200})
+            stats = client.get("/stats").json()
+    assert r.status_code == 504 and r.json()["error"] == "LLM deadline exceeded"
+    assert stats["llm"]["deadline_exceeded"] == 1
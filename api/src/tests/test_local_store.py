@@ -0,0 +1,105 @@
+import math
+from collections import Counter
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.rag import connections, retrievers, weav_client
+from src.rag.answer_cache import answers
+from src.rag.local_store import BM25Index, LocalStore, tokenize
+
+DOCS = ["the motor power is 5 kW", "torque and power ratings", "bearing maintenance",
+        "motor motor motor", "installation of the cooling fan", "power supply voltage"]
+
+
+def _brute_bm25(query, docs, k1=1.2, b=0.75):
+    toks = [tokenize(d) for d in docs]
+    n, avgdl = len(toks), sum(map(len, toks)) / len(toks)
+    out = []
+    for t in toks:
+        tf, score = Counter(t), 0.0
+        for term in set(tokenize(query)):
+            df = sum(term in x for x in toks)
+            if df:
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                score += idf * tf[term] * (k1 + 1) / (tf[term] + k1 * (1 - b + b * len(t) / avgdl))
+        out.append(score)
+    return np.array(out)
+
+
+def test_bm25_index_matches_formula_across_incremental_adds():
+    index = BM25Index()
+    for d in DOCS[:3]:
+        index.add(d)
+    index.scores("motor")  # compile, then add more on top of the CSR arrays
+    for d in DOCS[3:]:
+        index.add(d)
+    np.testing.assert_allclose(index.scores("Motor power?"), _brute_bm25("Motor power?", DOCS), rtol=1e-5)
+
+
+def test_store_persists_and_searches(tmp_path):
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(len(DOCS), 8)).astype(np.float32)
+    store = LocalStore(str(tmp_path / "C"), text_properties=("chunk",))
+    store.insert_many([(None, {"chunk": d}, v) for d, v in zip(DOCS[:4], vecs[:4])])
+    store.save()
+    store.insert_many([(None, {"chunk": d}, v) for d, v in zip(DOCS[4:], vecs[4:])])
+
+    reopened = LocalStore(str(tmp_path / "C"), text_properties=("chunk",))
+    assert reopened.uuids == store.uuids and reopened.bm25.n_docs == len(DOCS)
+    rows, dist = reopened.search_vector(vecs[4], 2)
+    assert rows[0] == 4 and abs(dist[0]) < 1e-6
+    rows, scores = reopened.search_bm25("motor", 5)
+    assert rows.tolist() == [3, 0] and scores[0] > scores[1]
+    rows, _ = reopened.search_hybrid("motor", vecs[4], 3, alpha=0.5)
+    assert {3, 4} <= set(rows.tolist())
+
+
+def test_api_runs_on_local_backend(monkeypatch, tmp_path, make_pdf):
+    async def aembed(texts):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+    monkeypatch.setattr(weav_client, "RETRIEVER_BACKEND", "local")
+    monkeypatch.setattr(weav_client, "LOCAL_INDEX_PATH", str(tmp_path))
+    monkeypatch.setattr("src.rag.ingest.embed_texts", lambda texts: np.ones((len(texts), 4), dtype=np.float32))
+    monkeypatch.setattr(retrievers, "aembed_texts", aembed)
+    retrievers.query_vectors.clear()
+    retrievers.leg_results.clear()
+    answers.bump_corpus_version()
+    connections.close_manager()  # drop pooled clients created for other backends
+
+    pdf = make_pdf("The flux capacitor enables time travel in this test document.")
+    with TestClient(app) as client:
+        up = client.post("/documents", files={"files": ("flux.pdf", pdf, "application/pdf")})
+        bm25 = client.post("/retrieve", json={"question": "flux capacitor", "mode": "bm25", "top_k": 3})
+        semantic = client.post("/retrieve", json={"question": "anything", "mode": "semantic", "top_k": 3})
+
+    assert up.status_code == 200 and up.json()["inserted_chunks"] == 1
+    assert bm25.json()["contexts"][0]["title"] == "flux.pdf" and bm25.json()["contexts"][0]["score"] > 0
+    assert semantic.json()["contexts"][0]["distance"] < 1e-6
+    assert (tmp_path / "DocChunk" / "bm25.npz").exists()  # saved when the app closed its clients
+
+
+def test_store_upserts_and_deletes_rows(tmp_path):
+    from weaviate.classes.query import Filter
+    from src.rag.local_store import LocalCollection
+
+    vecs = np.eye(4, dtype=np.float32)
+    store = LocalStore(str(tmp_path / "C"), text_properties=("chunk",))
+    ids = store.insert_many([(None, {"chunk": d, "doc_id": "a" if i < 2 else "b"}, vecs[i])
+                             for i, d in enumerate(DOCS[:4])])
+    store.insert_many([(ids[0], {"chunk": "the motor power is 7 kW", "doc_id": "a"}, vecs[0])])
+    col = LocalCollection(store)
+    res = col.data.delete_many(where=Filter.by_property("doc_id").equal("a") & Filter.by_id().contains_any(ids[1:]))
+    assert (res.matches, res.successful) == (1, 1)
+
+    reopened = LocalStore(str(tmp_path / "C"), text_properties=("chunk",))
+    assert len(reopened) == 3 and sorted(reopened.dead) == [0, 1]
+    rows, _ = reopened.search_vector(vecs[1], 4)
+    assert 1 not in rows.tolist() and len(rows) == 3
+    rows, _ = reopened.search_bm25("motor power", 5)
+    assert [reopened.uuids[r] for r in rows][0] == ids[0] and 0 not in rows.tolist()
+    fetched = LocalCollection(reopened).query.fetch_objects(filters=Filter.by_property("doc_id").equal("a"),
+                                                            return_properties=["chunk"])
+    assert [(o.uuid, o.properties) for o in fetched.objects] == [(ids[0], {"chunk": "the motor power is 7 kW"})]
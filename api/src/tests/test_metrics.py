@@ -0,0 +1,80 @@
+import contextvars
+import threading
+import time
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.rag import metrics
+from src.rag.answer_cache import answers
+
+
+def test_nested_stages_record_self_time():
+    timer = metrics.start_timer()
+    with metrics.stage("outer"):
+        time.sleep(0.02)
+        with metrics.stage("inner"):
+            time.sleep(0.03)
+    t = timer.snapshot()
+    assert t["inner"] >= 30
+    assert 20 <= t["outer"] < 30 + 15
+
+
+def test_timed_iter_and_threads_report_to_the_request_timer():
+    timer = metrics.start_timer()
+
+    def pages():
+        for i in range(3):
+            time.sleep(0.01)
+            yield i
+
+    def work():
+        assert list(metrics.timed_iter(pages(), "extract")) == [0, 1, 2]
+
+    t = threading.Thread(target=contextvars.copy_context().run, args=(work,))
+    t.start()
+    t.join()
+    assert timer.snapshot()["extract"] >= 30
+    assert "extract;dur=" in timer.server_timing()
+
+
+def test_histogram_renders_prometheus_text():
+    h = metrics.Histogram("x_seconds", "help text", ["stage"], buckets=(0.1, 1.0))
+    h.observe(0.05, stage="a")
+    h.observe(2.0, stage="a")
+    lines = h.render()
+    assert 'x_seconds_bucket{stage="a",le="0.1"} 1' in lines
+    assert 'x_seconds_bucket{stage="a",le="+Inf"} 2' in lines
+    assert 'x_seconds_count{stage="a"} 2' in lines
+
+
+class BM25Collection:
+    def __init__(self):
+        self.query = self
+
+    async def bm25(self, query, limit, return_metadata=None):
+        return SimpleNamespace(objects=[SimpleNamespace(properties={"title": "t", "page": 1, "chunk": "c"})])
+
+
+def test_question_reports_stage_timings(monkeypatch, fake_weaviate):
+    async def fake_achat(q, p):
+        return "ok"
+
+    fake_weaviate(BM25Collection())
+    monkeypatch.setattr("src.main.achat", fake_achat)
+    answers.bump_corpus_version()
+
+    client = TestClient(app)
+    r = client.post("/question", json={"question": "timings?", "mode": "bm25", "include_timings": True})
+    assert r.status_code == 200
+    assert set(r.json()["timings"]) == {"retrieve", "leg_bm25", "prompt", "llm"}
+    assert "retrieve;dur=" in r.headers["server-timing"]
+
+    # a cache hit carries only its own (empty) timings, not the first request's
+    again = client.post("/question", json={"question": "timings?", "mode": "bm25", "include_timings": True})
+    assert again.json()["timings"] == {}
+
+    text = client.get("/metrics").text
+    assert 'rag_stage_duration_seconds_count{stage="llm"}' in text
+    assert 'rag_http_request_duration_seconds_count{method="POST",path="/question",status="200"}' in text
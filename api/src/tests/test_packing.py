@@ -0,0 +1,72 @@
+from src.rag.packing import overlap_chars, pack_contexts
+from src.rag.prompts import build_packed_prompt
+
+
+def _count(text):
+    return len(text.split())
+
+
+def _ctx(doc, page, idx, text, **extra):
+    return {"doc_id": doc, "title": f"{doc}.pdf", "page": page, "chunk_index": idx, "chunk": text,
+            "num_tokens": _count(text), **extra}
+
+
+A = "the rated power of the motor is five kilowatts at full load"
+B = "of the motor is five kilowatts at full load and the torque is twenty newton metres"
+C = "bearings must be greased every six months of continuous service"
+
+
+def test_overlap_chars_finds_longest_suffix_prefix():
+    assert A[-overlap_chars(A, B):] == "of the motor is five kilowatts at full load"
+    assert overlap_chars(A, C) == 0
+    assert overlap_chars("abc", "abc") == 0  # under the minimum, treated as coincidence
+
+
+def test_adjacent_chunks_merge_without_repeated_overlap():
+    contexts = [_ctx("d1", 3, 1, B, score=0.9), _ctx("d2", 1, 0, C, score=0.8), _ctx("d1", 3, 0, A, score=0.5)]
+    packed, stats = pack_contexts(contexts, count=_count)
+    assert [b["doc_id"] for b in packed] == ["d1", "d2"]  # merged block keeps its best chunk's rank
+    assert packed[0]["chunk"] == A + B[len("of the motor is five kilowatts at full load"):]
+    assert packed[0]["chunks"] == 2 and packed[0]["chunk_index"] == 0 and packed[0]["score"] == 0.9
+    assert stats["chunks_before"] == 3 and stats["blocks_after"] == 2
+    assert stats["context_tokens_after"] < stats["context_tokens_before"]
+
+
+def test_budget_keeps_best_blocks_and_truncates_only_the_first():
+    contexts = [_ctx("d1", 1, 0, A), _ctx("d2", 1, 0, C), _ctx("d3", 2, 0, "short note here")]
+    packed, stats = pack_contexts(contexts, budget_tokens=_count(A) + 3, count=_count)
+    assert [b["doc_id"] for b in packed] == ["d1", "d3"]
+    assert stats["chunks_dropped"] == 1 and stats["context_tokens_after"] <= _count(A) + 3
+
+    packed, _ = pack_contexts(contexts[:1], budget_tokens=4, count=_count)
+    assert len(packed) == 1 and len(packed[0]["chunk"]) < len(A)
+
+
+def test_packed_prompt_reports_token_counts():
+    prompt, packed, stats = build_packed_prompt("power?", [_ctx("d1", 3, 0, A), _ctx("d1", 3, 1, B)], budget_tokens=0)
+    assert prompt.count("[1]") == 1 and "[2]" not in prompt and len(packed) == 1
+    assert stats["prompt_tokens_after"] < stats["prompt_tokens_before"]
+
+
+def test_question_references_follow_the_packed_prompt(monkeypatch):
+    import asyncio
+    from src import main
+    from src.rag.types import QuestionRequest
+
+    contexts = [_ctx("d1", 3, 1, B, score=0.9), _ctx("d2", 1, 0, C, score=0.8), _ctx("d1", 3, 0, A, score=0.5)]
+
+    async def retrieve(col, body):
+        return contexts
+
+    prompts = []
+
+    async def chat(question, prompt):
+        prompts.append(prompt)
+        return "Five kilowatts [1]; grease [2]."
+
+    monkeypatch.setattr(main, "_retrieve", retrieve)
+    monkeypatch.setattr(main, "CONTEXT_PACKING", True)
+    res = asyncio.run(main._answer_on(None, QuestionRequest(question="power?", mode="bm25"), chat=chat))
+    assert res.references == ["d1.pdf (p.3)", "d2.pdf (p.1)"]
+    assert "[2] Title: d2.pdf (p.1)" in prompts[0] and "[3]" not in prompts[0]
+    assert res.contexts[0].chunk.startswith(A)
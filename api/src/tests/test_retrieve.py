@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+
+class ScoredCollection:
+    """bm25-only fake that records the requested metadata and returns scored chunks."""
+
+    def __init__(self):
+        self.query = self
+        self.return_metadata = None
+
+    async def bm25(self, query, limit, return_metadata=None):
+        self.return_metadata = return_metadata
+        objs = [SimpleNamespace(properties={"title": "manual.pdf", "page": i + 1, "chunk": f"chunk {i}"},
+                                metadata=SimpleNamespace(score=2.0 - i, distance=None))
+                for i in range(limit)]
+        return SimpleNamespace(objects=objs)
+
+
+def test_retrieve_returns_scored_contexts_without_llm(monkeypatch, fake_weaviate):
+    async def no_llm(q, p):
+        raise AssertionError("/retrieve must not call the LLM")
+
+    col = ScoredCollection()
+    fake_weaviate(col)
+    monkeypatch.setattr("src.main.achat", no_llm)
+
+    with TestClient(app) as client:
+        r = client.post("/retrieve", json={"question": "what?", "mode": "bm25", "top_k": 2})
+        bad = client.post("/retrieve", json={"question": "what?", "mode": "no_rag"})
+
+    assert r.status_code == 200
+    data = r.json()
+    assert data["mode"] == "bm25"
+    assert [(c["page"], c["score"]) for c in data["contexts"]] == [(1, 2.0), (2, 1.0)]
+    assert col.return_metadata.score
+    assert "retrieve" in data["timings"] and data["retrieval_ms"] >= 0
+    assert "retrieve;dur=" in r.headers["server-timing"]
+    assert bad.status_code == 400
@@ -0,0 +1,170 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.rag import fusion, retrievers
+
+
+def _obj(uuid, score=None, distance=None):
+    return SimpleNamespace(uuid=uuid, properties={"chunk": uuid},
+                           metadata=SimpleNamespace(score=score, distance=distance))
+
+
+def test_relative_score_fusion_weights_legs():
+    bm25 = SimpleNamespace(objects=[_obj("a", score=3.0), _obj("b", score=1.0)])
+    vec = SimpleNamespace(objects=[_obj("b", distance=0.1), _obj("c", distance=0.5)])
+    fused = fusion.relative_score_fusion(bm25, vec, alpha=0.6, limit=3)
+    assert [o.uuid for o in fused.objects] == ["b", "a", "c"]
+    assert retrievers.to_scored_props(fused)[0]["chunk"] == "b"
+
+
+class AsyncFakeCollection:
+    def __init__(self):
+        self.bm25_started = asyncio.Event()
+        self.query = self
+
+    async def bm25(self, query, limit, return_metadata=None):
+        self.bm25_started.set()
+        return SimpleNamespace(objects=[_obj("a", score=1.0)])
+
+    async def near_vector(self, near_vector, limit, return_metadata=None):
+        return SimpleNamespace(objects=[_obj("b", distance=0.2)])
+
+
+def test_ahybrid_starts_bm25_before_embedding_finishes(monkeypatch):
+    async def run():
+        col = AsyncFakeCollection()
+
+        async def embed(texts):
+            # only completes if the BM25 leg is already in flight
+            await col.bm25_started.wait()
+            return [[0.0, 1.0]]
+
+        monkeypatch.setattr(retrievers, "aembed_texts", embed)
+        retrievers.query_vectors.clear()
+        retrievers.leg_results.clear()
+        res = await asyncio.wait_for(retrievers.ahybrid(col, "q", top_k=2, alpha=0.5), timeout=2)
+        return {o.uuid for o in res.objects}
+
+    assert asyncio.run(run()) == {"a", "b"}
+
+
+def test_concurrent_query_embeds_are_coalesced(monkeypatch):
+    calls = []
+
+    async def embed(texts):
+        calls.append(texts)
+        await asyncio.sleep(0.05)
+        return [[1.0, 0.0]]
+
+    async def run():
+        monkeypatch.setattr(retrievers, "aembed_texts", embed)
+        retrievers.query_vectors.clear()
+        retrievers.leg_results.clear()
+        vecs = await asyncio.gather(*(retrievers._aembed_query(q) for q in ["What is X?", "what  is x?", "WHAT IS X?"]))
+        again = await retrievers._aembed_query("what is x?")
+        return vecs, again
+
+    vecs, again = asyncio.run(run())
+    assert len(calls) == 1
+    assert vecs == [[1.0, 0.0]] * 3 and again == [1.0, 0.0]
+
+
+class CandidateCollection:
+    """near_vector-only fake returning `limit` candidates c0, c1, ... in retrieval order."""
+
+    def __init__(self):
+        self.query = self
+        self.limits = []
+
+    async def near_vector(self, near_vector, limit, return_metadata=None):
+        self.limits.append(limit)
+        return SimpleNamespace(objects=[_obj(f"c{i}", distance=i / 10) for i in range(limit)])
+
+
+def _local_rerank(monkeypatch, rerank, **kwargs):
+    async def embed(texts):
+        return [[1.0, 0.0]]
+
+    monkeypatch.setattr(retrievers, "aembed_texts", embed)
+    monkeypatch.setattr(retrievers, "arerank", rerank)
+    retrievers.query_vectors.clear()
+    retrievers.leg_results.clear()
+    col = CandidateCollection()
+    res = asyncio.run(retrievers.alocal_rerank(col, "q", top_k=2, alpha=0.5, rerank_property="chunk",
+                                               factor=3, leg="semantic", **kwargs))
+    return col, [o.uuid for o in res.objects]
+
+
+def test_local_rerank_overfetches_and_reorders(monkeypatch):
+    sent = []
+
+    async def rerank(query, docs, top_n):
+        sent.append((docs, top_n))
+        return [{"index": 4, "score": 0.9}, {"index": 1, "score": 0.5}]
+
+    col, uuids = _local_rerank(monkeypatch, rerank)
+    assert col.limits == [6]
+    assert sent == [([f"c{i}" for i in range(6)], 2)]
+    assert uuids == ["c4", "c1"]
+
+
+def test_local_rerank_falls_back_when_over_budget(monkeypatch):
+    async def slow_rerank(query, docs, top_n):
+        await asyncio.sleep(1)
+        return [{"index": 5, "score": 1.0}]
+
+    _, uuids = _local_rerank(monkeypatch, slow_rerank, budget_ms=20)
+    assert uuids == ["c0", "c1"]
+
+
+def test_to_scored_props_exposes_metadata():
+    res = SimpleNamespace(objects=[_obj("a", score=0.7), SimpleNamespace(properties={"chunk": "b"})])
+    assert retrievers.to_scored_props(res) == [
+        {"chunk": "a", "score": 0.7, "distance": None, "rerank_score": None},
+        {"chunk": "b", "score": None, "distance": None, "rerank_score": None},
+    ]
+
+
+def test_rrf_fusion_uses_ranks_and_leaves_inputs_untouched():
+    bm25 = SimpleNamespace(objects=[_obj("a", score=30.0), _obj("b", score=1.0)])
+    vec = SimpleNamespace(objects=[_obj("b", distance=0.1), _obj("c", distance=0.9)])
+    fused = retrievers.hybrid_fusion(bm25, vec, alpha=0.5, limit=3, method="rrf", rrf_k=60)
+    assert [o.uuid for o in fused.objects] == ["b", "a", "c"]
+    assert abs(fused.objects[0].metadata.score - (0.5 / 62 + 0.5 / 61)) < 1e-12
+    assert fused.objects[0].metadata.distance == 0.1
+    assert bm25.objects[1].metadata.score == 1.0 and vec.objects[0].metadata.score is None
+
+
+class CountingCollection(AsyncFakeCollection):
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    async def bm25(self, query, limit, return_metadata=None):
+        self.calls.append(("bm25", limit))
+        return await super().bm25(query, limit)
+
+    async def near_vector(self, near_vector, limit, return_metadata=None):
+        self.calls.append(("vector", limit))
+        return await super().near_vector(near_vector, limit)
+
+
+def test_hybrid_reuses_legs_fetched_by_other_modes(monkeypatch):
+    async def embed(texts):
+        return [[1.0, 0.0]]
+
+    async def run():
+        col = CountingCollection()
+        col.bm25_started.set()
+        await retrievers.abm25(col, "q", 4)
+        await retrievers.asemantic(col, "q", 4)
+        res = await retrievers.ahybrid(col, "q", 4, alpha=0.5, fusion="rrf")
+        await retrievers.ahybrid(col, "q", 2, alpha=0.5, bm25_depth=4, vector_depth=8)
+        return col.calls, {o.uuid for o in res.objects}
+
+    monkeypatch.setattr(retrievers, "aembed_texts", embed)
+    retrievers.query_vectors.clear()
+    retrievers.leg_results.clear()
+    calls, uuids = asyncio.run(run())
+    assert calls == [("bm25", 4), ("vector", 4), ("vector", 8)]
+    assert uuids == {"a", "b"}
@@ -0,0 +1,49 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.rag import connections, llm
+from src.rag.answer_cache import answers
+from stub_llm import StubLLM
+
+
+class BM25Collection:
+    def __init__(self):
+        self.query = self
+
+    async def bm25(self, query, limit, return_metadata=None):
+        props = {"title": "manual.pdf", "page": 2, "chunk": "The flux capacitor enables time travel."}
+        return SimpleNamespace(objects=[SimpleNamespace(properties=props)])
+
+
+def _events(resp):
+    return [json.loads(line) for line in resp.iter_lines() if line]
+
+
+def test_question_stream_sends_references_then_tokens(monkeypatch, fake_weaviate):
+    fake_weaviate(BM25Collection())
+    answers.bump_corpus_version()
+
+    with StubLLM(token_delay_s=0.01) as stub:
+        monkeypatch.setattr(llm, "OPENAI_API_BASE", stub.base_url)
+        monkeypatch.setattr(llm, "OPENAI_API_KEY", "test")
+        connections.close_manager()  # drop any "llm" client pointing at another base URL
+        payload = {"question": "What enables time travel?", "mode": "bm25", "top_k": 3}
+        with TestClient(app) as client:
+            with client.stream("POST", "/question/stream", json=payload) as r:
+                assert r.status_code == 200
+                assert r.headers["content-type"].startswith("application/x-ndjson")
+                events = _events(r)
+            with client.stream("POST", "/question/stream", json=payload) as r:
+                again = _events(r)
+
+    assert [e["type"] for e in events] == ["references"] + ["token"] * len(stub.tokens()) + ["done"]
+    assert events[0]["references"] == ["manual.pdf (p.2)"]
+    assert "".join(e["text"] for e in events if e["type"] == "token") == stub.answer
+    done = events[-1]
+    assert done["cached"] is False and 0 < done["ttft_ms"] <= done["total_ms"]
+    assert len(stub.requests) == 1 and stub.requests[0]["stream"] is True
+    # the finished answer is cached for both /question and /question/stream
+    assert again[-1]["cached"] is True and again[1]["text"] == stub.answer
@@ -1,26 +1,151 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g
 import json
 import os
-from FlagEmbedding import FlagModel, FlagReranker
+import threading
+import time
 import numpy as np
+from backends import configure_threads, load_backend
+from batching import Histogram, MicroBatcher
+from score_cache import ScoreCache
 
 # Read model names from env to match notebook settings
 EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
 RERANK_MODEL_NAME = os.getenv("RERANK_MODEL", "BAAI/bge-reranker-base")
 
-# Init models (FlagEmbedding downloads to default cache)
-emb_model = FlagModel(EMBEDDING_MODEL_NAME, use_fp16=True)
-reranker = FlagReranker(RERANK_MODEL_NAME, use_fp16=True)
+# Backend per model: flag (FlagEmbedding fp32), flag-fp16, torch, torch-int8, onnx, onnx-int8
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "flag")
+RERANK_BACKEND = os.getenv("RERANK_BACKEND", "flag")
+EMBED_MAX_LENGTH = int(os.getenv("EMBED_MAX_LENGTH", "512"))
+# query + document tokens; longer pairs are truncated (most passages fit well under 512)
+RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "512"))
+MODEL_BATCH_SIZE = int(os.getenv("MODEL_BATCH_SIZE", "32"))
+# 0 keeps the torch / ONNX Runtime defaults (all cores)
+INFER_THREADS = int(os.getenv("INFER_THREADS", "0"))
+INFER_INTEROP_THREADS = int(os.getenv("INFER_INTEROP_THREADS", "0"))
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "onnx")
+
+configure_threads(INFER_THREADS, INFER_INTEROP_THREADS)
+_threads = {"intra_op": INFER_THREADS, "inter_op": INFER_INTEROP_THREADS, "cache_dir": ONNX_CACHE_DIR}
+
+# Init models (Hugging Face downloads to the default cache)
+emb_model = load_backend(EMBEDDING_MODEL_NAME, "embed", EMBEDDING_BACKEND, max_length=EMBED_MAX_LENGTH,
+                         batch_size=MODEL_BATCH_SIZE, **_threads)
+reranker = load_backend(RERANK_MODEL_NAME, "rerank", RERANK_BACKEND, max_length=RERANK_MAX_LENGTH,
+                        batch_size=MODEL_BATCH_SIZE, **_threads)
+
+# (query, sha1(document)) -> score; 0 disables
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "20000"))
+rerank_cache = ScoreCache(RERANK_CACHE_SIZE)
+
+# Dynamic micro-batching: concurrent requests are coalesced into one model call
+BATCHING_ENABLED = os.getenv("BATCHING_ENABLED", "true").lower() == "true"
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+def _embed(texts):
+    # backends return raw CLS vectors; normalize here so every backend serves unit vectors
+    vecs = emb_model.run(texts)
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
+    return vecs / norms
+
+def _score(pairs):
+    # the backend sorts pairs by length before batching, so short pairs are not padded to long ones
+    return reranker.run(pairs)
+
+if BATCHING_ENABLED:
+    _embed_batcher = MicroBatcher(_embed, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="vectors")
+    _rerank_batcher = MicroBatcher(_score, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, name="rerank")
+
+def _timed(fn, items):
+    t0 = time.perf_counter()
+    out = fn(items)
+    g.timings["model"] = g.timings.get("model", 0.0) + (time.perf_counter() - t0) * 1000.0
+    return out
+
+# per-request stage times (queue wait, model) go to g.timings -> Server-Timing header
+def embed(texts):
+    if BATCHING_ENABLED:
+        return np.asarray(_embed_batcher.submit(texts, g.timings), dtype=np.float32)
+    return _timed(_embed, texts)
+
+def score(pairs):
+    if BATCHING_ENABLED:
+        return _rerank_batcher.submit(pairs, g.timings)
+    return _timed(_score, pairs)
+
+# /vectors negotiates its response body: JSON (default, for Weaviate's text2vec module and
+# older clients) or raw little-endian float32 rows with the shape in X-Vector-Shape
+JSON_MIME = "application/json"
+VECTORS_MIME = "application/octet-stream"
+
+def vectors_response(vecs):
+    if request.accept_mimetypes.best_match([JSON_MIME, VECTORS_MIME]) == VECTORS_MIME:
+        arr = np.ascontiguousarray(vecs, dtype="<f4")
+        rows, dim = arr.shape if arr.ndim == 2 else (0, 0)
+        return Response(arr.tobytes(), mimetype=VECTORS_MIME,
+                        headers={"X-Vector-Shape": f"{rows},{dim}", "X-Vector-Dtype": "<f4"})
+    return jsonify({"vector": vecs.tolist()})
 
 app = Flask(__name__)
 
+REQUEST_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+_request_ms = {}  # (endpoint, status) -> Histogram
+_request_ms_lock = threading.Lock()
+
+@app.before_request
+def start_timing():
+    g.t0 = time.perf_counter()
+    g.timings = {}
+
+@app.after_request
+def finish_timing(resp):
+    total_ms = (time.perf_counter() - g.t0) * 1000.0
+    key = (request.url_rule.rule if request.url_rule else "unmatched", resp.status_code)
+    with _request_ms_lock:
+        hist = _request_ms.setdefault(key, Histogram(REQUEST_MS_BUCKETS))
+    hist.observe(total_ms)
+    stages = [f"{k};dur={v:.2f}" for k, v in g.timings.items()] + [f"total;dur={total_ms:.2f}"]
+    resp.headers["Server-Timing"] = ", ".join(stages)
+    return resp
+
 @app.get("/.well-known/ready")
 def ready():
     return "Ready", 200
 
 @app.get("/meta")
 def meta():
-    return jsonify({"status": "Ready", "embedding_model": EMBEDDING_MODEL_NAME, "reranker": RERANK_MODEL_NAME}), 200
+    return jsonify({"status": "Ready", "embedding_model": EMBEDDING_MODEL_NAME, "reranker": RERANK_MODEL_NAME,
+                    "backends": {"embedding": emb_model.describe(), "reranker": reranker.describe()},
+                    "threads": {"intra_op": INFER_THREADS, "inter_op": INFER_INTEROP_THREADS}}), 200
+
+@app.get("/stats")
+def stats():
+    if not BATCHING_ENABLED:
+        return jsonify({"batching": False, "rerank_cache": rerank_cache.stats()}), 200
+    return jsonify({"batching": True, "vectors": _embed_batcher.stats(), "rerank": _rerank_batcher.stats(),
+                    "rerank_cache": rerank_cache.stats()}), 200
+
+@app.get("/metrics")
+def metrics():
+    lines = ["# HELP inference_request_duration_ms HTTP request latency in milliseconds.",
+             "# TYPE inference_request_duration_ms histogram"]
+    with _request_ms_lock:
+        series = sorted(_request_ms.items())
+    for (path, status), hist in series:
+        lines += hist.render("inference_request_duration_ms", f'path="{path}",status="{status}"')
+    if BATCHING_ENABLED:
+        for name, help in (("inference_batch_size", "Inputs per model batch."),
+                           ("inference_queue_depth", "Queued inputs when a batch is cut."),
+                           ("inference_queue_wait_ms", "Time a request waits for its batch."),
+                           ("inference_batch_model_ms", "Model time per batch.")):
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+            for b in (_embed_batcher, _rerank_batcher):
+                lines += [l for l in b.render() if l.startswith(name + "_")]
+    cache = rerank_cache.stats()
+    lines += ["# TYPE inference_rerank_cache_hits_total counter", f"inference_rerank_cache_hits_total {cache['hits']}",
+              "# TYPE inference_rerank_cache_misses_total counter", f"inference_rerank_cache_misses_total {cache['misses']}",
+              "# TYPE inference_rerank_cache_entries gauge", f"inference_rerank_cache_entries {cache['size']}"]
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
 
 @app.post("/vectors")
 def vectors():
@@ -35,12 +160,8 @@ def vectors():
         if isinstance(texts, str):
             texts = [texts]
 
-        # FlagEmbedding's encode does not accept normalize_embeddings. Normalize manually.
-        vecs = emb_model.encode(texts, batch_size=32)
-        vecs = np.asarray(vecs, dtype=np.float32)
-        norms = np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12
-        vecs = vecs / norms
-        return jsonify({"vector": vecs.tolist()})
+        vecs = embed(texts)
+        return vectors_response(vecs)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -54,17 +175,24 @@ def rerank_route():
             return jsonify({"error": "Expected {'query': str, 'documents': [str,...]}"}), 400
         query = payload["query"]
         docs = payload["documents"] or []
+        top_n = payload.get("top_n")
+        if top_n is not None and (not isinstance(top_n, int) or top_n < 1):
+            return jsonify({"error": "'top_n' must be a positive integer"}), 400
         if not docs:
-            return jsonify({"scores": []}), 200
+            return jsonify({"results": []} if top_n else {"scores": []}), 200
 
-        pairs = [(query, d) for d in docs]
-        scores = reranker.compute_score(pairs)
+        scores = rerank_cache.scores(query, docs, score)
+        if top_n:
+            # compact form: best `top_n` documents as indices into `documents`, highest score first
+            best = np.argsort(-scores, kind="stable")[:top_n]
+            return jsonify({"results": [{"index": int(i), "score": float(scores[i])} for i in best]})
+        # default form (Weaviate's reranker-transformers module): every document echoed with its score
         out = [{"document": docs[i], "score": float(scores[i])} for i in range(len(docs))]
         return jsonify({"scores": out})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5001)
+    app.run(host="0.0.0.0", port=5001, threaded=True)
 
 
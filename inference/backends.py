@@ -0,0 +1,202 @@
+"""CPU model backends for the embedding and rerank endpoints.
+
+Every backend runs one Hugging Face model for one task and returns float32 numpy:
+
+* ``embed``  -- (n, dim) CLS vectors (not normalized; app.py normalizes)
+* ``rerank`` -- (n,) relevance logits for (query, document) pairs
+
+Backends:
+
+* ``flag``       -- FlagEmbedding FlagModel/FlagReranker in fp32 (``flag-fp16`` keeps the old GPU setting)
+* ``torch``      -- plain transformers model in fp32
+* ``torch-int8`` -- the same with ``torch.quantization.quantize_dynamic`` (int8 Linear layers)
+* ``onnx``       -- ONNX Runtime session over a model exported once into ``cache_dir``
+* ``onnx-int8``  -- the exported model with ONNX Runtime dynamic int8 weight quantization
+
+Heavy imports (torch, transformers, onnxruntime) happen inside the loaders so the
+service only needs the libraries of the backends it actually uses.
+"""
+import os
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+BACKENDS = ("flag", "flag-fp16", "torch", "torch-int8", "onnx", "onnx-int8")
+TASKS = ("embed", "rerank")
+
+
+def configure_threads(intra_op: int = 0, inter_op: int = 0) -> None:
+    """Set torch's thread pools (0 keeps the library default). ONNX sessions take the same values."""
+    try:
+        import torch
+    except ImportError:
+        return
+    if intra_op > 0:
+        torch.set_num_threads(intra_op)
+    if inter_op > 0:
+        try:
+            torch.set_num_interop_threads(inter_op)
+        except RuntimeError:
+            pass  # can only be set once, before any inter-op work has started
+
+
+class Backend:
+    name = ""
+
+    def __init__(self, model_name: str, task: str, max_length: int = 512, batch_size: int = 32):
+        if task not in TASKS:
+            raise ValueError(f"unknown task {task!r}")
+        self.model_name = model_name
+        self.task = task
+        self.max_length = max_length
+        self.batch_size = max(1, batch_size)
+
+    def _length(self, item: Any) -> int:
+        return len(item) if self.task == "embed" else len(item[0]) + len(item[1])
+
+    def run(self, inputs: Sequence[Any]) -> np.ndarray:
+        """Run `inputs` in length-sorted batches (similar lengths pad less) and return them in input order."""
+        if not inputs:
+            return np.empty((0, 0) if self.task == "embed" else (0,), dtype=np.float32)
+        order = sorted(range(len(inputs)), key=lambda i: self._length(inputs[i]))
+        parts = [self._run_batch([inputs[i] for i in order[j:j + self.batch_size]])
+                 for j in range(0, len(order), self.batch_size)]
+        ordered = np.concatenate(parts).astype(np.float32, copy=False)
+        out = np.empty_like(ordered)
+        out[order] = ordered
+        return out
+
+    def _run_batch(self, batch: List[Any]) -> np.ndarray:
+        raise NotImplementedError
+
+    def describe(self) -> dict:
+        return {"model": self.model_name, "backend": self.name, "max_length": self.max_length}
+
+
+class FlagBackend(Backend):
+    name = "flag"
+
+    def __init__(self, model_name: str, task: str, fp16: bool = False, **kwargs):
+        super().__init__(model_name, task, **kwargs)
+        from FlagEmbedding import FlagModel, FlagReranker
+        if fp16:
+            self.name = "flag-fp16"
+        if task == "embed":
+            self.model = FlagModel(model_name, use_fp16=fp16)
+        else:
+            self.model = FlagReranker(model_name, use_fp16=fp16)
+
+    def _run_batch(self, batch):
+        if self.task == "embed":
+            vecs = self.model.encode(batch, batch_size=self.batch_size, max_length=self.max_length)
+            return np.asarray(vecs, dtype=np.float32).reshape(len(batch), -1)
+        # compute_score returns a bare float for a single pair
+        scores = self.model.compute_score(batch, batch_size=self.batch_size, max_length=self.max_length)
+        return np.atleast_1d(np.asarray(scores, dtype=np.float32))
+
+
+def _tokenize(tokenizer, batch, task: str, max_length: int, tensors: str):
+    if task == "embed":
+        return tokenizer(batch, padding=True, truncation=True, max_length=max_length, return_tensors=tensors)
+    queries, docs = [q for q, _ in batch], [d for _, d in batch]
+    return tokenizer(queries, docs, padding=True, truncation=True, max_length=max_length, return_tensors=tensors)
+
+
+def _load_torch_model(model_name: str, task: str):
+    from transformers import AutoModel, AutoModelForSequenceClassification
+    cls = AutoModel if task == "embed" else AutoModelForSequenceClassification
+    return cls.from_pretrained(model_name).eval()
+
+
+class TorchBackend(Backend):
+    name = "torch"
+
+    def __init__(self, model_name: str, task: str, quantize: bool = False, **kwargs):
+        super().__init__(model_name, task, **kwargs)
+        import torch
+        from transformers import AutoTokenizer
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = _load_torch_model(model_name, task)
+        if quantize:
+            self.name = "torch-int8"
+            self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def _run_batch(self, batch):
+        enc = _tokenize(self.tokenizer, batch, self.task, self.max_length, "pt")
+        with self.torch.inference_mode():
+            out = self.model(**enc)
+        if self.task == "embed":
+            return out.last_hidden_state[:, 0].float().numpy()
+        return out.logits.reshape(-1).float().numpy()
+
+
+def export_onnx(model_name: str, task: str, cache_dir: str, quantize: bool = False) -> str:
+    """Export `model_name` to ONNX under `cache_dir` (once) and return the model path."""
+    import torch
+    from transformers import AutoTokenizer
+
+    out_dir = os.path.join(cache_dir, task, model_name.replace("/", "__"))
+    path = os.path.join(out_dir, "model.onnx")
+    if not os.path.exists(path):
+        os.makedirs(out_dir, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = _load_torch_model(model_name, task)
+        sample = ["hello world"] if task == "embed" else [("hello", "world")]
+        dummy = _tokenize(tokenizer, sample, task, 16, "pt")
+        # positional order of BERT/XLM-R forward(): input_ids, attention_mask, token_type_ids
+        names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in dummy]
+        axes = {n: {0: "batch", 1: "seq"} for n in names}
+        axes["output"] = {0: "batch", 1: "seq"} if task == "embed" else {0: "batch"}
+        with torch.inference_mode():
+            torch.onnx.export(model, tuple(dummy[n] for n in names), path, input_names=names,
+                              output_names=["output"], dynamic_axes=axes, opset_version=14)
+    if not quantize:
+        return path
+    qpath = os.path.join(out_dir, "model.int8.onnx")
+    if not os.path.exists(qpath):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(path, qpath, weight_type=QuantType.QInt8)
+    return qpath
+
+
+class OnnxBackend(Backend):
+    name = "onnx"
+
+    def __init__(self, model_name: str, task: str, quantize: bool = False, cache_dir: str = "onnx",
+                 intra_op: int = 0, inter_op: int = 0, **kwargs):
+        super().__init__(model_name, task, **kwargs)
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        if quantize:
+            self.name = "onnx-int8"
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.path = export_onnx(model_name, task, cache_dir, quantize=quantize)
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op > 0:
+            opts.intra_op_num_threads = intra_op
+        if inter_op > 0:
+            opts.inter_op_num_threads = inter_op
+        self.session = ort.InferenceSession(self.path, opts, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def _run_batch(self, batch):
+        enc = _tokenize(self.tokenizer, batch, self.task, self.max_length, "np")
+        (out,) = self.session.run(["output"], {n: enc[n].astype(np.int64) for n in self.input_names})
+        if self.task == "embed":
+            return out[:, 0]
+        return out.reshape(-1)
+
+
+def load_backend(model_name: str, task: str, backend: str = "flag", max_length: int = 512, batch_size: int = 32,
+                 intra_op: int = 0, inter_op: int = 0, cache_dir: Optional[str] = None) -> Backend:
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}; expected one of {', '.join(BACKENDS)}")
+    common = {"max_length": max_length, "batch_size": batch_size}
+    if backend.startswith("flag"):
+        return FlagBackend(model_name, task, fp16=backend == "flag-fp16", **common)
+    if backend.startswith("torch"):
+        return TorchBackend(model_name, task, quantize=backend == "torch-int8", **common)
+    return OnnxBackend(model_name, task, quantize=backend == "onnx-int8", cache_dir=cache_dir or "onnx",
+                       intra_op=intra_op, inter_op=inter_op, **common)
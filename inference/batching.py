@@ -0,0 +1,165 @@
+"""Request-coalescing scheduler for the model endpoints.
+
+Flask serves each HTTP request on its own thread. Instead of every thread running
+the model on its own (tiny) input, threads hand their inputs to a MicroBatcher,
+whose worker thread gathers everything that arrives within ``max_wait_ms`` (or
+until ``max_batch`` inputs are queued), runs the model once, and hands each
+request back its slice of the output.
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+DEFAULT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus style: counts of observations <= each bound)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            cumulative, running = {}, 0
+            for bound, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+                running += n
+                cumulative[str(bound)] = running
+            return {"buckets": cumulative, "sum": self.sum, "count": self.count}
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        """Prometheus text-format sample lines; `labels` is e.g. 'batcher="vectors"'."""
+        snap = self.snapshot()
+        sep = "," if labels else ""
+        lines = [f'{name}_bucket{{{labels}{sep}le="{le}"}} {n}' for le, n in snap["buckets"].items()]
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {snap['sum']}")
+        lines.append(f"{name}_count{suffix} {snap['count']}")
+        return lines
+
+
+class _Request:
+    __slots__ = ("items", "future", "enqueued", "wait_ms", "model_ms")
+
+    def __init__(self, items: List[Any]):
+        self.items = items
+        self.future: Future = Future()
+        self.enqueued = time.perf_counter()
+        self.wait_ms = 0.0
+        self.model_ms = 0.0
+
+
+class MicroBatcher:
+    def __init__(self, fn: Callable[[List[Any]], Sequence[Any]], max_batch: int, max_wait_ms: float, name: str = ""):
+        self.fn = fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: "deque[_Request]" = deque()
+        self._queued_items = 0
+        self._cond = threading.Condition()
+        self.batch_size = Histogram()
+        self.queue_depth = Histogram()
+        self.wait_ms = Histogram((0.5, 1, 2, 5, 10, 25, 50, 100, 250))
+        self.model_ms = Histogram((5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000))
+        self.batches = 0
+        self.requests = 0
+        self._worker = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._worker.start()
+
+    def submit(self, items: List[Any], timings: Optional[Dict[str, float]] = None) -> List[Any]:
+        """Run `items` through the model as part of a shared batch; blocks until done.
+
+        If `timings` is given, this request's queue wait and model time (ms) are added to it.
+        """
+        if not items:
+            return []
+        req = _Request(list(items))
+        with self._cond:
+            self._queue.append(req)
+            self._queued_items += len(req.items)
+            self.requests += 1
+            self._cond.notify()
+        result = req.future.result()
+        if timings is not None:
+            timings["queue"] = timings.get("queue", 0.0) + req.wait_ms
+            timings["model"] = timings.get("model", 0.0) + req.model_ms
+        return result
+
+    def _take_batch(self) -> List[_Request]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0].enqueued + self.max_wait_s
+            while self._queued_items < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            self.queue_depth.observe(self._queued_items)
+            batch, n = [], 0
+            # always take at least one request, even if it alone exceeds max_batch
+            while self._queue and (not batch or n + len(self._queue[0].items) <= self.max_batch):
+                req = self._queue.popleft()
+                batch.append(req)
+                n += len(req.items)
+            self._queued_items -= n
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            flat = [x for req in batch for x in req.items]
+            now = time.perf_counter()
+            for req in batch:
+                req.wait_ms = (now - req.enqueued) * 1000.0
+                self.wait_ms.observe(req.wait_ms)
+            self.batch_size.observe(len(flat))
+            self.batches += 1
+            try:
+                out = self.fn(flat)
+            except BaseException as e:
+                for req in batch:
+                    req.future.set_exception(e)
+                continue
+            model_ms = (time.perf_counter() - now) * 1000.0
+            self.model_ms.observe(model_ms)
+            pos = 0
+            for req in batch:
+                req.model_ms = model_ms
+                req.future.set_result(out[pos:pos + len(req.items)])
+                pos += len(req.items)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "queue_depth_now": self._queued_items,
+            "requests": self.requests,
+            "batches": self.batches,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_depth": self.queue_depth.snapshot(),
+            "wait_ms": self.wait_ms.snapshot(),
+            "model_ms": self.model_ms.snapshot(),
+        }
+
+    def render(self) -> List[str]:
+        """This batcher's histograms as Prometheus sample lines (HELP/TYPE come from the caller)."""
+        labels = f'batcher="{self.name}"'
+        return (self.batch_size.render("inference_batch_size", labels)
+                + self.queue_depth.render("inference_queue_depth", labels)
+                + self.wait_ms.render("inference_queue_wait_ms", labels)
+                + self.model_ms.render("inference_batch_model_ms", labels))
@@ -0,0 +1,71 @@
+"""LRU cache of reranker scores keyed on (query, sha1 of the document).
+
+Weaviate's reranker module re-sends the same candidates for repeated and
+paginated queries; only pairs not seen before reach the model.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+def doc_hash(doc: str) -> str:
+    return hashlib.sha1(doc.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def scores(self, query: str, docs: Sequence[str],
+               score: Callable[[List[Tuple[str, str]]], Sequence[float]]) -> np.ndarray:
+        """Scores for every (query, doc); only uncached, deduplicated documents are passed to `score`."""
+        keys = [(query, doc_hash(d)) for d in docs]
+        found: Dict[Tuple[str, str], float] = {}
+        with self._lock:
+            for k in keys:
+                if k in self._data:
+                    self._data.move_to_end(k)
+                    found[k] = self._data[k]
+            hits = sum(1 for k in keys if k in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        missing: Dict[Tuple[str, str], str] = {}
+        for k, d in zip(keys, docs):
+            if k not in found and k not in missing:
+                missing[k] = d
+        if missing:
+            fresh = score([(query, d) for d in missing.values()])
+            new = {k: float(s) for k, s in zip(missing, fresh)}
+            found.update(new)
+            self._put(new)
+        return np.array([found[k] for k in keys], dtype=np.float32)
+
+    def _put(self, entries: Dict[Tuple[str, str], float]) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for k, s in entries.items():
+                self._data[k] = s
+                self._data.move_to_end(k)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
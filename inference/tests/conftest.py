@@ -0,0 +1,36 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+# the service's modules are flat files next to app.py (COPY *.py /app/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backends  # noqa: E402
+from fake_backend import FakeBackend  # noqa: E402
+
+
+@pytest.fixture
+def load_app(monkeypatch):
+    """Import a fresh app.py with `env` set and FakeBackend models; returns the module.
+
+    The module records each load_backend call as `loaded`: [(model, task, backend), ...].
+    """
+    pytest.importorskip("flask")
+
+    def load(**env):
+        for k, v in env.items():
+            monkeypatch.setenv(k, v)
+        loaded = []
+
+        def fake_load(model_name, task, backend="flag", **kwargs):
+            loaded.append((model_name, task, backend))
+            return FakeBackend(model_name, task, **kwargs)
+
+        monkeypatch.setattr(backends, "load_backend", fake_load)
+        monkeypatch.delitem(sys.modules, "app", raising=False)
+        app = importlib.import_module("app")
+        app.loaded = loaded
+        return app
+    return load
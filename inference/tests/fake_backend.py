@@ -0,0 +1,21 @@
+"""Model-free Backend for the service tests."""
+import numpy as np
+
+import backends
+
+
+class FakeBackend(backends.Backend):
+    """No model: an embedding is [len(text), 1], a rerank score is len(document)."""
+
+    name = "fake"
+
+    def __init__(self, model_name, task, **kwargs):
+        kwargs = {k: v for k, v in kwargs.items() if k in ("max_length", "batch_size")}
+        super().__init__(model_name, task, **kwargs)
+        self.batches = []
+
+    def _run_batch(self, batch):
+        self.batches.append(list(batch))
+        if self.task == "embed":
+            return np.array([[len(t), 1.0] for t in batch], dtype=np.float64)
+        return np.array([len(d) for _, d in batch], dtype=np.float64)
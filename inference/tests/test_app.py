@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def test_rerank_top_n_returns_compact_results(load_app):
+    client = load_app().app.test_client()
+    docs = ["bb", "dddd", "a", "ccc"]
+    r = client.post("/rerank", json={"query": "q", "documents": docs, "top_n": 2})
+    assert r.status_code == 200
+    assert r.get_json() == {"results": [{"index": 1, "score": 4.0}, {"index": 3, "score": 3.0}]}
+
+
+def test_rerank_without_top_n_echoes_every_document(load_app):
+    client = load_app().app.test_client()
+    docs = ["bb", "dddd", "a"]
+    r = client.post("/rerank", json={"query": "q", "documents": docs})
+    assert r.status_code == 200
+    assert r.get_json() == {"scores": [{"document": "bb", "score": 2.0}, {"document": "dddd", "score": 4.0},
+                                       {"document": "a", "score": 1.0}]}
+    assert client.post("/rerank", json={"query": "q", "documents": []}).get_json() == {"scores": []}
+    assert client.post("/rerank", json={"query": "q", "documents": docs, "top_n": 0}).status_code == 400
+
+
+def test_rerank_serves_repeated_documents_from_the_cache(load_app):
+    app = load_app()
+    client = app.app.test_client()
+    client.post("/rerank", json={"query": "q", "documents": ["bb", "a"]})
+    r = client.post("/rerank", json={"query": "q", "documents": ["ccc", "a", "bb"], "top_n": 3})
+    assert [x["index"] for x in r.get_json()["results"]] == [0, 2, 1]
+    assert [d for batch in app.reranker.batches for _, d in batch] == ["a", "bb", "ccc"]
+
+
+def test_backends_are_chosen_from_the_environment(load_app):
+    app = load_app(EMBEDDING_MODEL="emb-model", EMBEDDING_BACKEND="onnx-int8",
+                   RERANK_MODEL="rr-model", RERANK_BACKEND="torch")
+    assert app.loaded == [("emb-model", "embed", "onnx-int8"), ("rr-model", "rerank", "torch")]
+    meta = app.app.test_client().get("/meta").get_json()
+    assert meta["embedding_model"] == "emb-model" and meta["backends"]["embedding"]["model"] == "emb-model"
+
+
+def test_backends_default_to_flag(load_app, monkeypatch):
+    for name in ("EMBEDDING_BACKEND", "RERANK_BACKEND"):
+        monkeypatch.delenv(name, raising=False)
+    assert [backend for _, _, backend in load_app().loaded] == ["flag", "flag"]
+
+
+def test_vectors_are_unit_float32_rows(load_app):
+    client = load_app().app.test_client()
+    r = client.post("/vectors", json={"text": ["abc", "d"]}, headers={"Accept": "application/octet-stream"})
+    assert r.headers["X-Vector-Shape"] == "2,2" and r.headers["X-Vector-Dtype"] == "<f4"
+    rows = np.frombuffer(r.data, dtype="<f4").reshape(2, 2)
+    assert np.allclose(np.linalg.norm(rows, axis=1), 1.0)
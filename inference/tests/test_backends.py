@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import backends
+from fake_backend import FakeBackend
+
+
+def test_run_batches_by_length_and_keeps_input_order():
+    b = FakeBackend("m", "embed", batch_size=2)
+    texts = ["ccc", "a", "eeeee", "bb", "dddd"]
+    out = b.run(texts)
+    assert out[:, 0].tolist() == [3, 1, 5, 2, 4]
+    # similar lengths share a batch, so short inputs are not padded to long ones
+    assert b.batches == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+
+
+def test_run_returns_float32_of_the_task_shape():
+    embed = FakeBackend("m", "embed", batch_size=2).run(["a", "bb", "ccc"])
+    assert embed.shape == (3, 2) and embed.dtype == np.float32
+    scores = FakeBackend("m", "rerank", batch_size=2).run([("q", "a"), ("q", "bb"), ("q", "ccc")])
+    assert scores.shape == (3,) and scores.dtype == np.float32 and scores.tolist() == [1.0, 2.0, 3.0]
+    assert FakeBackend("m", "embed").run([]).shape == (0, 0)
+    assert FakeBackend("m", "rerank").run([]).shape == (0,)
+
+
+@pytest.mark.parametrize("name, cls, options", [
+    ("flag", "FlagBackend", {"fp16": False}),
+    ("flag-fp16", "FlagBackend", {"fp16": True}),
+    ("torch", "TorchBackend", {"quantize": False}),
+    ("torch-int8", "TorchBackend", {"quantize": True}),
+    ("onnx", "OnnxBackend", {"quantize": False, "cache_dir": "onnx"}),
+    ("onnx-int8", "OnnxBackend", {"quantize": True, "cache_dir": "onnx"}),
+])
+def test_load_backend_picks_the_class_and_options(monkeypatch, name, cls, options):
+    built = []
+    for c in ("FlagBackend", "TorchBackend", "OnnxBackend"):
+        monkeypatch.setattr(backends, c, lambda model, task, _c=c, **kw: built.append((_c, model, task, kw)))
+    backends.load_backend("m", "embed", name, max_length=128, batch_size=8)
+    (got, model, task, kw), = built
+    assert (got, model, task) == (cls, "m", "embed")
+    assert {k: kw[k] for k in options} == options and (kw["max_length"], kw["batch_size"]) == (128, 8)
+
+
+def test_load_backend_rejects_unknown_names():
+    with pytest.raises(ValueError, match="unknown backend"):
+        backends.load_backend("m", "embed", "tensorrt")
+    with pytest.raises(ValueError, match="unknown task"):
+        FakeBackend("m", "classify")
@@ -0,0 +1,84 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from batching import MicroBatcher
+
+
+class Recorder:
+    """Model stand-in: doubles its inputs and records each batch it was given."""
+
+    def __init__(self, release=None, fail=None):
+        self.batches = []
+        self.release = release
+        self.fail = fail
+
+    def __call__(self, items):
+        if self.release is not None:
+            self.release.wait(5)
+        self.batches.append(list(items))
+        if self.fail:
+            raise RuntimeError(self.fail)
+        return [x * 2 for x in items]
+
+
+def test_concurrent_callers_get_their_own_slices_in_order():
+    model = Recorder()
+    b = MicroBatcher(model, max_batch=64, max_wait_ms=50, name="t")
+    inputs = [list(range(i * 10, i * 10 + n)) for i, n in enumerate((3, 1, 5, 2, 4, 1, 3, 2))]
+    with ThreadPoolExecutor(len(inputs)) as pool:
+        outputs = list(pool.map(b.submit, inputs))
+    assert outputs == [[x * 2 for x in items] for items in inputs]
+    assert len(model.batches) < len(inputs)  # requests were coalesced
+    assert sorted(x for batch in model.batches for x in batch) == sorted(x for items in inputs for x in items)
+
+
+def test_oversize_request_is_taken_alone():
+    release = threading.Event()
+    model = Recorder(release)
+    b = MicroBatcher(model, max_batch=4, max_wait_ms=0, name="t")
+    with ThreadPoolExecutor(3) as pool:
+        blocker = pool.submit(b.submit, [0])
+        time.sleep(0.05)  # the worker now holds [0] until released
+        big = pool.submit(b.submit, list(range(1, 11)))
+        time.sleep(0.05)
+        small = pool.submit(b.submit, [11, 12])
+        time.sleep(0.05)
+        release.set()
+        assert blocker.result(5) == [0]
+        assert big.result(5) == [x * 2 for x in range(1, 11)]
+        assert small.result(5) == [22, 24]
+    # the 10-item request exceeds max_batch, so it ran on its own instead of waiting forever
+    assert model.batches == [[0], list(range(1, 11)), [11, 12]]
+
+
+def test_failed_batch_raises_in_every_waiting_caller():
+    release = threading.Event()
+    model = Recorder(release, fail="model crashed")
+    b = MicroBatcher(model, max_batch=64, max_wait_ms=200, name="t")
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(b.submit, [i]) for i in range(3)]
+        time.sleep(0.05)
+        release.set()
+        for f in futures:
+            with pytest.raises(RuntimeError, match="model crashed"):
+                f.result(5)
+    assert len(model.batches) == 1 and sorted(model.batches[0]) == [0, 1, 2]
+    # the worker survives a failed batch
+    model.fail = None
+    assert b.submit([7]) == [14]
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    model = Recorder()
+    b = MicroBatcher(model, max_batch=64, max_wait_ms=30, name="t")
+    timings = {}
+    t0 = time.perf_counter()
+    assert b.submit([1, 2], timings) == [2, 4]
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    assert 25 <= elapsed_ms < 1000
+    assert timings["queue"] >= 25 and "model" in timings
+    stats = b.stats()
+    assert (stats["requests"], stats["batches"]) == (1, 1)
@@ -0,0 +1,32 @@
+from score_cache import ScoreCache
+
+
+def test_hits_and_misses_merge_back_in_input_order():
+    cache = ScoreCache(maxsize=100)
+    calls = []
+
+    def score(pairs):
+        calls.append([d for _, d in pairs])
+        return [float(len(d)) for _, d in pairs]
+
+    assert cache.scores("q", ["bb", "a"], score).tolist() == [2.0, 1.0]
+    # "a" and "bb" are cached, "cccc" is new and only sent once
+    out = cache.scores("q", ["cccc", "a", "cccc", "bb"], score)
+    assert out.tolist() == [4.0, 1.0, 4.0, 2.0] and out.dtype == "float32"
+    assert calls == [["bb", "a"], ["cccc"]]
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 4)
+    # scores belong to the query: another query misses
+    cache.scores("other", ["a"], score)
+    assert calls[-1] == ["a"]
+
+
+def test_evicts_least_recently_used_pairs():
+    cache = ScoreCache(maxsize=2)
+    score = lambda pairs: [0.0] * len(pairs)
+    cache.scores("q", ["a", "b"], score)
+    cache.scores("q", ["a"], score)  # refreshes "a"
+    cache.scores("q", ["c"], score)  # evicts "b"
+    assert cache.stats()["evictions"] == 1
+    calls = []
+    cache.scores("q", ["a", "b"], lambda pairs: calls.append(pairs) or [0.0] * len(pairs))
+    assert calls == [[("q", "b")]]
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark the inference service's model backends: throughput and agreement with fp32.
+
+By default it builds a tiny random BERT embedder and cross-encoder (2 layers, 64 hidden)
+under --model-dir, so it runs offline and in seconds; pass --embed-model/--rerank-model
+to benchmark real models instead (e.g. BAAI/bge-small-en-v1.5, BAAI/bge-reranker-base).
+
+Agreement is measured against the first backend listed (default: torch fp32):
+cosine similarity of the normalized vectors, and max |score difference| plus rank
+correlation for the reranker.
+
+Usage:
+  python scripts/bench_backends.py
+  python scripts/bench_backends.py --backends torch,onnx,onnx-int8 --threads 4 --n 2048
+  python scripts/bench_backends.py --embed-model BAAI/bge-small-en-v1.5 --rerank-model BAAI/bge-reranker-base
+"""
+
+import argparse, os, random, sys, time
+
+sys.path.append(os.path.abspath("inference"))
+import numpy as np
+from backends import BACKENDS, configure_threads, load_backend
+
+WORDS = ("motor power rating torque voltage current phase frequency insulation "
+         "bearing shaft cooling enclosure efficiency installation maintenance").split()
+
+
+def make_tiny_models(root: str):
+    """Write a tiny random BERT embedder and cross-encoder (with a word-level vocab) under `root`."""
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertModel, BertTokenizerFast
+
+    paths = {task: os.path.join(root, task) for task in ("embed", "rerank")}
+    if all(os.path.exists(os.path.join(p, "config.json")) for p in paths.values()):
+        return paths
+    os.makedirs(root, exist_ok=True)
+    letters = "abcdefghijklmnopqrstuvwxyz0123456789"
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS + list(letters) + ["##" + c for c in letters]
+    vocab_file = os.path.join(root, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(vocab) + "\n")
+    tokenizer = BertTokenizerFast(vocab_file=vocab_file)
+    cfg = BertConfig(vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=4,
+                     intermediate_size=128, max_position_embeddings=512, num_labels=1)
+    torch.manual_seed(0)
+    for task, cls in (("embed", BertModel), ("rerank", BertForSequenceClassification)):
+        cls(cfg).eval().save_pretrained(paths[task])
+        tokenizer.save_pretrained(paths[task])
+    return paths
+
+
+def sentences(n: int, seed: int = 0):
+    rnd = random.Random(seed)
+    return [" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(8, 60))) for _ in range(n)]
+
+
+def ranks(x: np.ndarray) -> np.ndarray:
+    r = np.empty(len(x))
+    r[np.argsort(x)] = np.arange(len(x))
+    return r
+
+
+def timed(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", default="torch,torch-int8,onnx,onnx-int8,flag",
+                    help=f"comma-separated, first one is the reference; choices: {', '.join(BACKENDS)}")
+    ap.add_argument("--model-dir", default="data/tiny_models")
+    ap.add_argument("--embed-model", help="embedding model name or path (default: tiny local model)")
+    ap.add_argument("--rerank-model", help="reranker model name or path (default: tiny local model)")
+    ap.add_argument("--n", type=int, default=512, help="texts (and query/document pairs) per run")
+    ap.add_argument("--batch-size", type=int, default=32)
+    ap.add_argument("--max-length", type=int, default=512)
+    ap.add_argument("--threads", type=int, default=0, help="intra-op threads (0 = library default)")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    tiny = None if (args.embed_model and args.rerank_model) else make_tiny_models(args.model_dir)
+    embed_model = args.embed_model or tiny["embed"]
+    rerank_model = args.rerank_model or tiny["rerank"]
+    configure_threads(args.threads)
+    texts = sentences(args.n)
+    pairs = [(texts[0], t) for t in texts]
+    opts = {"max_length": args.max_length, "batch_size": args.batch_size, "intra_op": args.threads,
+            "cache_dir": os.path.join(args.model_dir, "onnx")}
+    print(f"[info] embed={embed_model} rerank={rerank_model} n={args.n} threads={args.threads or 'default'}")
+    print(f"{'backend':<11} {'embed/s':>9} {'cos mean':>9} {'cos min':>9} {'pairs/s':>9} {'max |d|':>9} {'rank r':>7}")
+
+    ref_vecs = ref_scores = None
+    for name in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        try:
+            emb = load_backend(embed_model, "embed", name, **opts)
+            rr = load_backend(rerank_model, "rerank", name, **opts)
+        except ImportError as e:
+            print(f"{name:<11} skipped ({e})")
+            continue
+        emb.run(texts[:8]), rr.run(pairs[:8])  # warm up
+        es, vecs = timed(lambda: emb.run(texts), args.repeat)
+        rs, scores = timed(lambda: rr.run(pairs), args.repeat)
+        vecs = vecs / (np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-12)
+        if ref_vecs is None:
+            ref_vecs, ref_scores = vecs, scores
+        cos = np.sum(vecs * ref_vecs, axis=1)
+        rank_r = np.corrcoef(ranks(scores), ranks(ref_scores))[0, 1]
+        print(f"{name:<11} {args.n / es:9.1f} {cos.mean():9.5f} {cos.min():9.5f} {args.n / rs:9.1f} "
+              f"{np.abs(scores - ref_scores).max():9.5f} {rank_r:7.4f}")
+
+
+if __name__ == "__main__":
+    main()
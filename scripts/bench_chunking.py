@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy per-chunk chunking path vs the single-pass Chunker.
+
+The legacy path is the pre-Chunker `build_chunks`: `tiktoken.get_encoding` per call,
+one encode per page, then a second encode of every chunk (`tokenize_len`) and
+`now_iso()` per chunk.
+
+Usage:
+  python scripts/bench_chunking.py                       # synthetic 300-page document
+  python scripts/bench_chunking.py --pdf docs/produto_2.pdf --repeat 5
+"""
+
+import argparse, os, sys, time, random
+
+sys.path.append(os.path.abspath("api"))
+import tiktoken
+from src.rag.ingest import extract_pdf_text, iter_chunks
+from src.rag.utils import now_iso, sha1_bytes
+
+WORDS = ("motor power rating torque voltage current phase frequency insulation "
+         "bearing shaft cooling enclosure efficiency installation maintenance").split()
+
+
+def synthetic_pages(n_pages: int, words_per_page: int, seed: int = 0):
+    rnd = random.Random(seed)
+    pages = []
+    for i in range(n_pages):
+        sents = []
+        while sum(len(s.split()) for s in sents) < words_per_page:
+            sents.append(" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(6, 18))).capitalize() + ".")
+        pages.append({"page": i + 1, "text": " ".join(sents)})
+    return pages
+
+
+def legacy_build_chunks(doc_id, source, title, pages, max_tokens, overlap):
+    def tokenize_len(text):
+        enc = tiktoken.get_encoding("cl100k_base")
+        return len(enc.encode(text))
+
+    def chunk_text(text):
+        enc = tiktoken.get_encoding("cl100k_base")
+        toks = enc.encode(text)
+        chunks, i = [], 0
+        while i < len(toks):
+            chunks.append(enc.decode(toks[i:i + max_tokens]))
+            if i + max_tokens >= len(toks):
+                break
+            i += max_tokens - overlap
+        return chunks
+
+    items = []
+    for p in pages:
+        for j, seg in enumerate(chunk_text(p["text"]) if p["text"] else []):
+            items.append({
+                "doc_id": doc_id, "source": source, "title": title, "page": p["page"], "chunk_index": j,
+                "chunk": seg, "created_at": now_iso(), "mime": "application/pdf",
+                "hash": sha1_bytes(seg.encode("utf-8")), "num_tokens": tokenize_len(seg),
+            })
+    return items
+
+
+def bench(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdf", help="benchmark on the pages of this PDF instead of synthetic text")
+    ap.add_argument("--pages", type=int, default=300)
+    ap.add_argument("--words-per-page", type=int, default=600)
+    ap.add_argument("--max-tokens", type=int, default=int(os.getenv("CHUNK_TOKENS", "450")))
+    ap.add_argument("--overlap", type=int, default=int(os.getenv("CHUNK_OVERLAP", "60")))
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = extract_pdf_text(args.pdf) if args.pdf else synthetic_pages(args.pages, args.words_per_page)
+    chars = sum(len(p["text"]) for p in pages)
+    print(f"[info] pages={len(pages)} chars={chars} max_tokens={args.max_tokens} overlap={args.overlap}")
+    tiktoken.get_encoding("cl100k_base")  # load the BPE file outside the timed region
+
+    legacy_s, legacy = bench(lambda: legacy_build_chunks("d", "s", "t", pages, args.max_tokens, args.overlap), args.repeat)
+    print(f"{'legacy':<17} {legacy_s*1000:9.1f} ms  chunks={len(legacy)}")
+    results = {}
+    for mode in ("tokens", "sentences"):
+        s, items = bench(lambda: list(iter_chunks("d", "s", "t", pages, args.max_tokens, args.overlap, mode=mode)), args.repeat)
+        results[mode] = items
+        print(f"chunker/{mode:<9} {s*1000:9.1f} ms  chunks={len(items)}  speedup={legacy_s / s:5.2f}x")
+
+    same = [x["chunk"] for x in legacy] == [x["chunk"] for x in results["tokens"]]
+    print(f"[check] token-mode chunks identical to legacy: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Compare the retrieval backends (Weaviate vs the in-process local store) on the same corpus.
+
+The PDFs are indexed into a fresh local store with the API's own pipeline (index_pdf);
+Weaviate is expected to already hold the same PDFs (upload them through POST /documents),
+or pass --index-weaviate to index them into the DocChunk collection here. Query
+embeddings are computed once up front, so the timings cover retrieval only.
+
+For each backend and mode (bm25, semantic, hybrid) it reports p50/p95/mean latency of
+the async retrievers and, per mode, the overlap of the top-k hits between backends.
+
+Needs the inference service for embeddings (or scripts/stub_servers.py with INFER_BASE
+pointing at it) and, for the weaviate backend, a running Weaviate.
+
+Usage:
+  python scripts/bench_retriever_backends.py --pdfs docs/produto_2.pdf
+  python scripts/bench_retriever_backends.py --backends local --repeat 20 --top-k 10
+"""
+
+import argparse, asyncio, glob, os, sys, tempfile, time
+
+import numpy as np
+
+sys.path.append(os.path.abspath("api"))
+from src.rag import weav_client
+from src.rag.indexer import index_pdf
+from src.rag.retrievers import abm25, asemantic, ahybrid, _aembed_query
+
+MODES = ("bm25", "semantic", "hybrid")
+
+
+def load_queries(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def index_pdfs(col, pdfs):
+    chunks = 0
+    for path in pdfs:
+        with open(path, "rb") as f:
+            chunks += index_pdf(col, f, None, os.path.basename(path))["inserted"]
+    return chunks
+
+
+def count(col) -> int:
+    store = getattr(col, "store", None)
+    if store is not None:
+        return len(store)
+    return col.aggregate.over_all(total_count=True).total_count
+
+
+async def run_mode(col, mode: str, queries, args):
+    lat, hits = [], []
+    for q in queries:
+        for i in range(args.repeat):
+            t0 = time.perf_counter()
+            if mode == "bm25":
+                res = await abm25(col, q, args.top_k)
+            elif mode == "semantic":
+                res = await asemantic(col, q, args.top_k)
+            else:
+                res = await ahybrid(col, q, args.top_k, args.alpha)
+            lat.append((time.perf_counter() - t0) * 1000.0)
+        hits.append({(o.properties.get("title"), o.properties.get("page"), o.properties.get("chunk_index"))
+                     for o in res.objects or []})
+    return np.array(lat), hits
+
+
+async def bench_backend(backend: str, queries, args):
+    weav_client.RETRIEVER_BACKEND = backend
+    client = weav_client.get_async_client()
+    await client.connect()
+    try:
+        col = weav_client.get_collection(client)
+        for q in queries:  # warm the query-vector cache so only retrieval is timed
+            await _aembed_query(q)
+        out = {}
+        for mode in MODES:
+            await run_mode(col, mode, queries[:1], argparse.Namespace(**{**vars(args), "repeat": 1}))  # warm up
+            out[mode] = await run_mode(col, mode, queries, args)
+        return out
+    finally:
+        await client.close()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pdfs", nargs="+", default=sorted(glob.glob("docs/*.pdf")))
+    ap.add_argument("--queries", default="scripts/queries_sample.txt")
+    ap.add_argument("--backends", default="local,weaviate")
+    ap.add_argument("--index-path", help="local store directory (default: a fresh temp dir)")
+    ap.add_argument("--index-weaviate", action="store_true", help="also index the PDFs into Weaviate")
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--alpha", type=float, default=0.5)
+    ap.add_argument("--repeat", type=int, default=10, help="timed runs per query")
+    args = ap.parse_args()
+
+    queries = load_queries(args.queries)
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    weav_client.LOCAL_INDEX_PATH = args.index_path or tempfile.mkdtemp(prefix="local_index_")
+
+    for backend in backends:
+        if backend == "weaviate" and not args.index_weaviate:
+            continue
+        weav_client.RETRIEVER_BACKEND = backend
+        client = weav_client.get_client()
+        try:
+            weav_client.ensure_schema(client)
+            col = weav_client.get_collection(client)
+            if backend == "local" and count(col) and args.index_path:
+                print(f"[info] local: reusing {count(col)} objects in {args.index_path}")
+                continue
+            t0 = time.perf_counter()
+            n = index_pdfs(col, args.pdfs)
+            print(f"[info] {backend}: indexed {n} chunks from {len(args.pdfs)} PDFs in {time.perf_counter() - t0:.1f}s")
+        finally:
+            client.close()
+
+    for backend in backends:
+        weav_client.RETRIEVER_BACKEND = backend
+        client = weav_client.get_client()
+        try:
+            print(f"[info] {backend}: {count(weav_client.get_collection(client))} objects")
+        finally:
+            client.close()
+
+    async def bench_all():
+        # one event loop for every backend: the pooled inference client is bound to it
+        return {b: await bench_backend(b, queries, args) for b in backends}
+
+    results = asyncio.run(bench_all())
+
+    print(f"\n{'backend':<9} {'mode':<9} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+    for backend, modes in results.items():
+        for mode, (lat, _) in modes.items():
+            print(f"{backend:<9} {mode:<9} {np.percentile(lat, 50):8.2f} {np.percentile(lat, 95):8.2f} {lat.mean():8.2f}")
+    if len(results) == 2:
+        a, b = results.values()
+        print(f"\noverlap@{args.top_k} ({' vs '.join(results)}):")
+        for mode in MODES:
+            ov = [len(x & y) / max(len(x | y), 1) for x, y in zip(a[mode][1], b[mode][1])]
+            print(f"  {mode:<9} {np.mean(ov):.3f}")
+
+
+if __name__ == "__main__":
+    main()
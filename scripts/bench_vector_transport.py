@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: JSON vs binary float32 transport of /vectors responses.
+
+Offline mode (default) times the same encode/decode steps the inference service and
+the API perform on a random (n, dim) batch. With --url it also measures end-to-end
+POST /vectors round trips against a running inference service in both formats.
+
+Usage:
+  python scripts/bench_vector_transport.py                          # 1024 x 384, offline
+  python scripts/bench_vector_transport.py --n 4096 --dim 768
+  python scripts/bench_vector_transport.py --url http://localhost:5001 --n 256
+"""
+
+import argparse, json, os, sys, time
+
+sys.path.append(os.path.abspath("api"))
+import httpx
+import numpy as np
+from src.rag.ingest import VECTORS_MIME, decode_vectors
+
+
+def best_of(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def offline(n, dim, repeat):
+    vecs = np.random.default_rng(0).standard_normal((n, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+
+    enc_json, body_json = best_of(lambda: json.dumps({"vector": vecs.tolist()}).encode(), repeat)
+    enc_bin, body_bin = best_of(lambda: np.ascontiguousarray(vecs, dtype="<f4").tobytes(), repeat)
+    resp_json = httpx.Response(200, content=body_json, headers={"content-type": "application/json"})
+    resp_bin = httpx.Response(200, content=body_bin,
+                              headers={"content-type": VECTORS_MIME, "x-vector-shape": f"{n},{dim}"})
+    # the JSON path as it was: parse into Python float lists
+    dec_lists, _ = best_of(lambda: resp_json.json()["vector"], repeat)
+    dec_json, a = best_of(lambda: decode_vectors(resp_json), repeat)
+    dec_bin, b = best_of(lambda: decode_vectors(resp_bin), repeat)
+    assert np.array_equal(a, b)
+
+    print(f"[offline] n={n} dim={dim}")
+    print(f"{'format':<8} {'bytes':>12} {'encode ms':>10} {'decode ms':>10}")
+    print(f"{'json':<8} {len(body_json):>12} {enc_json*1000:>10.2f} {dec_json*1000:>10.2f}"
+          f"   (to lists: {dec_lists*1000:.2f} ms)")
+    print(f"{'binary':<8} {len(body_bin):>12} {enc_bin*1000:>10.2f} {dec_bin*1000:>10.3f}")
+    print(f"[ratio] bytes {len(body_json)/len(body_bin):.1f}x smaller, "
+          f"encode+decode {(enc_json+dec_json)/(enc_bin+dec_bin):.0f}x faster")
+
+
+def live(url, n, repeat):
+    texts = [f"benchmark sentence number {i} about motor efficiency and torque" for i in range(n)]
+    with httpx.Client(base_url=url, timeout=120) as client:
+        for label, accept in (("json", "application/json"), ("binary", f"{VECTORS_MIME}, application/json;q=0.5")):
+            def call():
+                r = client.post("/vectors", json={"text": texts}, headers={"Accept": accept})
+                r.raise_for_status()
+                return r
+            call()  # warm up the model and the connection
+            s, r = best_of(call, repeat)
+            t, vecs = best_of(lambda: decode_vectors(r), repeat)
+            print(f"[live] {label:<7} content-type={r.headers['content-type']:<26} bytes={len(r.content):>10} "
+                  f"round trip={s*1000:8.1f} ms  decode={t*1000:7.2f} ms  shape={vecs.shape}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1024, help="vectors per response")
+    ap.add_argument("--dim", type=int, default=384, help="dimension for the offline benchmark")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--url", help="inference service base URL for the live benchmark")
+    args = ap.parse_args()
+
+    offline(args.n, args.dim, args.repeat)
+    if args.url:
+        live(args.url, args.n, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,23 @@
 Standalone ingest debugger for PDF -> chunks -> embeddings -> Weaviate insert.
 
 Usage:
-  python scripts/index_debug.py --pdf docs/produto_2.pdf --limit 999
+  python scripts/index_debug.py --pdf docs/produto_2.pdf --limit 999 [--key produto_2.pdf]
+
+Chunks get the same ids the API gives them (doc key, default: the filename), so a debug run
+overwrites that document's chunks instead of adding a copy. They are left unstamped: the next
+upload of the file through the API completes and stamps the document.
 """
 
-import argparse, os, sys, time, uuid, traceback
+import argparse, os, sys, time, traceback
 import httpx
 from dotenv import load_dotenv
 
 # Local repo imports (reuse the same code paths the API uses)
 sys.path.append(os.path.abspath("api"))
 from src.rag.weav_client import get_client, ensure_schema, get_collection
-from src.rag.ingest import extract_pdf_text, build_chunks, embed_texts
-from src.rag.utils import now_iso
+from src.rag.ingest import extract_pdf_text, build_chunks
+from src.rag.indexer import chunk_uuid, doc_key, index_chunks
+from src.rag.utils import sha1_file
 
 
 def wait_ready(url: str, name: str, tries=60, sleep=2):
@@ -35,6 +40,7 @@ def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--pdf", required=True)
     ap.add_argument("--limit", type=int, default=999, help="limit chunks to insert")
+    ap.add_argument("--key", help="document key (default: the filename, as the API uses)")
     args = ap.parse_args()
 
     # 0) Sanity
@@ -66,38 +72,33 @@ def main():
     CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "450"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "60"))
     fname = os.path.basename(args.pdf)
-    doc_id = str(uuid.uuid4())
+    doc_id = doc_key(sha1_file(args.pdf), args.key or fname)
     items = build_chunks(doc_id, fname, fname, pages, CHUNK_TOKENS, CHUNK_OVERLAP)
     if not items:
         raise RuntimeError("No chunks produced from PDF.")
+    for it in items:
+        it["uuid"] = chunk_uuid(doc_id, it["page"], it["chunk_index"])
+    print(f"[info] doc_id={doc_id}")
     print(f"[info] chunks_built={len(items)} (first chunk chars={len(items[0]['chunk'])})")
 
-    # 5) Embed (via local-inference /vectors)
-    texts = [x["chunk"] for x in items[:args.limit]]
-    try:
-        vecs = embed_texts(texts)
-    except Exception:
-        print("[error] Embedding failed. Full traceback:")
-        traceback.print_exc()
-        print(f"[debug] Example payload text len={len(texts[0])} chars")
-        sys.exit(2)
-    print(f"[ok] embeddings_received={len(vecs)} dim={len(vecs[0]) if vecs else 'n/a'}")
-
-    # 6) Insert back into Weaviate
+    # 5) Embed (via local-inference /vectors) + insert into Weaviate in adaptive batches
     client = get_client()
     try:
         col = get_collection(client)
-        inserted = 0
-        for i, x in enumerate(items[:args.limit]):
-            try:
-                col.data.insert(properties=x, vector=vecs[i])
-                inserted += 1
-            except Exception:
-                print(f"[error] Insert failed at chunk {i} (page={x['page']}, idx={x['chunk_index']}). Traceback:")
-                traceback.print_exc()
-                print(f"[debug] chunk_chars={len(x['chunk'])}")
-                sys.exit(3)
-        print(f"[ok] inserted={inserted}/{min(args.limit,len(items))}")
+        try:
+            report = index_chunks(col, items[:args.limit])
+        except Exception:
+            print("[error] Embedding/insert failed. Full traceback:")
+            traceback.print_exc()
+            print(f"[debug] Example payload text len={len(items[0]['chunk'])} chars")
+            sys.exit(2)
+        print(f"[ok] inserted={report['inserted']}/{min(args.limit,len(items))} "
+              f"batches={report['batches']} final_batch_size={report['final_batch_size']} "
+              f"chunks_per_s={report['chunks_per_s']}")
+        for err in report["errors"][:10]:
+            print(f"[error] Insert failed at chunk {err['index']} (page={err['page']}, idx={err['chunk_index']}): {err['error']}")
+        if report["failed"]:
+            sys.exit(3)
     finally:
         client.close()
 
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Headless load generator for POST /question across retrieval modes and concurrency levels.
+
+For every (mode, concurrency) it runs up to three phases:
+
+  cold    -- POST /cache/clear, then every query once (answer and query-vector caches empty)
+  warmup  -- --warmup seconds of load, not reported
+  steady  -- --duration seconds of closed-loop load (each worker sends its next query as
+             soon as the previous one returns), queries cycling through the file
+
+and reports count, error rate, throughput and p50/p95/p99 latency, plus the median of
+each server-side stage from the Server-Timing header. Results go to stdout and,
+optionally, to JSON/CSV files that can be diffed between releases.
+
+Query file: one question per line (.txt) or JSON lines with {"question": ..., "mode"?: ...}.
+
+Usage:
+  python scripts/loadgen.py --queries scripts/queries_sample.txt
+  python scripts/loadgen.py --modes hybrid,local_rerank --concurrency 1,8,32 --duration 30 \\
+      --out-json bench.json --out-csv bench.csv
+  # fully offline: python scripts/stub_servers.py & (API pointed at the stubs, see that script)
+"""
+
+import argparse, asyncio, csv, json, os, sys, time, typing
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+sys.path.append(os.path.abspath("api"))
+from src.rag.types import RagMode
+
+ALL_MODES = list(typing.get_args(RagMode))
+
+
+def load_queries(path: str):
+    out = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            out.append(json.loads(line) if line.startswith("{") else {"question": line})
+    if not out:
+        raise SystemExit(f"no queries in {path}")
+    return out
+
+
+def parse_server_timing(header: str):
+    stages = {}
+    for part in header.split(","):
+        name, _, rest = part.strip().partition(";")
+        if rest.startswith("dur="):
+            stages[name] = float(rest[4:])
+    return stages
+
+
+def summarize(samples, elapsed_s: float):
+    lat = np.array([s["ms"] for s in samples if s["ok"]])
+    n, errors = len(samples), sum(1 for s in samples if not s["ok"])
+    row = {
+        "requests": n,
+        "errors": errors,
+        "error_rate": round(errors / n, 4) if n else None,
+        "throughput_rps": round((n - errors) / elapsed_s, 2) if elapsed_s > 0 else None,
+    }
+    for p in (50, 95, 99):
+        row[f"p{p}_ms"] = round(float(np.percentile(lat, p)), 1) if len(lat) else None
+    row["mean_ms"] = round(float(lat.mean()), 1) if len(lat) else None
+    stages = defaultdict(list)
+    for s in samples:
+        for k, v in s.get("stages", {}).items():
+            stages[k].append(v)
+    row["stage_p50_ms"] = {k: round(float(np.median(v)), 1) for k, v in sorted(stages.items())}
+    return row
+
+
+async def run_phase(client, mode: str, queries, concurrency: int, args, duration_s=None):
+    """Closed-loop load; one pass over `queries` when `duration_s` is None, else until the deadline."""
+    samples = []
+    it = iter(queries) if duration_s is None else None
+    deadline = time.perf_counter() + (duration_s or 0)
+    counter = 0
+
+    def next_query():
+        nonlocal counter
+        if duration_s is None:
+            return next(it, None)
+        if time.perf_counter() >= deadline:
+            return None
+        counter += 1
+        return queries[(counter - 1) % len(queries)]
+
+    async def worker():
+        while (q := next_query()) is not None:
+            payload = {"question": q["question"], "mode": q.get("mode", mode), "top_k": args.top_k,
+                       "alpha": args.alpha, "rerank_property": args.rerank_property}
+            t0 = time.perf_counter()
+            try:
+                r = await client.post("/question", json=payload, timeout=args.timeout)
+                ok = r.status_code == 200
+                stages = parse_server_timing(r.headers.get("server-timing", ""))
+            except httpx.HTTPError:
+                ok, stages = False, {}
+            samples.append({"ms": (time.perf_counter() - t0) * 1000.0, "ok": ok, "stages": stages})
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - t0
+
+
+async def run(args):
+    queries = load_queries(args.queries)
+    modes = [m.strip() for m in args.modes.split(",")] if args.modes else ALL_MODES
+    levels = [int(c) for c in args.concurrency.split(",")]
+    limits = httpx.Limits(max_connections=max(levels) * 2, max_keepalive_connections=max(levels) * 2)
+    rows = []
+    async with httpx.AsyncClient(base_url=args.api, limits=limits) as client:
+        (await client.get("/.well-known/ready", timeout=10)).raise_for_status()
+        for mode in modes:
+            for c in levels:
+                phases = []
+                if not args.no_cold:
+                    (await client.post("/cache/clear", timeout=10)).raise_for_status()
+                    phases.append(("cold", await run_phase(client, mode, queries, c, args)))
+                if args.warmup > 0:
+                    await run_phase(client, mode, queries, c, args, duration_s=args.warmup)
+                phases.append(("steady", await run_phase(client, mode, queries, c, args, duration_s=args.duration)))
+                for phase, (samples, elapsed) in phases:
+                    row = {"mode": mode, "concurrency": c, "phase": phase, **summarize(samples, elapsed)}
+                    rows.append(row)
+                    print(f"{mode:<16} c={c:<3} {phase:<6} n={row['requests']:<5} err={row['error_rate']} "
+                          f"rps={row['throughput_rps']} p50={row['p50_ms']} p95={row['p95_ms']} p99={row['p99_ms']} "
+                          f"stages={row['stage_p50_ms']}", flush=True)
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--api", default=os.getenv("API_BASE_URL", "http://localhost:8000"))
+    ap.add_argument("--queries", default="scripts/queries_sample.txt")
+    ap.add_argument("--modes", help=f"comma-separated (default: all of {', '.join(ALL_MODES)})")
+    ap.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    ap.add_argument("--duration", type=float, default=20, help="seconds of steady load per mode and level")
+    ap.add_argument("--warmup", type=float, default=5, help="seconds of unreported load before the steady phase")
+    ap.add_argument("--no-cold", action="store_true", help="skip the cold-cache pass")
+    ap.add_argument("--top-k", type=int, default=5)
+    ap.add_argument("--alpha", type=float, default=0.5)
+    ap.add_argument("--rerank-property", default="chunk")
+    ap.add_argument("--timeout", type=float, default=120)
+    ap.add_argument("--out-json")
+    ap.add_argument("--out-csv")
+    args = ap.parse_args()
+
+    started = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    rows = asyncio.run(run(args))
+    if args.out_json:
+        with open(args.out_json, "w") as f:
+            json.dump({"started": started, "args": vars(args), "results": rows}, f, indent=2)
+    if args.out_csv:
+        stage_names = sorted({k for r in rows for k in r["stage_p50_ms"]})
+        fields = [k for k in rows[0] if k != "stage_p50_ms"] + [f"stage_{s}_p50_ms" for s in stage_names]
+        with open(args.out_csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=fields)
+            w.writeheader()
+            for r in rows:
+                flat = {k: v for k, v in r.items() if k != "stage_p50_ms"}
+                flat.update({f"stage_{s}_p50_ms": r["stage_p50_ms"].get(s) for s in stage_names})
+                w.writerow(flat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the LLM and the inference service, so the API can be benchmarked offline.
+
+* LLM (OpenAI-compatible): POST .../chat/completions, plain or `stream=True` (SSE),
+  with configurable time-to-first-token and per-token delay, plus injected 503s and a slow
+  tail (--llm-error-rate, --llm-slow-rate) to exercise the API's retries and hedging.
+* Inference: POST /vectors (JSON or binary float32, like inference/app.py) with
+  deterministic hashed bag-of-words vectors, POST /rerank (word-overlap scores,
+  optional top_n), GET /.well-known/ready and /meta.
+
+Point the API at them with OPENAI_API_BASE=http://localhost:8001/v1 OPENAI_API_KEY=stub
+INFER_BASE=http://localhost:5001 (Weaviate's text2vec/reranker modules can use the same URL).
+
+Usage:
+  python scripts/stub_servers.py                                   # LLM :8001, inference :5001
+  python scripts/stub_servers.py --llm-ttft-ms 300 --llm-token-ms 20 --embed-ms 5
+  python scripts/stub_servers.py --llm-error-rate 0.05 --llm-slow-rate 0.05 --llm-slow-ms 3000
+"""
+
+import argparse, hashlib, json, random, re, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+WORD = re.compile(r"\w+")
+ANSWER = ("Based on the provided context, the rated power and torque are listed in the specification "
+          "table of the manual, together with the installation and maintenance requirements.")
+
+
+def hashed_vector(text: str, dim: int) -> np.ndarray:
+    vec = np.zeros(dim, dtype=np.float32)
+    for w in WORD.findall(text.lower()):
+        h = int.from_bytes(hashlib.blake2b(w.encode(), digest_size=8).digest(), "little")
+        vec[h % dim] += 1.0 if (h >> 63) else -1.0
+    n = np.linalg.norm(vec)
+    return vec / n if n else vec
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    opts = None  # argparse namespace, set by main()
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        return json.loads(raw or b"{}")
+
+    def _send(self, status: int, data: bytes, ctype: str, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, obj, status: int = 200):
+        self._send(status, json.dumps(obj).encode(), "application/json")
+
+
+class LLMHandler(_Handler):
+    def do_POST(self):
+        body = self._body()
+        if not self.path.endswith("/chat/completions"):
+            return self._json({"error": "not found"}, 404)
+        if random.random() < self.opts.llm_error_rate:
+            return self._json({"error": {"message": "injected overload"}}, 503)
+        if random.random() < self.opts.llm_slow_rate:
+            time.sleep(self.opts.llm_slow_ms / 1000.0)
+        words = ANSWER.split(" ")[: self.opts.llm_tokens]
+        if not body.get("stream"):
+            time.sleep((self.opts.llm_ttft_ms + self.opts.llm_token_ms * len(words)) / 1000.0)
+            return self._json({"choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}}],
+                               "usage": {"prompt_tokens": len(WORD.findall(json.dumps(body))),
+                                         "completion_tokens": len(words)}})
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(payload: str):
+            data = f"data: {payload}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        time.sleep(self.opts.llm_ttft_ms / 1000.0)
+        for i, w in enumerate(words):
+            if i:
+                time.sleep(self.opts.llm_token_ms / 1000.0)
+            send(json.dumps({"choices": [{"index": 0, "delta": {"content": w if i == 0 else " " + w}}]}))
+        send("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class InferenceHandler(_Handler):
+    def do_GET(self):
+        if self.path == "/.well-known/ready":
+            return self._send(200, b"Ready", "text/plain")
+        if self.path == "/meta":
+            return self._json({"status": "Ready", "embedding_model": "stub-hash", "reranker": "stub-overlap"})
+        self._json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/vectors":
+            texts = body.get("text", body) if isinstance(body, dict) else body
+            texts = [texts] if isinstance(texts, str) else texts
+            time.sleep(self.opts.embed_ms / 1000.0)
+            vecs = np.stack([hashed_vector(t, self.opts.dim) for t in texts]) if texts else np.empty((0, 0), "<f4")
+            if "application/octet-stream" in self.headers.get("Accept", ""):
+                return self._send(200, vecs.astype("<f4").tobytes(), "application/octet-stream",
+                                  {"X-Vector-Shape": f"{vecs.shape[0]},{vecs.shape[1]}", "X-Vector-Dtype": "<f4"})
+            return self._json({"vector": vecs.tolist()})
+        if self.path == "/rerank":
+            q = set(WORD.findall(body.get("query", "").lower()))
+            docs = body.get("documents") or []
+            time.sleep(self.opts.rerank_ms / 1000.0)
+            scores = [len(q & set(WORD.findall(d.lower()))) / (len(q) or 1) for d in docs]
+            top_n = body.get("top_n")
+            if top_n:
+                best = sorted(range(len(docs)), key=lambda i: -scores[i])[:top_n]
+                return self._json({"results": [{"index": i, "score": scores[i]} for i in best]})
+            return self._json({"scores": [{"document": d, "score": s} for d, s in zip(docs, scores)]})
+        self._json({"error": "not found"}, 404)
+
+
+def serve(handler, host: str, port: int, name: str) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name=name, daemon=True).start()
+    print(f"[ok] {name} stub on http://{host}:{server.server_address[1]}")
+    return server
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="0.0.0.0")
+    ap.add_argument("--llm-port", type=int, default=8001)
+    ap.add_argument("--infer-port", type=int, default=5001)
+    ap.add_argument("--llm-ttft-ms", type=float, default=200)
+    ap.add_argument("--llm-token-ms", type=float, default=15)
+    ap.add_argument("--llm-tokens", type=int, default=25)
+    ap.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of LLM requests answered with 503")
+    ap.add_argument("--llm-slow-rate", type=float, default=0.0, help="fraction of LLM requests delayed by --llm-slow-ms")
+    ap.add_argument("--llm-slow-ms", type=float, default=2000)
+    ap.add_argument("--embed-ms", type=float, default=5)
+    ap.add_argument("--rerank-ms", type=float, default=10)
+    ap.add_argument("--dim", type=int, default=384)
+    args = ap.parse_args()
+
+    _Handler.opts = args
+    serve(LLMHandler, args.host, args.llm_port, "llm")
+    serve(InferenceHandler, args.host, args.infer_port, "inference")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import os
 import asyncio
+import json
 import time
 from typing import Any, Dict, List, Tuple
 
@@ -17,12 +18,26 @@ with st.sidebar:
     st.header("Upload PDFs")
     # Preserve original uploader + indexing logic exactly
     up_files = st.file_uploader("Select one or more PDFs", type=["pdf"], accept_multiple_files=True)
+    background = st.checkbox("Index in background (job)", value=True,
+                             help="Upload returns at once; progress is polled from /documents/jobs/{id}")
     if up_files and st.button("Index documents"):
         with st.spinner("Uploading & indexing..."):
             try:
                 files = [("files", (f.name, f.read(), "application/pdf")) for f in up_files]
-                r = httpx.post(f"{API_BASE}/documents", files=files, timeout=300)
-                if r.status_code == 200:
+                if background:
+                    r = httpx.post(f"{API_BASE}/documents/jobs", files=files, timeout=120)
+                else:
+                    r = httpx.post(f"{API_BASE}/documents", files=files, timeout=300)
+                if r.status_code == 202:
+                    job = r.json()
+                    status_line = st.empty()
+                    while job.get("status") in ("queued", "running"):
+                        time.sleep(1.0)
+                        job = httpx.get(f"{API_BASE}{r.json()['status_url']}", timeout=10).json()
+                        status_line.caption(f"{job['status']} · pages {job['pages']} · embedded {job['chunks_embedded']}"
+                                            f" · inserted {job['chunks_inserted']} · {job['chunks_per_s'] or 0} chunks/s")
+                    (st.success if job["status"] == "done" and not job["errors"] else st.warning)(job)
+                elif r.status_code == 200:
                     st.success(r.json())
                 else:
                     st.error(f"{r.status_code} - {r.text}")
@@ -52,6 +67,7 @@ MODES: List[Tuple[str, str]] = [
     ("semantic_rerank", "Semantic Reranking Search"),
     ("bm25", "BM25 Syntactic Search"),
     ("hybrid", "Hybrid Search"),
+    ("local_rerank", "Over-fetch + Local Rerank"),
     ("no_rag", "No RAG"),
 ]
 
@@ -71,8 +87,10 @@ def extract_answer_and_refs(payload: Dict[str, Any]) -> Tuple[str, List[str]]:
         out.append(str(refs))
     return ans, out
 
-async def _call_one(client: httpx.AsyncClient, mode: str, question: str, top_k: int, alpha: float, rr_prop: str):
-    url = f"{API_BASE}/question"
+async def _stream_one(client: httpx.AsyncClient, mode: str, question: str, top_k: int, alpha: float, rr_prop: str,
+                      slot: Dict[str, Any]):
+    """Stream one mode's answer into its column; returns latency, TTFT and the final payload."""
+    url = f"{API_BASE}/question/stream"
     payload = {
         "question": question,
         "mode": mode,
@@ -81,23 +99,69 @@ async def _call_one(client: httpx.AsyncClient, mode: str, question: str, top_k:
         "rerank_property": rr_prop,
     }
     t0 = time.perf_counter()
-    resp = await client.post(url, json=payload, timeout=60)
+    ttft_ms, text, data = None, "", {}
+    async with client.stream("POST", url, json=payload, timeout=60) as resp:
+        if resp.status_code != 200:
+            await resp.aread()
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if not line:
+                continue
+            ev = json.loads(line)
+            if ev["type"] == "references":
+                data["references"] = ev.get("references") or []
+            elif ev["type"] == "token":
+                if ttft_ms is None:
+                    ttft_ms = int((time.perf_counter() - t0) * 1000)
+                    slot["timing"].caption(f"TTFT: {ttft_ms} ms · Latency: …")
+                text += ev["text"]
+                slot["answer"].markdown(text + "▌")
+            elif ev["type"] == "error":
+                raise RuntimeError(ev["error"])
     dt_ms = int((time.perf_counter() - t0) * 1000)
+    data["answer"] = text
+    return {"mode": mode, "latency_ms": dt_ms, "ttft_ms": ttft_ms, "data": data}
+
+async def _retrieve_one(client: httpx.AsyncClient, mode: str, question: str, top_k: int, alpha: float, rr_prop: str,
+                        slot: Dict[str, Any]):
+    """POST /retrieve for one mode (retriever only, no LLM); returns latency and the scored contexts."""
+    payload = {"question": question, "mode": mode, "top_k": top_k, "alpha": alpha, "rerank_property": rr_prop}
+    t0 = time.perf_counter()
+    resp = await client.post(f"{API_BASE}/retrieve", json=payload, timeout=60)
     resp.raise_for_status()
-    return {"mode": mode, "latency_ms": dt_ms, "data": resp.json()}
+    dt_ms = int((time.perf_counter() - t0) * 1000)
+    return {"mode": mode, "latency_ms": dt_ms, "ttft_ms": None, "data": resp.json()}
 
-async def run_benchmark(question: str, top_k: int, alpha: float, rr_prop: str):
+async def run_benchmark(question: str, top_k: int, alpha: float, rr_prop: str, slots: Dict[str, Dict[str, Any]],
+                        modes: List[Tuple[str, str]] = MODES, retrieval_only: bool = False):
+    one = _retrieve_one if retrieval_only else _stream_one
     async with httpx.AsyncClient() as client:
-        tasks = [_call_one(client, mode, question, top_k, alpha, rr_prop) for mode, _ in MODES]
+        tasks = [one(client, mode, question, top_k, alpha, rr_prop, slots[mode]) for mode, _ in modes]
         results = await asyncio.gather(*tasks, return_exceptions=True)
     packed = []
-    for (mode, label), res in zip(MODES, results):
+    for (mode, label), res in zip(modes, results):
         if isinstance(res, Exception):
             packed.append({"mode": mode, "label": label, "error": str(res)})
         else:
             packed.append({"mode": mode, "label": label, **res})
     return packed
 
+def run_compare(question: str, top_k: int, alpha: float, rr_prop: str, modes: List[Tuple[str, str]]):
+    """One POST /question/compare for all modes (shared query embedding and Weaviate client)."""
+    payload = {"question": question, "modes": [m for m, _ in modes], "top_k": top_k, "alpha": alpha,
+               "rerank_property": rr_prop}
+    r = httpx.post(f"{API_BASE}/question/compare", json=payload, timeout=120)
+    r.raise_for_status()
+    labels = dict(modes)
+    packed = []
+    for res in r.json()["results"]:
+        row = {"mode": res["mode"], "label": labels.get(res["mode"], res["mode"])}
+        if res.get("error"):
+            packed.append({**row, "error": res["error"]})
+        else:
+            packed.append({**row, "latency_ms": int(res["latency_ms"]), "ttft_ms": None, "data": res})
+    return packed
+
 def top_bar_nav():
     # Right-aligned CTA to switch views
     left, right = st.columns([5, 1])
@@ -118,13 +182,18 @@ def view_qa():
     st.subheader("Ask a question")
     # Preserve existing QA controls and logic exactly
     q = st.text_input("Your question")
-    mode = st.selectbox("Mode", ["semantic","semantic_rerank","bm25","hybrid","no_rag"], index=3)
+    mode = st.selectbox("Mode", [m for m, _ in MODES], index=3)
     top_k = st.slider("Top K", 1, 10, 5)
     alpha = st.slider("Alpha (hybrid)", 0.0, 1.0, 0.5)
     rerank_prop = st.selectbox("Rerank property", ["chunk","title"], index=0)
 
+    stream = st.checkbox("Stream answer", value=True)
+
     if st.button("Get Answer"):
         payload = {"question": q, "mode": mode, "top_k": top_k, "alpha": alpha, "rerank_property": rerank_prop}
+        if stream:
+            render_streamed_answer(payload)
+            return
         with st.spinner("Thinking..."):
             r = httpx.post(f"{API_BASE}/question", json=payload, timeout=120)
             if r.status_code != 200:
@@ -133,21 +202,76 @@ def view_qa():
                 data = r.json()
                 st.markdown("### Answer")
                 st.write(data.get("answer", ""))
-                if data.get("references"):
-                    st.markdown("### References")
-                    for i, ref in enumerate(data["references"], 1):
-                        st.write(f"{i}. {ref}")
-                if data.get("contexts"):
-                    with st.expander("Show retrieved context"):
-                        for c in data["contexts"]:
-                            st.markdown(f"**{c.get('title','')} (p.{c.get('page','?')})**")
-                            st.write(c.get("chunk", "")[:1500])
-                            st.write("---")
+                render_references(data.get("references"), data.get("contexts"))
+
+def render_references(references, contexts):
+    if references:
+        st.markdown("### References")
+        for i, ref in enumerate(references, 1):
+            st.write(f"{i}. {ref}")
+    if contexts:
+        with st.expander("Show retrieved context"):
+            for c in contexts:
+                st.markdown(f"**{c.get('title','')} (p.{c.get('page','?')})**")
+                st.write(c.get("chunk", "")[:1500])
+                st.write("---")
+
+def _packing_note(packing) -> str:
+    if not packing:
+        return ""
+    return f" · prompt tokens {packing['prompt_tokens_before']} → {packing['prompt_tokens_after']}"
+
+def render_streamed_answer(payload: Dict[str, Any]):
+    st.markdown("### Answer")
+    timing, answer_box, refs_box = st.empty(), st.empty(), st.container()
+    text, refs = "", None
+    t0 = time.perf_counter()
+    with httpx.stream("POST", f"{API_BASE}/question/stream", json=payload, timeout=120) as r:
+        if r.status_code != 200:
+            r.read()
+            st.error(r.text)
+            return
+        for line in r.iter_lines():
+            if not line:
+                continue
+            ev = json.loads(line)
+            if ev["type"] == "references":
+                refs = ev
+                timing.caption(f"Retrieval: {ev['retrieval_ms']} ms · waiting for first token…")
+            elif ev["type"] == "token":
+                if not text:
+                    timing.caption(f"TTFT: {int((time.perf_counter() - t0) * 1000)} ms")
+                text += ev["text"]
+                answer_box.markdown(text + "▌")
+            elif ev["type"] == "done":
+                timing.caption(f"TTFT: {ev['ttft_ms']} ms · Total: {ev['total_ms']} ms"
+                               + (" · cached" if ev.get("cached") else "") + _packing_note(ev.get("packing")))
+            elif ev["type"] == "error":
+                st.error(ev["error"])
+    answer_box.markdown(text)
+    if refs:
+        with refs_box:
+            render_references(refs.get("references"), refs.get("contexts"))
+
+def _fmt_score(c: Dict[str, Any]) -> str:
+    parts = [f"{k} {c[k]:.3f}" for k in ("score", "distance", "rerank_score") if c.get(k) is not None]
+    return " · ".join(parts) or "no score"
+
+def render_retrieval(slot: Dict[str, Any], r: Dict[str, Any]):
+    data = r.get("data", {}) or {}
+    stages = " · ".join(f"{k}: {v} ms" for k, v in (data.get("timings") or {}).items())
+    slot["timing"].caption(f"Latency: {r.get('latency_ms')} ms" + (f" · {stages}" if stages else ""))
+    contexts = data.get("contexts") or []
+    slot["answer"].markdown(f"{len(contexts)} contexts" if contexts else "—")
+    with slot["refs"]:
+        for i, c in enumerate(contexts, 1):
+            st.markdown(f"{i}. {c.get('title','')} (p.{c.get('page','?')}) — {_fmt_score(c)}")
 
 def view_benchmark():
     st.title("⚡ Latency Benchmark")
     top_bar_nav()
-    st.caption("Runs all 5 retrieval strategies in parallel and shows per-mode latency with answers and references.")
+    st.caption(f"Runs all {len(MODES)} retrieval strategies in parallel and shows per-mode latency with answers and references "
+               "(or, with \"Retrieval only\", retriever latency and scores).")
 
     # Horizontal control row
     q_col, k_col, a_col, rr_col, go_col = st.columns([4, 1, 1, 2, 1])
@@ -161,6 +285,11 @@ def view_benchmark():
         rerank_property = st.selectbox("Rerank property", ["title", "text", "chunk", "content"], index=0)
     with go_col:
         run = st.button("Get Answers", type="primary", use_container_width=True)
+    retrieval_only = st.checkbox("Retrieval only (no LLM)", value=False,
+                                 help="Calls /retrieve: compares retriever latency and scores without generating answers.")
+    shared = st.checkbox("Single compare request", value=False, disabled=retrieval_only,
+                         help="Calls /question/compare once: one query embedding and Weaviate client for all modes.")
+    modes = [(m, label) for m, label in MODES if m != "no_rag"] if retrieval_only else MODES
 
     st.divider()
 
@@ -168,34 +297,50 @@ def view_benchmark():
         if not question.strip():
             st.warning("Please enter a question.")
             return
-        with st.spinner("Running all strategies…"):
-            results = asyncio.run(run_benchmark(question, top_k, alpha, rerank_property))
-
-        cols = st.columns(5)
-        for (mode, label), col in zip(MODES, cols):
+        # one column per mode, filled in as each answer streams
+        cols = st.columns(len(modes))
+        slots: Dict[str, Dict[str, Any]] = {}
+        for (mode, label), col in zip(modes, cols):
             with col:
                 box = st.container(border=True)
                 with box:
                     st.subheader(label, anchor=False)
-                    r = next((x for x in results if x["mode"] == mode), None)
-                    if not r:
-                        st.error("No result.")
-                        continue
-                    if "error" in r:
-                        st.error(r["error"])
-                        st.caption("Latency: —")
-                        continue
-                    latency_ms = r.get("latency_ms")
-                    st.caption(f"Latency: {latency_ms} ms" if latency_ms is not None else "Latency: —")
-
-                    data = r.get("data", {}) or {}
-                    answer, refs = extract_answer_and_refs(data)
-                    st.markdown("**Answer**")
-                    st.write(answer or "—")
-                    if refs:
-                        st.markdown("**References**")
-                        for i, ref in enumerate(refs, 1):
-                            st.markdown(f"{i}. {ref}")
+                    slots[mode] = {"timing": st.empty(), "answer": st.empty(), "refs": st.container()}
+                    slots[mode]["timing"].caption("Latency: …")
+        with st.spinner("Running all strategies…"):
+            if shared and not retrieval_only:
+                try:
+                    results = run_compare(question, top_k, alpha, rerank_property, modes)
+                except httpx.HTTPError as e:
+                    results = [{"mode": m, "label": label, "error": str(e)} for m, label in modes]
+            else:
+                results = asyncio.run(run_benchmark(question, top_k, alpha, rerank_property, slots, modes, retrieval_only))
+
+        for mode, _ in modes:
+            slot = slots[mode]
+            r = next((x for x in results if x["mode"] == mode), None)
+            if not r:
+                slot["answer"].error("No result.")
+                continue
+            if "error" in r:
+                slot["answer"].error(r["error"])
+                slot["timing"].caption("Latency: —")
+                continue
+            if retrieval_only:
+                render_retrieval(slot, r)
+                continue
+            latency_ms, ttft_ms = r.get("latency_ms"), r.get("ttft_ms")
+            ttft = f"{ttft_ms} ms" if ttft_ms is not None else "—"
+            slot["timing"].caption(f"TTFT: {ttft} · Latency: {latency_ms} ms" if latency_ms is not None else "Latency: —")
+
+            data = r.get("data", {}) or {}
+            answer, refs = extract_answer_and_refs(data)
+            slot["answer"].markdown(answer or "—")
+            if refs:
+                with slot["refs"]:
+                    st.markdown("**References**")
+                    for i, ref in enumerate(refs, 1):
+                        st.markdown(f"{i}. {ref}")
 
 # ----- Router -----
 if "view" not in st.session_state: